@@ -0,0 +1,140 @@
+"""
+Microbenchmark: response compression of employee lists in employee-api-app.
+
+Sends a 10k-row employee list through CompressionMiddleware as one JSON body
+and as a streamed NDJSON response (500-row chunks), for every available
+encoding (gzip, br, zstd) and level profile (fast, default, small). Reports
+wire bytes, server-side compression time, client-side decompression time and
+the end-to-end time saved over an uncompressed response at each
+``--bandwidth-mbps`` (transfer time saved minus the CPU spent on both ends).
+
+Usage:
+    python benchmarks/bench_compression.py [--rows 10000] [--repeat 5] [--bandwidth-mbps 10,100,1000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "employee-api-app", "app"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "employee-common"))
+
+from employee_common.compression import AVAILABLE, PROFILES, CompressionMiddleware  # noqa: E402
+from serializers import encode_employee_ndjson, encode_employee_rows  # noqa: E402
+
+from bench_list_serialization import make_rows  # noqa: E402
+
+CHUNK_ROWS = 500
+
+
+def make_app(rows):
+    """Minimal ASGI app serving the list as one body (/full) and as NDJSON chunks (/stream)."""
+    full = encode_employee_rows(rows)
+    chunks = [encode_employee_ndjson(rows[i:i + CHUNK_ROWS]) for i in range(0, len(rows), CHUNK_ROWS)]
+
+    async def app(scope, receive, send):
+        if scope["path"] == "/full":
+            headers = [(b"content-type", b"application/json"), (b"content-length", str(len(full)).encode())]
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": full})
+            return
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    return app
+
+
+async def request(app, path, encoding):
+    """Run one request through *app*; returns (headers, body chunks)."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": [(b"accept-encoding", encoding.encode())]}
+    await app(scope, receive, send)
+    headers = dict(sent[0]["headers"])
+    return headers, [m.get("body", b"") for m in sent[1:]]
+
+
+def decompress(encoding, chunks):
+    if encoding == "identity":
+        return b"".join(chunks)
+    if encoding == "gzip":
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        return b"".join(decoder.decompress(c) for c in chunks) + decoder.flush()
+    if encoding == "br":
+        import brotli
+
+        decoder = brotli.Decompressor()
+        return b"".join(decoder.process(c) for c in chunks)
+    import zstandard
+
+    decoder = zstandard.ZstdDecompressor().decompressobj()
+    return b"".join(decoder.decompress(c) for c in chunks)
+
+
+def measure(app, path, encoding, repeat):
+    asyncio.run(request(app, path, encoding))  # warm-up
+    server, client = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        headers, chunks = asyncio.run(request(app, path, encoding))
+        server.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        body = decompress(encoding, chunks)
+        client.append(time.perf_counter() - start)
+    assert headers.get(b"content-encoding", b"identity").decode() == encoding
+    return sum(map(len, chunks)), body, min(server), min(client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--bandwidth-mbps", default="10,100,1000")
+    args = parser.parse_args()
+    bandwidths = [float(b) for b in args.bandwidth_mbps.split(",")]
+
+    inner = make_app(make_rows(args.rows))
+    results = []
+    for path in ("/full", "/stream"):
+        identity = CompressionMiddleware(inner, encodings=["gzip"], route_profiles="")
+        raw_bytes, expected, raw_server, _ = measure(identity, path, "identity", args.repeat)
+        results.append({"response": path[1:], "encoding": "identity", "bytes": raw_bytes,
+                        "server_ms": round(raw_server * 1000, 2)})
+        for encoding in [e for e in ("gzip", "br", "zstd") if AVAILABLE[e]]:
+            for profile in PROFILES:
+                app = CompressionMiddleware(inner, encodings=[encoding], route_profiles="", default_profile=profile)
+                size, body, server, client = measure(app, path, encoding, args.repeat)
+                assert body == expected
+                cpu = max(0.0, server - raw_server) + client
+                results.append({
+                    "response": path[1:],
+                    "encoding": encoding,
+                    "profile": profile,
+                    "level": PROFILES[profile][encoding],
+                    "bytes": size,
+                    "ratio": round(raw_bytes / size, 1),
+                    "server_ms": round(server * 1000, 2),
+                    "decompress_ms": round(client * 1000, 2),
+                    "saved_ms": {
+                        f"{mbps:g}mbps": round(((raw_bytes - size) * 8 / (mbps * 1e6) - cpu) * 1000, 1)
+                        for mbps in bandwidths
+                    },
+                })
+
+    print(json.dumps({"rows": args.rows, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
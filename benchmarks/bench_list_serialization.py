@@ -0,0 +1,87 @@
+"""
+Microbenchmark: employee list serialization in employee-api-app.
+
+Compares the original response path (ORM row -> EmployeeResponse.model_validate
+-> EmployeeListResponse -> FastAPI jsonable_encoder + json.dumps) with the fast
+path (row tuples -> encode_employee_rows) at 1k, 10k and 100k rows.
+
+Usage:
+    python benchmarks/bench_list_serialization.py [--sizes 1000,10000,100000] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "employee-api-app", "app"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from models import EmployeeListResponse, EmployeeResponse  # noqa: E402
+from serializers import encode_employee_rows  # noqa: E402
+
+
+def make_rows(count):
+    base = datetime(2025, 1, 1)
+    return [
+        (f"Employee {i}", f"employee{i}@example.com", base + timedelta(seconds=i, microseconds=i))
+        for i in range(count)
+    ]
+
+
+def model_path(objects):
+    response = EmployeeListResponse(
+        employees=[EmployeeResponse.model_validate(obj) for obj in objects]
+    )
+    # FastAPI re-validates against response_model, then renders with json.dumps
+    validated = EmployeeListResponse.model_validate(response.model_dump())
+    return json.dumps(
+        jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_path(rows):
+    return encode_employee_rows(rows)
+
+
+def best_of(fn, arg, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        rows = make_rows(size)
+        objects = [SimpleNamespace(name=n, email=e, created_at=c) for n, e, c in rows]
+
+        # Both paths must produce the same document
+        assert json.loads(model_path(objects[:100])) == json.loads(fast_path(rows[:100]))
+
+        model_seconds = best_of(model_path, objects, args.repeat)
+        fast_seconds = best_of(fast_path, rows, args.repeat)
+        results.append({
+            "rows": size,
+            "model_path_ms": round(model_seconds * 1000, 2),
+            "fast_path_ms": round(fast_seconds * 1000, 2),
+            "speedup": round(model_seconds / fast_seconds, 1),
+            "body_bytes": len(fast_path(rows)),
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Microbenchmark: employee -> member diff in the sync functions.
+
+Compares the original approach (parse the whole JSON body, build a set of
+``user:`` members, copy and lowercase the binding several times, set
+differences) with the streaming one (NDJSON chunks -> SortedMembers.from_emails
+-> windowed merge_diff) at 1k to 1M members.
+
+Input comes in two orders: ``api`` (ordered by email, as
+``/api/employees`` streams it) and ``shuffled`` (worst case for the sorted
+runs). Each run reports time, CPU time and the Python heap peak (tracemalloc) over
+the diff itself. The input payload is built before the measurement starts, so
+it is not counted. About 1% of the current members are stale and 1% of the
+employees are new, and some emails differ only in case.
+
+Usage:
+    python benchmarks/bench_member_diff.py [--sizes 1000,10000,100000,1000000] [--repeat 3]
+                                           [--order api,shuffled]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "sync-common"))
+
+from sync_common.members import SortedMembers, merge_diff, parse_ndjson  # noqa: E402
+
+
+def make_input(count, order="api", seed=0):
+    """Return (ndjson_chunks, json_body, current_binding_members)."""
+    rng = random.Random(seed)
+    emails = [f"Employee{i}@Corp.test" if i % 7 == 0 else f"employee{i}@corp.test" for i in range(count)]
+    emails += [f"placeholder{i}@example.com" for i in range(max(1, count // 100))]
+    if order == "api":
+        emails.sort()
+    else:
+        rng.shuffle(emails)
+    ndjson = "".join(json.dumps({"name": e.split("@")[0], "email": e}) + "\n" for e in emails).encode()
+    # As read from the response body, in 1 MiB chunks that split lines
+    chunks = [ndjson[i:i + 1024 * 1024] for i in range(0, len(ndjson), 1024 * 1024)]
+    body = json.dumps({"employees": [{"name": e.split("@")[0], "email": e} for e in emails]}).encode()
+
+    # Current binding: 98% of employees plus 1% stale users and a few non-user principals
+    current = [f"user:{e}" for e in emails[: int(len(emails) * 0.98)] if not e.endswith("@example.com")]
+    current += [f"user:former{i}@corp.test" for i in range(max(1, count // 100))]
+    current += ["serviceAccount:sync@project.iam.gserviceaccount.com", "group:admins@corp.test"]
+    rng.shuffle(current)
+    return chunks, body, current
+
+
+def original(chunks, body, current):
+    data = json.loads(body)
+    desired = {
+        f"user:{emp['email'].lower()}"
+        for emp in data.get("employees", [])
+        if not emp["email"].lower().endswith("@example.com")
+    }
+    current_members = {m.lower() for m in current if m.lower().startswith("user:")}
+    to_add = desired - current_members
+    to_remove = current_members - desired
+    new_members = [m for m in current if not (m.lower().startswith("user:") and m.lower() in to_remove)]
+    new_members.extend(to_add)
+    return len(to_add), len(to_remove), len(new_members)
+
+
+def streaming(chunks, body, current):
+    emails = (employee["email"] for batch in parse_ndjson(chunks) for employee in batch)
+    desired = SortedMembers.from_emails(emails)
+    lowered = [m.lower() for m in current]
+    current_members = sorted({m for m in lowered if m.startswith("user:")})
+    to_add, to_remove = [], set()
+    for op, member in merge_diff(desired, current_members):
+        if op == "add":
+            to_add.append(member)
+        else:
+            to_remove.add(member)
+    new_members = [m for m, low in zip(current, lowered) if low not in to_remove]
+    new_members.extend(to_add)
+    return len(to_add), len(to_remove), len(new_members)
+
+
+def measure(fn, args, repeat):
+    wall, cpu = [], []
+    for _ in range(repeat):
+        gc.collect()
+        start, start_cpu = time.perf_counter(), time.process_time()
+        result = fn(*args)
+        wall.append(time.perf_counter() - start)
+        cpu.append(time.process_time() - start_cpu)
+    gc.collect()
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {
+        "seconds": round(min(wall), 4),
+        "cpu_seconds": round(min(cpu), 4),
+        "peak_mb": round(peak / (1024 * 1024), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--order", default="api,shuffled")
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        for order in args.order.split(","):
+            payload = make_input(size, order)
+            expected, before = measure(original, payload, args.repeat)
+            got, after = measure(streaming, payload, args.repeat)
+            if got != expected:
+                raise SystemExit(f"diff mismatch at {size}/{order}: {got} != {expected}")
+            results.append({
+                "members": size,
+                "order": order,
+                "added": got[0],
+                "removed": got[1],
+                "original": before,
+                "streaming": after,
+                "peak_ratio": round(before["peak_mb"] / after["peak_mb"], 2) if after["peak_mb"] else None,
+            })
+            del payload
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
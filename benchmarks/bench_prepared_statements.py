@@ -0,0 +1,161 @@
+"""
+Microbenchmark: prepared statements and pooled connections in employee-api.
+
+Runs the hot statements of employee-api (api_keys lookup, employee list,
+get-by-id, insert) against a throwaway local PostgreSQL in three modes:
+
+    connect   a new connection per query, plain SQL (the old request path)
+    plain     a pooled connection, plain SQL (parsed and planned every time)
+    prepared  a pooled connection, PREPAREd once and EXECUTEd by name
+
+and reports the mean and p50/p95 time per query in microseconds, plus the
+saving of ``prepared`` over ``plain``. PostgreSQL comes from --postgres-dsn,
+otherwise from initdb/pg_ctl or Docker as in loadtest.py.
+
+Usage:
+    python benchmarks/bench_prepared_statements.py [--rows 1000] [--queries 2000] [--postgres-dsn DSN]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from loadtest import local_postgres
+
+EMPLOYEE_API = os.path.join(os.path.dirname(__file__), "..", "employee-api")
+
+
+def configure(dsn, schema):
+    """Point employee-api's database settings at *dsn*; must run before importing app.db."""
+    settings = dict(part.split("=", 1) for part in dsn.split())
+    os.environ.update(
+        DB_HOST=settings.get("host", "127.0.0.1"),
+        DB_PORT=settings.get("port", "5432"),
+        DB_NAME=settings.get("dbname", "postgres"),
+        DB_USER=settings.get("user", "postgres"),
+        DB_PASSWORD=settings.get("password", "unused"),
+        # Keep the tables out of the way of anything already in --postgres-dsn
+        PGOPTIONS=f"-c search_path={schema}",
+    )
+    sys.path.insert(0, EMPLOYEE_API)
+
+
+def seed(conn, schema, rows):
+    cur = conn.cursor()
+    cur.execute(f"CREATE SCHEMA {schema}")
+    conn.commit()
+    from app.main import init_db
+
+    init_db()
+    cur.execute("INSERT INTO users (username, email, password_hash) VALUES ('bench', 'bench@example.com', 'x') "
+                "RETURNING user_id")
+    user_id = cur.fetchone()[0]
+    cur.execute("INSERT INTO api_keys (user_id, api_id, api_secret_hash, expires_at) "
+                "SELECT %s, 'key-' || i, 'x', NOW() + INTERVAL '1 day' FROM generate_series(1, 1000) i", (user_id,))
+    cur.execute("INSERT INTO employees (first_name, last_name, email, department, position, salary) "
+                "SELECT 'First' || i, 'Last' || i, 'e' || i || '@example.com', 'Engineering', 'Engineer', 100000 "
+                "FROM generate_series(1, %s) i", (rows,))
+    conn.commit()
+    cur.close()
+
+
+def workload(name, i, rows):
+    """Parameters for the i-th execution of statement *name*."""
+    if name == "api_key_lookup":
+        return (f"key-{i % 1000 + 1}",)
+    if name == "employee_changes":
+        return (datetime.now() - timedelta(seconds=1),)
+    if name == "employee_by_id":
+        return (i % rows + 1,)
+    if name == "employee_insert":
+        return ("Bench", "Insert", f"{uuid.uuid4().hex}@example.com", "Engineering", "Engineer", 90000.0, None)
+    return ()
+
+
+def run(mode, name, queries, rows, db_router, statements, InstrumentedCursor):
+    """Time *queries* executions of *name*; returns per-query seconds."""
+    samples = []
+    conn = None if mode == "connect" else db_router.primary()
+    try:
+        for i in range(queries + 10):
+            params = workload(name, i, rows)
+            start = time.perf_counter()
+            c = db_router.connect_primary() if mode == "connect" else conn
+            cur = c.cursor(cursor_factory=InstrumentedCursor)
+            if mode == "prepared":
+                statements.execute(cur, name, params)
+            else:
+                cur.execute(statements.STATEMENTS[name], params or None)
+            cur.fetchall()
+            if name == "employee_insert":
+                c.commit()
+            cur.close()
+            if mode == "connect":
+                c.close()
+            else:
+                c.rollback()  # what the pool does when a read connection comes back
+            if i >= 10:  # warm-up (and, for prepared, the one-off PREPARE)
+                samples.append(time.perf_counter() - start)
+    finally:
+        if conn is not None:
+            db_router.release(conn)
+    return samples
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "mean_us": round(sum(samples) / len(samples) * 1e6, 1),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 1),
+        "p95_us": round(samples[int(len(samples) * 0.95)] * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1000, help="employees in the table (the list returns all)")
+    parser.add_argument("--queries", type=int, default=2000, help="executions per statement and mode")
+    parser.add_argument("--modes", default="connect,plain,prepared")
+    parser.add_argument("--postgres-dsn", help="use an existing PostgreSQL instead of a throwaway one")
+    args = parser.parse_args()
+    modes = args.modes.split(",")
+
+    schema = f"bench_{uuid.uuid4().hex[:8]}"
+    with tempfile.TemporaryDirectory() as workdir, local_postgres(workdir, args.postgres_dsn) as dsn:
+        configure(dsn, schema)
+        from app import statements
+        from app.db import db_router
+        from app.metrics import InstrumentedCursor
+
+        setup = db_router.connect_primary()
+        seed(setup, schema, args.rows)
+
+        results = {}
+        for name in statements.STATEMENTS:
+            # The list returns every row; keep its run short enough to stay a per-query measurement
+            queries = max(50, args.queries // 10) if name == "employee_list" else args.queries
+            results[name] = {
+                mode: summarize(run(mode, name, queries, args.rows, db_router, statements, InstrumentedCursor))
+                for mode in modes
+            }
+            if "plain" in results[name] and "prepared" in results[name]:
+                plain, prepared = results[name]["plain"]["mean_us"], results[name]["prepared"]["mean_us"]
+                results[name]["prepared_saves_us"] = round(plain - prepared, 1)
+                results[name]["prepared_saves_pct"] = round((plain - prepared) / plain * 100, 1)
+
+        asyncio.run(db_router.stop())  # closes the pooled connections
+        cur = setup.cursor()
+        cur.execute(f"DROP SCHEMA {schema} CASCADE")
+        setup.commit()
+        setup.close()
+        print(json.dumps({"rows": args.rows, "queries": args.queries, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
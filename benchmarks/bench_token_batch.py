@@ -0,0 +1,135 @@
+"""
+Throughput benchmark: token generator, one call per token vs. batch mode.
+
+Issues ``--tokens`` tokens through ``generate_token`` with the KMS client
+replaced by ``fake_kms.FakeKMS`` (fixed latency per encrypt call):
+
+* ``sequential``: one request per token, as onboarding scripts do today
+* ``batch-N``: one ``{"tokens": [...]}`` request, N KMS calls in flight
+
+Every ``--invalid-every``-th entry lacks its secret, to exercise per-entry
+errors. Each run reports wall time and tokens per second, and checks that
+every result sits at its entry's index and decrypts to that entry's user.
+
+Needs the token generator's requirements (functions-framework,
+google-cloud-kms); no GCP project or credentials.
+
+Usage:
+    python benchmarks/bench_token_batch.py [--tokens 500] [--kms-latency-ms 20]
+                                           [--concurrency 1,4,16,64] [--invalid-every 50]
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "cloud-functions", "token-generator"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as token_generator  # noqa: E402
+from fake_kms import FakeKMS  # noqa: E402
+
+
+class Request:
+    """The parts of the Flask request generate_token reads"""
+
+    method = "POST"
+    headers = {}
+
+    def __init__(self, body):
+        self.body = body
+
+    def get_json(self, silent=False):
+        return self.body
+
+
+def entries(count, invalid_every):
+    result = []
+    for i in range(count):
+        entry = {"api_id": f"api-{i}", "api_secret": f"secret-{i}", "user_id": f"user{i}", "expiry_hours": 24}
+        if invalid_every and i % invalid_every == invalid_every - 1:
+            del entry["api_secret"]
+        result.append(entry)
+    return result
+
+
+def check(kms, batch, results):
+    """Each result is at its entry's index and holds that entry's token (or an error for an invalid one)"""
+    for index, (entry, result) in enumerate(zip(batch, results)):
+        if result.get("index", index) != index:
+            return False
+        if "api_secret" not in entry:
+            if "error" not in result:
+                return False
+            continue
+        if "error" in result:
+            continue  # injected KMS failure, reported in place
+        payload = json.loads(kms.decrypt({"ciphertext": base64.b64decode(result["token"])}).plaintext)
+        if payload["user_id"] != entry["user_id"] or result["user_id"] != entry["user_id"]:
+            return False
+    return len(results) == len(batch)
+
+
+def run_sequential(batch):
+    start = time.perf_counter()
+    results = []
+    for entry in batch:
+        body, status, _ = token_generator.generate_token(Request(entry))
+        results.append(json.loads(body) if status == 200 else {"error": json.loads(body)["error"]})
+    return time.perf_counter() - start, results
+
+
+def run_batch(batch, concurrency):
+    token_generator.TOKEN_BATCH_CONCURRENCY = concurrency
+    token_generator._executor = None  # rebuilt at the new size
+    start = time.perf_counter()
+    body, status, _ = token_generator.generate_token(Request({"tokens": batch}))
+    elapsed = time.perf_counter() - start
+    if token_generator._executor is not None:
+        token_generator._executor.shutdown()
+    assert status == 200, body
+    return elapsed, json.loads(body)["results"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tokens", type=int, default=500)
+    parser.add_argument("--kms-latency-ms", type=float, default=20.0, help="fake KMS time per encrypt call")
+    parser.add_argument("--kms-max-inflight", type=int, default=0, help="fake KMS concurrency cap (0: none)")
+    parser.add_argument("--kms-error-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--invalid-every", type=int, default=50, help="every Nth entry is invalid (0: none)")
+    args = parser.parse_args()
+
+    token_generator.TOKEN_BATCH_MAX = max(token_generator.TOKEN_BATCH_MAX, args.tokens)
+    batch = entries(args.tokens, args.invalid_every)
+    runs = [("sequential", None)] + [(f"batch-{c}", int(c)) for c in args.concurrency.split(",")]
+
+    results = {}
+    for name, concurrency in runs:
+        kms = FakeKMS(args.kms_latency_ms, args.kms_max_inflight, args.kms_error_rate)
+        token_generator._kms_client = kms
+        if concurrency is None:
+            elapsed, issued = run_sequential(batch)
+        else:
+            elapsed, issued = run_batch(batch, concurrency)
+        results[name] = {
+            "seconds": round(elapsed, 3),
+            "tokens_per_second": round(args.tokens / elapsed, 1),
+            "failed": sum(1 for r in issued if "error" in r),
+            "kms_calls": kms.stats["calls"],
+            "kms_max_inflight": kms.stats["max_inflight"],
+            "correct": check(kms, batch, issued),
+        }
+    sequential = results["sequential"]["seconds"]
+    for name, result in results.items():
+        result["speedup"] = round(sequential / result["seconds"], 1)
+
+    print(json.dumps({"tokens": args.tokens, "kms_latency_ms": args.kms_latency_ms, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Local fake of the Admin SDK Directory API group member endpoints.
+
+Serves what google-group-sync uses: listing members (paginated), inserting
+and deleting members, and the HTTP batch endpoint. A per-call quota (each
+call inside a batch counts once) returns 429 ``rateLimitExceeded``, and
+random 503s can be injected, so the writer's retry and rate control can be
+exercised without a Workspace domain. ``GET /_stats`` returns call counters
+and ``GET /_members?group=`` the current member list.
+
+Usage:
+    python benchmarks/fake_directory_api.py [--port 8089] [--qps 40] [--latency-ms 30]
+                                            [--call-latency-ms 2] [--error-rate 0]
+    DIRECTORY_API_URL=http://127.0.0.1:8089 DIRECTORY_API_TOKEN=fake ...
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+MEMBERS_PREFIX = "/admin/directory/v1/groups/"
+BATCH_PATH = "/batch/admin/directory_v1"
+REASONS = {404: "notFound", 409: "duplicate", 429: "rateLimitExceeded", 503: "backendError"}
+
+
+class FakeDirectory:
+    """Group state, quota and counters shared by all request threads."""
+
+    def __init__(self, qps=40.0, latency_ms=30.0, call_latency_ms=2.0, error_rate=0.0, seed=0):
+        self.groups = {}
+        self.qps = qps
+        self.latency = latency_ms / 1000
+        self.call_latency = call_latency_ms / 1000
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "batches": 0, "calls": 0, "throttled": 0, "errors": 0}
+        self._tokens = qps
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+
+    def seed(self, group, emails, role="MEMBER"):
+        with self._lock:
+            members = self.groups.setdefault(group, {})
+            for email in emails:
+                members[email.lower()] = role
+
+    def _admit(self):
+        # Token bucket of one second's worth of calls
+        now = time.monotonic()
+        self._tokens = min(self.qps, self._tokens + (now - self._refilled) * self.qps)
+        self._refilled = now
+        if self._tokens < 1:
+            self.stats["throttled"] += 1
+            return False
+        self._tokens -= 1
+        return True
+
+    def call(self, method, path, body):
+        """Handle one API call; returns ``(status, payload)``."""
+        time.sleep(self.call_latency)
+        with self._lock:
+            self.stats["calls"] += 1
+            if not self._admit():
+                return 429, None
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return 503, None
+
+            rest = path[len(MEMBERS_PREFIX):] if path.startswith(MEMBERS_PREFIX) else ""
+            group, _, member = rest.partition("/members")
+            group = unquote(group).lower()
+            member = unquote(member.lstrip("/")).lower()
+            members = self.groups.setdefault(group, {})
+
+            if method == "POST" and not member:
+                email = (body or {}).get("email", "").lower()
+                if email in members:
+                    return 409, None
+                members[email] = (body or {}).get("role", "MEMBER")
+                return 200, {"kind": "admin#directory#member", "email": email, "role": members[email], "type": "USER"}
+            if method == "DELETE" and member:
+                if members.pop(member, None) is None:
+                    return 404, None
+                return 204, None
+            return 404, None
+
+    def list_members(self, group, page_token, max_results):
+        with self._lock:
+            self.stats["calls"] += 1
+            if not self._admit():
+                return 429, None
+            emails = sorted(self.groups.get(group.lower(), {}).items())
+        start = int(page_token or 0)
+        page = emails[start:start + max_results]
+        payload = {"members": [{"email": e, "role": r, "type": "USER", "status": "ACTIVE"} for e, r in page]}
+        if start + max_results < len(emails):
+            payload["nextPageToken"] = str(start + max_results)
+        return 200, payload
+
+
+def _error_body(status):
+    reason = REASONS.get(status, "error")
+    return {"error": {"code": status, "message": reason, "errors": [{"reason": reason}]}}
+
+
+def make_handler(directory):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload=None, content_type="application/json", raw=None):
+            body = raw if raw is not None else (json.dumps(payload).encode() if payload is not None else b"")
+            self.send_response(status)
+            if body:
+                self.send_header("Content-Type", content_type)
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            with directory._lock:
+                directory.stats["requests"] += 1
+            if url.path == "/_stats":
+                return self._send(200, dict(directory.stats))
+            if url.path == "/_members":
+                return self._send(200, sorted(directory.groups.get(query.get("group", "").lower(), {})))
+            time.sleep(directory.latency)
+            if url.path.startswith(MEMBERS_PREFIX) and url.path.endswith("/members"):
+                group = unquote(url.path[len(MEMBERS_PREFIX):-len("/members")])
+                status, payload = directory.list_members(group, query.get("pageToken"), int(query.get("maxResults", 200)))
+                return self._send(status, payload if status < 400 else _error_body(status))
+            self._send(404, _error_body(404))
+
+        def _single(self, method):
+            time.sleep(directory.latency)
+            with directory._lock:
+                directory.stats["requests"] += 1
+            raw = self._body()
+            status, payload = directory.call(method, urlsplit(self.path).path, json.loads(raw) if raw else None)
+            self._send(status, payload if status < 400 else _error_body(status))
+
+        def do_DELETE(self):
+            self._single("DELETE")
+
+        def do_POST(self):
+            if urlsplit(self.path).path != BATCH_PATH:
+                return self._single("POST")
+            time.sleep(directory.latency)
+            with directory._lock:
+                directory.stats["requests"] += 1
+                directory.stats["batches"] += 1
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + self._body()
+            )
+            boundary = f"batch_{uuid.uuid4().hex}"
+            out = []
+            for part in message.iter_parts():
+                inner = part.get_payload(decode=True)
+                head, _, body = inner.partition(b"\r\n\r\n")
+                method, path, _ = head.split(b"\r\n", 1)[0].decode().split(" ", 2)
+                status, payload = directory.call(method, path, json.loads(body) if body.strip() else None)
+                if status >= 400:
+                    payload = _error_body(status)
+                text = json.dumps(payload) if payload is not None else ""
+                extra = "Retry-After: 1\r\n" if status == 429 else ""
+                content_id = part.get("Content-ID", "").strip("<>")
+                out.append(
+                    f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                    f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}\r\nContent-Type: application/json\r\n{extra}\r\n"
+                    f"{text}\r\n"
+                )
+            out.append(f"--{boundary}--\r\n")
+            self._send(200, raw="".join(out).encode(), content_type=f"multipart/mixed; boundary={boundary}")
+
+    return Handler
+
+
+def start_server(directory, host="127.0.0.1", port=0):
+    """Serve *directory* on a background thread; returns ``(server, base_url)``."""
+    server = ThreadingHTTPServer((host, port), make_handler(directory))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--qps", type=float, default=40.0, help="calls per second before 429s")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="per HTTP request")
+    parser.add_argument("--call-latency-ms", type=float, default=2.0, help="per call, including batch parts")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls failing with 503")
+    parser.add_argument("--group", default="all-employees@corp.test")
+    parser.add_argument("--seed-members", type=int, default=0)
+    args = parser.parse_args()
+
+    directory = FakeDirectory(args.qps, args.latency_ms, args.call_latency_ms, args.error_rate)
+    directory.seed(args.group, (f"employee{i}@corp.test" for i in range(args.seed_members)))
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(directory))
+    print(f"Fake Directory API on http://{args.host}:{server.server_port} (group {args.group})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
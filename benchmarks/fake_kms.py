@@ -0,0 +1,80 @@
+"""
+In-process stand-in for the Cloud KMS client used by the token generator.
+
+Implements the two calls the token code makes (``crypto_key_path`` and
+``encrypt``, plus ``decrypt`` for checking results) with a fixed per-call
+latency, an optional cap on calls in flight (the service's per-client
+concurrency) and injected failures. The "ciphertext" is a nonce and the
+plaintext XORed with a keystream derived from it: enough to check that a token
+decrypts to the right payload, not encryption.
+
+Usage (in a benchmark):
+    import main as token_generator
+    token_generator._kms_client = FakeKMS(latency_ms=20, max_inflight=64)
+"""
+
+import hashlib
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+
+class FakeKMSError(Exception):
+    """Injected failure, standing in for a google.api_core error"""
+
+
+class FakeKMS:
+    """Thread-safe fake of KeyManagementServiceClient's encrypt/decrypt."""
+
+    def __init__(self, latency_ms=20.0, max_inflight=0, error_rate=0.0, seed=0):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self._slots = threading.BoundedSemaphore(max_inflight) if max_inflight else None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "errors": 0, "max_inflight": 0}
+        self._inflight = 0
+
+    @staticmethod
+    def crypto_key_path(project, location, key_ring, crypto_key):
+        return f"projects/{project}/locations/{location}/keyRings/{key_ring}/cryptoKeys/{crypto_key}"
+
+    @staticmethod
+    def _xor(nonce: bytes, data: bytes) -> bytes:
+        stream = b""
+        counter = 0
+        while len(stream) < len(data):
+            stream += hashlib.sha256(nonce + counter.to_bytes(4, "big")).digest()
+            counter += 1
+        return bytes(a ^ b for a, b in zip(data, stream))
+
+    def _call(self):
+        if self._slots is not None:
+            self._slots.acquire()
+        with self._lock:
+            self._inflight += 1
+            self.stats["calls"] += 1
+            self.stats["max_inflight"] = max(self.stats["max_inflight"], self._inflight)
+            fail = self._random.random() < self.error_rate
+        try:
+            time.sleep(self.latency)
+            if fail:
+                with self._lock:
+                    self.stats["errors"] += 1
+                raise FakeKMSError("503 The service is currently unavailable")
+        finally:
+            with self._lock:
+                self._inflight -= 1
+            if self._slots is not None:
+                self._slots.release()
+
+    def encrypt(self, request):
+        self._call()
+        nonce = os.urandom(12)
+        return SimpleNamespace(name=request["name"], ciphertext=nonce + self._xor(nonce, request["plaintext"]))
+
+    def decrypt(self, request):
+        ciphertext = request["ciphertext"]
+        return SimpleNamespace(plaintext=self._xor(ciphertext[:12], ciphertext[12:]))
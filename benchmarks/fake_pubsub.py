@@ -0,0 +1,145 @@
+"""
+Local stand-in for Pub/Sub topics with push subscriptions.
+
+Accepts publishes on the Pub/Sub REST path (``POST /v1/projects/<p>/topics/<t>:publish``),
+so the employee APIs can point ``PUBSUB_EMULATOR_HOST`` at it. Every message
+is pushed to each ``--push`` URL in a Pub/Sub push envelope, as a push
+subscription would. Non-2xx responses are retried with backoff, so the sync
+functions can run under ``functions-framework`` and be triggered by real
+API mutations. ``GET /_stats`` returns counters and ``GET /_messages`` the
+published messages.
+
+Usage:
+    python benchmarks/fake_pubsub.py [--port 8085] --push http://127.0.0.1:8081 [--push ...]
+    NOTIFY_TOPIC=projects/local/topics/employee-changes PUBSUB_EMULATOR_HOST=127.0.0.1:8085 ...
+"""
+
+import argparse
+import base64
+import json
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+class FakePubSub:
+    """Published messages, push endpoints and counters shared by all request threads."""
+
+    def __init__(self, push_urls=(), max_attempts=5, backoff=0.5):
+        self.push_urls = list(push_urls)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.messages = []
+        self.stats = {"published": 0, "pushed": 0, "push_errors": 0, "dropped": 0}
+        self._lock = threading.Lock()
+
+    def publish(self, topic, messages):
+        """Store *messages* and push them in the background; returns their ids."""
+        ids = []
+        with self._lock:
+            for message in messages:
+                message_id = str(len(self.messages) + 1)
+                stored = {
+                    "data": message.get("data", ""),
+                    "attributes": message.get("attributes", {}),
+                    "messageId": message_id,
+                    "publishTime": datetime.utcnow().isoformat() + "Z",
+                    "topic": topic,
+                }
+                self.messages.append(stored)
+                self.stats["published"] += 1
+                ids.append(message_id)
+                for index, url in enumerate(self.push_urls):
+                    envelope = {
+                        "message": {k: v for k, v in stored.items() if k != "topic"},
+                        "subscription": f"{topic.replace('/topics/', '/subscriptions/')}-push-{index}",
+                    }
+                    threading.Thread(target=self._push, args=(url, envelope), daemon=True).start()
+        return ids
+
+    def _push(self, url, envelope):
+        body = json.dumps(envelope).encode()
+        for attempt in range(1, self.max_attempts + 1):
+            request = urllib.request.Request(url, data=body, method="POST", headers={"Content-Type": "application/json"})
+            try:
+                with urllib.request.urlopen(request, timeout=600) as response:
+                    response.read()
+                with self._lock:
+                    self.stats["pushed"] += 1
+                return
+            except Exception:
+                with self._lock:
+                    self.stats["push_errors"] += 1
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+        with self._lock:
+            self.stats["dropped"] += 1
+
+
+def make_handler(pubsub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path == "/_stats":
+                return self._send(200, dict(pubsub.stats))
+            if path == "/_messages":
+                decoded = [
+                    {**m, "data": json.loads(base64.b64decode(m["data"]) or b"null")} for m in pubsub.messages
+                ]
+                return self._send(200, decoded)
+            self._send(404, {"error": {"code": 404, "message": "not found"}})
+
+        def do_POST(self):
+            path = urlsplit(self.path).path
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not (path.startswith("/v1/projects/") and path.endswith(":publish")):
+                return self._send(404, {"error": {"code": 404, "message": "not found"}})
+            topic = path[len("/v1/"):-len(":publish")]
+            self._send(200, {"messageIds": pubsub.publish(topic, payload.get("messages", []))})
+
+    return Handler
+
+
+def start_server(pubsub, host="127.0.0.1", port=0):
+    """Serve *pubsub* on a background thread; returns ``(server, host:port)``."""
+    server = ThreadingHTTPServer((host, port), make_handler(pubsub))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{host}:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--push", action="append", default=[], help="push endpoint (repeatable)")
+    parser.add_argument("--max-attempts", type=int, default=5)
+    args = parser.parse_args()
+
+    pubsub = FakePubSub(args.push, max_attempts=args.max_attempts)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(pubsub))
+    print(f"Fake Pub/Sub on {args.host}:{server.server_port}, pushing to {', '.join(args.push) or 'nothing'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
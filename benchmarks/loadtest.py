@@ -0,0 +1,474 @@
+"""
+Load test and benchmark suite for the employee APIs.
+
+Starts the services locally, drives a weighted mix of operations at a fixed
+concurrency, and reports p50/p95/p99 latency and throughput per operation as
+JSON.
+
+Targets:
+    app  employee-api-app (FastAPI + SQLite) against a temporary SQLite file
+    api  employee-api (FastAPI + PostgreSQL) against a throwaway local
+         PostgreSQL: --postgres-dsn if given, otherwise a cluster created with
+         initdb/pg_ctl from PATH, otherwise a postgres Docker container
+
+Operations: token (issue a token), list, get, upsert, delete. Operations a
+target does not expose are dropped from its mix (employee-api-app has no
+get-by-id, employee-api has no delete).
+
+Usage:
+    python benchmarks/loadtest.py --target app --concurrency 16 --duration 20
+    python benchmarks/loadtest.py --target both --mix list=70,get=10,upsert=10,delete=5,token=5
+    python benchmarks/loadtest.py --compare main HEAD --target app --output compare.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+
+import httpx
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_MIX = "list=60,get=15,upsert=15,delete=5,token=5"
+CLIENT_ID = "loadtest-client"
+CLIENT_SECRET = "loadtest-secret"
+
+
+# ---------------------------------------------------------------------------
+# Service processes
+# ---------------------------------------------------------------------------
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_http(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Service did not become healthy: {url}")
+
+
+@contextmanager
+def run_service(args, cwd, env, health_url, log_path):
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen(args, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            wait_for_http(health_url)
+            yield
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def signing_keys_dir(workdir):
+    """Write a throwaway ES256 signing key for the services under test, as the
+    jwt-signing-keys Secret provides in a cluster; returns the directory."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    keys_dir = os.path.join(workdir, "keys")
+    os.makedirs(keys_dir, exist_ok=True)
+    path = os.path.join(keys_dir, "loadtest.pem")
+    if not os.path.exists(path):
+        key = ec.generate_private_key(ec.SECP256R1())
+        with open(path, "wb") as f:
+            f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                      serialization.NoEncryption()))
+    return keys_dir
+
+
+def service_env(tree, workdir, **overrides):
+    """Environment shared by both services: signing keys, and the tree's own employee-common."""
+    pythonpath = os.pathsep.join(filter(None, [os.path.join(tree, "employee-common"), os.environ.get("PYTHONPATH")]))
+    return dict(
+        os.environ,
+        PYTHONPATH=pythonpath,
+        JWT_SIGNING_KEYS_DIR=signing_keys_dir(workdir),
+        **overrides,
+    )
+
+
+@contextmanager
+def employee_api_app(tree, workdir):
+    port = free_port()
+    env = service_env(
+        tree, workdir,
+        DATABASE_PATH=os.path.join(workdir, "employees.db"),
+        STATIC_DIR=os.path.join(tree, "employee-api-app", "static"),
+        EMPLOYEE_API_CLIENT_ID=CLIENT_ID,
+        EMPLOYEE_API_CLIENT_SECRET=CLIENT_SECRET,
+        RATE_LIMIT_ENABLED="false",  # measure the endpoints, not the limiter
+        LOG_LEVEL="WARNING",
+    )
+    args = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"]
+    base_url = f"http://127.0.0.1:{port}"
+    with run_service(args, os.path.join(tree, "employee-api-app", "app"), env,
+                     f"{base_url}/health", os.path.join(workdir, "employee-api-app.log")):
+        yield base_url
+
+
+@contextmanager
+def local_postgres(workdir, dsn=None):
+    """Yield connection settings for a disposable PostgreSQL instance."""
+    if dsn:
+        yield dsn
+        return
+
+    port = free_port()
+    if shutil.which("initdb") and shutil.which("pg_ctl"):
+        datadir = os.path.join(workdir, "pgdata")
+        subprocess.run(["initdb", "-D", datadir, "-U", "postgres", "-A", "trust"],
+                       check=True, stdout=subprocess.DEVNULL)
+        subprocess.run(["pg_ctl", "-D", datadir, "-o", f"-p {port} -k {workdir}", "-w",
+                        "-l", os.path.join(workdir, "postgres.log"), "start"],
+                       check=True, stdout=subprocess.DEVNULL)
+        try:
+            yield f"host=127.0.0.1 port={port} dbname=postgres user=postgres password=unused"
+        finally:
+            subprocess.run(["pg_ctl", "-D", datadir, "-m", "fast", "stop"],
+                           stdout=subprocess.DEVNULL)
+        return
+
+    if shutil.which("docker"):
+        name = f"employee-loadtest-{uuid.uuid4().hex[:8]}"
+        subprocess.run(["docker", "run", "-d", "--rm", "--name", name, "-p", f"{port}:5432",
+                        "-e", "POSTGRES_HOST_AUTH_METHOD=trust", "postgres:15-alpine"],
+                       check=True, stdout=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 60
+            while subprocess.run(["docker", "exec", name, "pg_isready", "-U", "postgres"],
+                                 stdout=subprocess.DEVNULL).returncode != 0:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("PostgreSQL container did not become ready")
+                time.sleep(0.5)
+            yield f"host=127.0.0.1 port={port} dbname=postgres user=postgres password=unused"
+        finally:
+            subprocess.run(["docker", "stop", name], stdout=subprocess.DEVNULL)
+        return
+
+    raise RuntimeError("No PostgreSQL available: pass --postgres-dsn, or install initdb/pg_ctl or docker")
+
+
+@contextmanager
+def employee_api(tree, workdir, dsn):
+    settings = dict(part.split("=", 1) for part in dsn.split())
+    port = free_port()
+    env = service_env(
+        tree, workdir,
+        DB_HOST=settings.get("host", "127.0.0.1"),
+        DB_PORT=settings.get("port", "5432"),
+        DB_NAME=settings.get("dbname", "postgres"),
+        DB_USER=settings.get("user", "postgres"),
+        DB_PASSWORD=settings.get("password", "unused"),
+        RATE_LIMIT_ENABLED="false",
+    )
+    args = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    base_url = f"http://127.0.0.1:{port}"
+    with run_service(args, os.path.join(tree, "employee-api"), env,
+                     f"{base_url}/health", os.path.join(workdir, "employee-api.log")):
+        yield base_url
+
+
+# ---------------------------------------------------------------------------
+# Workloads
+# ---------------------------------------------------------------------------
+
+class AppWorkload:
+    """Operations against employee-api-app."""
+
+    operations = ("token", "list", "upsert", "delete")
+
+    def __init__(self, client):
+        self.client = client
+        self.headers = {}
+        self.emails = []
+
+    async def setup(self, seed_rows):
+        await self.token()
+        for i in range(seed_rows):
+            await self.client.post("/api/employees", headers=self.headers,
+                                   json={"name": f"Seed {i}", "email": f"seed{i}@loadtest.dev"})
+
+    async def token(self):
+        resp = await self.client.post("/api/token", json={"client_id": CLIENT_ID, "client_secret": CLIENT_SECRET})
+        if resp.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        return resp
+
+    async def list(self):
+        return await self.client.get("/api/employees", headers=self.headers)
+
+    async def upsert(self):
+        # Half of the upserts update an existing row, half insert a new one
+        if self.emails and random.random() < 0.5:
+            email = random.choice(self.emails)
+        else:
+            email = f"user-{uuid.uuid4().hex[:12]}@loadtest.dev"
+            self.emails.append(email)
+        return await self.client.post("/api/employees", headers=self.headers,
+                                      json={"name": "Load Test", "email": email})
+
+    async def delete(self):
+        if not self.emails:
+            return await self.upsert()
+        email = self.emails.pop(random.randrange(len(self.emails)))
+        return await self.client.delete(f"/api/employees/{email}", headers=self.headers)
+
+
+class ApiWorkload:
+    """Operations against employee-api."""
+
+    operations = ("token", "list", "get", "upsert")
+
+    def __init__(self, client):
+        self.client = client
+        self.headers = {}
+        self.ids = []
+        self.username = f"loadtest-{uuid.uuid4().hex[:8]}"
+
+    async def setup(self, seed_rows):
+        await self.client.post("/auth/signup", json={
+            "username": self.username, "email": f"{self.username}@loadtest.dev",
+            "password": CLIENT_SECRET, "full_name": "Load Test",
+        })
+        await self.token()
+        for _ in range(seed_rows):
+            await self.upsert()
+
+    async def token(self):
+        resp = await self.client.post("/auth/login", json={"username": self.username, "password": CLIENT_SECRET})
+        if resp.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        return resp
+
+    async def list(self):
+        return await self.client.get("/api/employees", headers=self.headers)
+
+    async def get(self):
+        employee_id = random.choice(self.ids) if self.ids else 1
+        return await self.client.get(f"/api/employees/{employee_id}", headers=self.headers)
+
+    async def upsert(self):
+        suffix = uuid.uuid4().hex[:12]
+        resp = await self.client.post("/api/employees", headers=self.headers, json={
+            "first_name": "Load", "last_name": suffix, "email": f"{suffix}@loadtest.dev",
+            "department": "Benchmarks", "position": "Tester",
+        })
+        if resp.status_code == 201:
+            self.ids.append(resp.json()["employee_id"])
+        return resp
+
+
+def parse_mix(mix, supported):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() in supported and float(weight or 1) > 0:
+            weights[name.strip()] = float(weight or 1)
+    if not weights:
+        raise ValueError(f"Mix {mix!r} has no operations supported by this target ({', '.join(supported)})")
+    return weights
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(latency for latency, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate_pct": round(errors / len(samples) * 100, 2) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+    }
+
+
+async def drive(base_url, workload_cls, args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        workload = workload_cls(client)
+        await workload.setup(args.seed_rows)
+        weights = parse_mix(args.mix, workload_cls.operations)
+        names, values = list(weights), list(weights.values())
+        samples = {name: [] for name in names}
+
+        # Workers share one workload so that rows created by one can be read
+        # or deleted by another; only the operation choice is per worker.
+        async def worker(worker_id):
+            rng = random.Random(args.seed + worker_id)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, values)[0]
+                start = time.perf_counter()
+                try:
+                    resp = await getattr(workload, name)()
+                    ok = resp.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                samples[name].append((time.perf_counter() - start, ok))
+
+        # Warm up connections and caches before measuring
+        deadline = time.perf_counter() + args.warmup
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+        samples = {name: [] for name in names}
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    every = [sample for values in samples.values() for sample in values]
+    return {
+        "overall": summarize(every, elapsed),
+        "operations": {name: summarize(values, elapsed) for name, values in samples.items()},
+    }
+
+
+def run_suite(tree, args):
+    """Run every selected target against the source tree at *tree*."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="employee-loadtest-") as workdir:
+        if args.target in ("app", "both"):
+            with employee_api_app(tree, workdir) as base_url:
+                results["employee-api-app"] = asyncio.run(drive(base_url, AppWorkload, args))
+        if args.target in ("api", "both"):
+            with local_postgres(workdir, args.postgres_dsn) as dsn, employee_api(tree, workdir, dsn) as base_url:
+                results["employee-api"] = asyncio.run(drive(base_url, ApiWorkload, args))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Revision comparison
+# ---------------------------------------------------------------------------
+
+def git_revision(tree, rev="HEAD"):
+    return subprocess.run(["git", "rev-parse", "--short", rev], cwd=tree, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+@contextmanager
+def worktree(rev):
+    path = tempfile.mkdtemp(prefix="employee-loadtest-tree-")
+    subprocess.run(["git", "worktree", "add", "--detach", path, rev], cwd=REPO_ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        yield path
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", path], cwd=REPO_ROOT,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def error_failures(results, max_error_rate):
+    """Services whose requests failed more often than *max_error_rate* percent."""
+    return [
+        f"{service} error rate {result['overall']['error_rate_pct']}% ({result['overall']['errors']} errors)"
+        for service, result in results.items()
+        if result["overall"]["error_rate_pct"] > max_error_rate
+    ]
+
+
+def compare(base, head, threshold, max_error_rate):
+    """Diff two suite results; flag p95/p99 growth or throughput loss beyond *threshold* percent,
+    and a head error rate above *max_error_rate* percent."""
+    report, regressions = {}, []
+    for service, head_result in head.items():
+        base_result = base.get(service)
+        if not base_result:
+            continue
+        for op, head_stats in [("overall", head_result["overall"])] + list(head_result["operations"].items()):
+            base_stats = base_result["overall"] if op == "overall" else base_result["operations"].get(op)
+            if not base_stats or not base_stats["requests"] or not head_stats["requests"]:
+                continue
+            delta = {}
+            for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+                before, after = base_stats[key], head_stats[key]
+                delta[key] = round((after - before) / before * 100, 1) if before else None
+            # Percentage points, not a relative change: the base is usually 0
+            delta["error_rate_pct"] = round(head_stats["error_rate_pct"] - base_stats["error_rate_pct"], 2)
+            report.setdefault(service, {})[op] = {"base": base_stats, "head": head_stats, "change_pct": delta}
+            for key in ("p95_ms", "p99_ms"):
+                if delta[key] is not None and delta[key] > threshold:
+                    regressions.append(f"{service} {op} {key} +{delta[key]}%")
+            if delta["throughput_rps"] is not None and delta["throughput_rps"] < -threshold:
+                regressions.append(f"{service} {op} throughput {delta['throughput_rps']}%")
+    return report, regressions + error_failures(head, max_error_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Employee API load test and benchmark suite")
+    parser.add_argument("--target", choices=("app", "api", "both"), default="app")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds per target")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds per target")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="weighted operations, e.g. list=60,upsert=20")
+    parser.add_argument("--seed-rows", type=int, default=500, help="employees created before measuring")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the operation mix")
+    parser.add_argument("--postgres-dsn", help="use an existing PostgreSQL instead of a throwaway one")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), help="benchmark two git revisions")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    parser.add_argument("--max-error-rate", type=float, default=1.0,
+                        help="fail when more than this percent of a service's requests fail")
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "postgres_dsn")}
+    if args.compare:
+        runs = {}
+        for rev in args.compare:
+            with worktree(rev) as tree:
+                runs[rev] = {"revision": git_revision(tree), "results": run_suite(tree, args)}
+        base, head = args.compare
+        report, regressions = compare(runs[base]["results"], runs[head]["results"], args.threshold,
+                                      args.max_error_rate)
+        output = {
+            "config": config,
+            "base": runs[base]["revision"],
+            "head": runs[head]["revision"],
+            "comparison": report,
+            "regressions": regressions,
+        }
+    else:
+        results = run_suite(REPO_ROOT, args)
+        regressions = error_failures(results, args.max_error_rate)
+        output = {"config": config, "revision": git_revision(REPO_ROOT), "results": results,
+                  "failures": regressions}
+
+    text = json.dumps(output, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
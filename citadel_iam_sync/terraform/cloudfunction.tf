@@ -1,8 +1,25 @@
-# Zip the source code
+# Zip the function's own source plus the sync_common package it shares with
+# the other sync function (sync-common/ at the repository root)
+locals {
+  function_dir = "${path.module}/../src"
+  common_dir   = "${path.module}/../../sync-common"
+  source_files = merge(
+    { for f in fileset(local.function_dir, "{*.py,requirements.txt}") : f => "${local.function_dir}/${f}" },
+    { for f in fileset(local.common_dir, "sync_common/*.py") : f => "${local.common_dir}/${f}" },
+  )
+}
+
 data "archive_file" "source" {
   type        = "zip"
-  source_dir  = "${path.module}/../src"
   output_path = "/tmp/function-source.zip"
+
+  dynamic "source" {
+    for_each = local.source_files
+    content {
+      content  = file(source.value)
+      filename = source.key
+    }
+  }
 }
 
 # Bucket to hold the zip
@@ -29,14 +46,39 @@ resource "google_cloudfunctions_function" "sync_function" {
   source_archive_object = google_storage_bucket_object.zip.name
   trigger_http          = true
   entry_point           = "sync_iam"
-  timeout               = 60
+  timeout               = var.function_timeout
   service_account_email = google_service_account.sync_sa.email
 
   environment_variables = {
-    EMPLOYEE_API_URL = var.employee_api_url
-    TARGET_ROLES     = var.target_roles
-    PROJECT_ID       = var.project_id
+    EMPLOYEE_API_URL      = var.employee_api_url
+    TARGET_ROLES          = var.target_roles
+    PROJECT_ID            = var.project_id
+    # Per-role progress of the current cycle and the run lease
+    CHECKPOINT_URI        = "gs://${google_storage_bucket.checkpoints.name}/iam-sync"
+    # Stop between roles with time left to save progress
+    SYNC_DEADLINE_SECONDS = tostring(var.function_timeout - 15)
+    # Outlives any run, so a killed run's lease is taken over by a later one
+    LEASE_TTL_SECONDS     = tostring(var.function_timeout + 60)
+    # Follow-up runs (deadline reached, notifications during a run) start
+    # right away; built from the Gen1 URL format, the resource cannot reference itself
+    CONTINUATION_URL      = "https://${var.region}-${var.project_id}.cloudfunctions.net/citadel-iam-sync"
   }
 
   depends_on = [google_project_service.apis]
 }
+
+# Sync progress and run leases (small JSON objects)
+resource "google_storage_bucket" "checkpoints" {
+  name                        = "${var.project_id}-iam-sync-checkpoints"
+  location                    = var.region
+  uniform_bucket_level_access = true
+
+  lifecycle_rule {
+    condition {
+      age = 7
+    }
+    action {
+      type = "Delete"
+    }
+  }
+}
@@ -23,3 +23,9 @@ resource "google_project_iam_member" "sa_secret_accessor" {
   role    = "roles/secretmanager.secretAccessor"
   member  = "serviceAccount:${google_service_account.sync_sa.email}"
 }
+
+resource "google_storage_bucket_iam_member" "sa_checkpoints" {
+  bucket = google_storage_bucket.checkpoints.name
+  role   = "roles/storage.objectAdmin"
+  member = "serviceAccount:${google_service_account.sync_sa.email}"
+}
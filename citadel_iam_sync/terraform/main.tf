@@ -23,7 +23,8 @@ resource "google_project_service" "apis" {
     "iamcredentials.googleapis.com", # Critical for Keyless DWD
     "admin.googleapis.com",          # For Admin SDK (Legacy)
     "cloudidentity.googleapis.com",  # For Cloud Identity Groups (Modern)
-    "secretmanager.googleapis.com"   # For OAuth2 credentials
+    "secretmanager.googleapis.com",  # For OAuth2 credentials
+    "pubsub.googleapis.com"          # Change notifications from the Employee API
   ])
 
   project = var.project_id
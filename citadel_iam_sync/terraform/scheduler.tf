@@ -1,6 +1,6 @@
 resource "google_cloud_scheduler_job" "sync_job" {
   name             = "citadel-iam-sync-job"
-  description      = "Triggers the Citadel IAM Sync Cloud Function hourly"
+  description      = "Triggers the Citadel IAM Sync Cloud Function daily to reconcile drift"
   schedule         = var.schedule_cron
   time_zone        = "UTC"
   attempt_deadline = "320s"
@@ -21,10 +21,31 @@ variable "target_roles" {
   default     = "roles/viewer"
 }
 
+variable "function_timeout" {
+  description = "Cloud Function timeout in seconds (max 540); syncs of many roles finish over several runs"
+  type        = number
+  default     = 60
+}
+
+# Runs are triggered by change notifications; the schedule only reconciles
+# drift (manual edits, lost notifications)
 variable "schedule_cron" {
-  description = "Cron schedule for the sync job"
+  description = "Cron schedule for the reconcile job"
   type        = string
-  default     = "0 * * * *" # Hourly
+  default     = "0 3 * * *" # Daily
+}
+
+variable "change_topic" {
+  description = "Pub/Sub topic the Employee APIs publish change notifications to"
+  type        = string
+  default     = "employee-changes"
+}
+
+# e.g. ["serviceAccount:employee-api@my-project.iam.gserviceaccount.com"]
+variable "change_publishers" {
+  description = "Members allowed to publish to the change topic (the Employee APIs' service accounts)"
+  type        = list(string)
+  default     = []
 }
 
 variable "oauth_client_id" {
@@ -6,15 +6,124 @@ Encrypts API credentials with KMS and generates a secure token
 import functions_framework
 import json
 import base64
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from google.cloud import kms
 import os
+import logging
+import threading
+
+from logging_config import flush_logs, setup_logging
+from tracing import setup_tracing, span
+
+logger = logging.getLogger(__name__)
 
 PROJECT_ID = os.getenv('GCP_PROJECT', 'suman-110797')
 LOCATION = 'global'
 KEY_RING = 'jupyterhub-keyring'
 KEY_NAME = 'auth-token-key'
 
+# Batch configuration
+TOKEN_BATCH_MAX = int(os.getenv('TOKEN_BATCH_MAX', '500'))
+TOKEN_BATCH_CONCURRENCY = int(os.getenv('TOKEN_BATCH_CONCURRENCY', '16'))
+
+# One KMS client (one gRPC channel) and one worker pool per function instance,
+# shared by every request and every batch thread
+_kms_client = None
+_executor = None
+_init_lock = threading.Lock()
+
+
+def get_kms_client():
+    """The KMS client of this instance, created on first use"""
+    global _kms_client
+    if _kms_client is None:
+        with _init_lock:
+            if _kms_client is None:
+                _kms_client = kms.KeyManagementServiceClient()
+    return _kms_client
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _init_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=TOKEN_BATCH_CONCURRENCY, thread_name_prefix='kms')
+    return _executor
+
+
+def issue_token(entry, trace_headers=None):
+    """
+    Encrypt one {api_id, api_secret, user_id, expiry_hours} entry with KMS.
+    
+    Raises ValueError when the entry is invalid.
+    """
+    if not isinstance(entry, dict):
+        raise ValueError('Entry must be a JSON object')
+    
+    api_id = entry.get('api_id')
+    api_secret = entry.get('api_secret')
+    user_id = entry.get('user_id')
+    expiry_hours = entry.get('expiry_hours', 24)
+    
+    if not all([api_id, api_secret, user_id]):
+        raise ValueError('Missing required fields')
+    if isinstance(expiry_hours, bool) or not isinstance(expiry_hours, (int, float)) or expiry_hours <= 0:
+        raise ValueError('expiry_hours must be a positive number')
+    
+    # Calculate expiry
+    expires_at = datetime.utcnow() + timedelta(hours=expiry_hours)
+    
+    # Create payload
+    payload = {
+        'api_id': api_id,
+        'api_secret': api_secret,
+        'user_id': user_id,
+        'expires_at': expires_at.isoformat()
+    }
+    
+    # Encrypt with KMS
+    client = get_kms_client()
+    key_name = client.crypto_key_path(PROJECT_ID, LOCATION, KEY_RING, KEY_NAME)
+    
+    plaintext = json.dumps(payload).encode('utf-8')
+    with span('kms.encrypt', headers=trace_headers, key=KEY_NAME):
+        encrypt_response = client.encrypt(
+            request={'name': key_name, 'plaintext': plaintext}
+        )
+    
+    # Encode as base64
+    token = base64.b64encode(encrypt_response.ciphertext).decode('utf-8')
+    
+    return {
+        'token': token,
+        'expires_at': expires_at.isoformat(),
+        'user_id': user_id
+    }
+
+
+def issue_tokens(entries, trace_headers=None):
+    """
+    Issue a token per entry, up to TOKEN_BATCH_CONCURRENCY KMS calls at a time.
+    
+    Results are in the order of *entries*. A failed entry gets an 'error'
+    (and 'retryable' when KMS, not the entry, was the problem) instead of a
+    token; the other entries are still issued.
+    """
+    def issue(indexed):
+        index, entry = indexed
+        try:
+            return {'index': index, **issue_token(entry, trace_headers)}
+        except ValueError as e:
+            return {'index': index, 'error': str(e), 'retryable': False}
+        except Exception as e:
+            logger.warning('Token %d of batch failed: %s', index, e)
+            return {'index': index, 'error': str(e), 'retryable': True}
+    
+    # map() yields in submission order, whatever order the calls finish in
+    return list(_get_executor().map(issue, enumerate(entries)))
+
 @functions_framework.http
 def generate_token(request):
     """
@@ -33,6 +142,21 @@ def generate_token(request):
         "token": "base64_encrypted_token",
         "expires_at": "ISO timestamp"
     }
+    
+    Batch request JSON (up to TOKEN_BATCH_MAX entries):
+    {
+        "tokens": [{"api_id": ..., "api_secret": ..., "user_id": ..., "expiry_hours": ...}, ...]
+    }
+    
+    Batch response JSON, one result per entry in request order:
+    {
+        "results": [
+            {"index": 0, "token": "...", "expires_at": "...", "user_id": "..."},
+            {"index": 1, "error": "Missing required fields", "retryable": false}
+        ],
+        "issued": 1,
+        "failed": 1
+    }
     """
     
     # CORS headers
@@ -40,7 +164,7 @@ def generate_token(request):
         headers = {
             'Access-Control-Allow-Origin': '*',
             'Access-Control-Allow-Methods': 'POST',
-            'Access-Control-Allow-Headers': 'Content-Type',
+            'Access-Control-Allow-Headers': 'Content-Type, traceparent, tracestate',
             'Access-Control-Max-Age': '3600'
         }
         return ('', 204, headers)
@@ -48,6 +172,8 @@ def generate_token(request):
     headers = {
         'Access-Control-Allow-Origin': '*'
     }
+    setup_logging('token-generator')
+    setup_tracing('token-generator')
     
     try:
         # Parse request
@@ -55,44 +181,42 @@ def generate_token(request):
         if not request_json:
             return (json.dumps({'error': 'Invalid JSON'}), 400, headers)
         
-        api_id = request_json.get('api_id')
-        api_secret = request_json.get('api_secret')
-        user_id = request_json.get('user_id')
-        expiry_hours = request_json.get('expiry_hours', 24)
+        if 'tokens' in request_json:
+            return _generate_batch(request_json['tokens'], request.headers, headers)
         
-        if not all([api_id, api_secret, user_id]):
-            return (json.dumps({'error': 'Missing required fields'}), 400, headers)
-        
-        # Calculate expiry
-        expires_at = datetime.utcnow() + timedelta(hours=expiry_hours)
-        
-        # Create payload
-        payload = {
-            'api_id': api_id,
-            'api_secret': api_secret,
-            'user_id': user_id,
-            'expires_at': expires_at.isoformat()
-        }
-        
-        # Encrypt with KMS
-        client = kms.KeyManagementServiceClient()
-        key_name = client.crypto_key_path(PROJECT_ID, LOCATION, KEY_RING, KEY_NAME)
-        
-        plaintext = json.dumps(payload).encode('utf-8')
-        encrypt_response = client.encrypt(
-            request={'name': key_name, 'plaintext': plaintext}
-        )
-        
-        # Encode as base64
-        token = base64.b64encode(encrypt_response.ciphertext).decode('utf-8')
-        
-        response = {
-            'token': token,
-            'expires_at': expires_at.isoformat(),
-            'user_id': user_id
-        }
+        try:
+            response = issue_token(request_json, request.headers)
+        except ValueError as e:
+            return (json.dumps({'error': str(e)}), 400, headers)
         
+        # Never log the credentials or the token itself
+        user_id = response['user_id']
+        expiry_hours = request_json.get('expiry_hours', 24)
+        logger.info('Token issued for user %s', user_id, extra={'user_id': user_id, 'expiry_hours': expiry_hours})
         return (json.dumps(response), 200, headers)
         
     except Exception as e:
+        logger.exception('Token generation failed')
         return (json.dumps({'error': str(e)}), 500, headers)
+    finally:
+        flush_logs()
+
+
+def _generate_batch(entries, trace_headers, headers):
+    """Batch mode of generate_token"""
+    if not isinstance(entries, list) or not entries:
+        return (json.dumps({'error': 'tokens must be a non-empty list'}), 400, headers)
+    if len(entries) > TOKEN_BATCH_MAX:
+        return (json.dumps({'error': f'At most {TOKEN_BATCH_MAX} tokens per batch'}), 400, headers)
+    
+    with span('token.batch', headers=trace_headers, size=len(entries)):
+        results = issue_tokens(entries, trace_headers)
+    
+    failed = sum(1 for r in results if 'error' in r)
+    # Never log the credentials or the tokens themselves
+    logger.info(
+        'Batch of %d tokens issued, %d failed', len(results) - failed, failed,
+        extra={'user_ids': [r['user_id'] for r in results if 'user_id' in r], 'failed': failed}
+    )
+    response = {'results': results, 'issued': len(results) - failed, 'failed': failed}
+    return (json.dumps(response), 200, headers)
@@ -0,0 +1,66 @@
+"""
+Optional OpenTelemetry tracing for the token generator
+Continues traces propagated by the caller (W3C traceparent) and records KMS
+calls. A no-op without the OpenTelemetry packages or with TRACING_EXPORTER=none.
+"""
+import os
+import sys
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import propagate, trace
+except ImportError:  # tracing is optional
+    trace = None
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")  # none | console | file | otlp
+TRACING_FILE = os.getenv("TRACING_FILE", "/tmp/traces.jsonl")
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+
+tracer = trace.get_tracer("token-generator") if trace is not None else None
+_provider = None
+
+
+def setup_tracing(service_name: str):
+    """Install the tracer provider once per function instance."""
+    global _provider
+    if trace is None or TRACING_EXPORTER == "none" or _provider is not None:
+        return
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter, SimpleSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    if TRACING_EXPORTER == "file":
+        exporter = ConsoleSpanExporter(
+            out=open(TRACING_FILE, "a", buffering=1),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    elif TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        exporter = OTLPSpanExporter()
+    else:
+        exporter = ConsoleSpanExporter(out=sys.stdout)
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+    )
+    # Functions may be frozen between invocations, so export synchronously
+    _provider.add_span_processor(SimpleSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+
+
+@contextmanager
+def span(name: str, headers=None, **attributes):
+    """Run the wrapped block inside a span.
+
+    When *headers* are given, the span continues the trace they carry.
+    """
+    if tracer is None:
+        yield None
+        return
+    context = propagate.extract(dict(headers)) if headers is not None else None
+    with tracer.start_as_current_span(name, context=context, attributes=attributes) as current:
+        yield current
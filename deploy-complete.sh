@@ -148,6 +148,9 @@ sed -i.tmp "s/\".*:us-central1:jupyterhub-db-instance\"/\"$PROJECT_ID:$REGION:ju
 sed -i.tmp "s/suman-110797/$PROJECT_ID/g" helm/config.yaml
 rm -f helm/config.yaml.tmp
 
+# Build the notebook image (notebook_db preinstalled)
+bash singleuser/build.sh $PROJECT_ID
+
 # Install JupyterHub
 helm upgrade --install jhub jupyterhub/jupyterhub \
     --namespace jhub \
@@ -177,16 +180,14 @@ echo ""
 # ============================================================================
 echo_step "PHASE 7: Building and deploying Employee API..."
 
-cd employee-api
-
-# Build Docker image for AMD64 (GKE compatibility)
+# Build Docker image for AMD64 (GKE compatibility); the repository root is
+# the build context for the shared employee-common package
 echo_info "Building Docker image..."
 docker buildx build --platform linux/amd64 \
+    -f employee-api/Dockerfile \
     -t gcr.io/$PROJECT_ID/employee-api:latest \
     --push .
 
-cd ..
-
 # Update deployment with project ID
 cp employee-api/k8s/deployment.yaml employee-api/k8s/deployment.yaml.backup
 sed -i.tmp "s/suman-110797/$PROJECT_ID/g" employee-api/k8s/deployment.yaml
@@ -194,6 +195,8 @@ sed -i.tmp "s/image: gcr.io\/.*/image: gcr.io\/$PROJECT_ID\/employee-api:latest/
 rm -f employee-api/k8s/deployment.yaml.tmp
 
 # Deploy to Kubernetes
+bash scripts/ensure_jwt_signing_keys.sh jhub
+kubectl apply -f employee-api/k8s/redis.yaml
 kubectl apply -f employee-api/k8s/deployment.yaml
 
 # Wait for deployment
@@ -238,6 +241,7 @@ echo_step "PHASE 9: Deploying API Consumer library..."
 # Create ConfigMap with the library
 kubectl create configmap api-consumer-lib \
     --from-file=api_consumer.py=scripts/api_consumer.py \
+    --from-file=employee_snapshot.py=scripts/employee_snapshot.py \
     --namespace=jhub \
     --dry-run=client -o yaml | kubectl apply -f -
 
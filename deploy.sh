@@ -96,6 +96,10 @@ sed -i.bak "s/bucketName: .*/bucketName: $BUCKET_NAME/" helm/config.yaml
 # Update config.yaml with correct project ID in Cloud SQL Proxy
 sed -i.bak "s/\".*:us-central1:jupyterhub-db-instance\"/\"$PROJECT_ID:us-central1:jupyterhub-db-instance\"/" helm/config.yaml
 
+# Build the notebook image (notebook_db preinstalled) and point config.yaml at it
+bash singleuser/build.sh $PROJECT_ID
+sed -i.bak "s|name: gcr.io/.*/jupyter-singleuser|name: gcr.io/$PROJECT_ID/jupyter-singleuser|" helm/config.yaml
+
 helm upgrade --install jhub jupyterhub/jupyterhub \
     --namespace jhub \
     --version 3.3.8 \
@@ -0,0 +1,270 @@
+"""Fingerprinted, precompressed frontend assets.
+
+Build step (run by the Dockerfile, or by hand after editing ``static/``):
+
+    python assets.py build ../static
+
+writes ``static/dist/``:
+
+* every asset under a content-hashed name (``js/app.js`` -> ``js/app.<hash>.js``);
+* ``.gz`` and, when ``brotli`` is installed, ``.br`` variants where they are smaller;
+* HTML files with their ``/static/...`` references rewritten to the hashed names;
+* ``manifest.json`` describing all of the above.
+
+At runtime :class:`StaticAssets` loads the manifest once. Each request then
+costs a dictionary lookup, ``Accept-Encoding`` negotiation and either
+in-memory bytes or a file send. Hashed assets are ``immutable`` for a year.
+HTML is revalidated with its ETag, so browsers and the ingress/CDN stop
+asking the pods for anything but ``304``s. Without a build (local
+development) the raw files are served the same way, without fingerprints or
+long-lived caching.
+"""
+import os
+import sys
+import json
+import gzip
+import hashlib
+import logging
+import mimetypes
+import re
+import shutil
+from typing import Dict, Optional
+
+import anyio
+from starlette.responses import FileResponse, Response
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Static asset configuration
+STATIC_DIR = os.getenv("STATIC_DIR", "/app/static")
+STATIC_MEMORY_MAX_BYTES = int(os.getenv("STATIC_MEMORY_MAX_BYTES", str(1024 * 1024)))  # larger files are sent from disk
+
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+COMPRESS_MIN_BYTES = 256
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+SERVER_PREFERENCE = ("br", "gzip", "identity")
+
+
+def _media_type(path: str) -> str:
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/javascript":
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    # mtime=0 keeps builds reproducible
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def build(src: str, out: Optional[str] = None) -> dict:
+    """Fingerprint and precompress the assets under *src* into *out* (default ``src/dist``)."""
+    out = out or os.path.join(src, DIST_DIR)
+    shutil.rmtree(out, ignore_errors=True)
+    sources = {}
+    for root, dirs, files in os.walk(src):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != out]
+        for name in files:
+            path = os.path.join(root, name)
+            sources[os.path.relpath(path, src).replace(os.sep, "/")] = path
+
+    # Hashed names first, so HTML can refer to them
+    names = {}
+    for rel, path in sources.items():
+        if rel.endswith(".html"):
+            names[rel] = rel
+            continue
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        stem, ext = os.path.splitext(rel)
+        names[rel] = f"{stem}.{digest}{ext}"
+    reference = re.compile(r"/static/(" + "|".join(re.escape(r) for r in sorted(names, key=len, reverse=True)) + r")\b")
+
+    encodings = ["br", "gzip"] if brotli is not None else ["gzip"]
+    manifest = {"files": {}, "assets": {}}
+    for rel, path in sources.items():
+        with open(path, "rb") as f:
+            data = f.read()
+        if rel.endswith(".html"):
+            data = reference.sub(lambda m: f"/static/{names[m.group(1)]}", data.decode("utf-8")).encode("utf-8")
+        target = os.path.join(out, names[rel])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(data)
+
+        media_type = _media_type(rel)
+        variants = {"identity": len(data)}
+        if media_type.startswith(COMPRESSIBLE_TYPES) and len(data) >= COMPRESS_MIN_BYTES:
+            for encoding in encodings:
+                compressed = _compress(data, encoding)
+                if len(compressed) < len(data):
+                    with open(target + ENCODING_SUFFIXES[encoding], "wb") as f:
+                        f.write(compressed)
+                    variants[encoding] = len(compressed)
+        manifest["files"][rel] = names[rel]
+        manifest["assets"][names[rel]] = {
+            "etag": hashlib.sha256(data).hexdigest()[:16],
+            "type": media_type,
+            "immutable": names[rel] != rel,
+            "variants": variants,
+        }
+    with open(os.path.join(out, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class _Variant:
+    __slots__ = ("path", "stat", "body", "headers")
+
+    def __init__(self, path: str, stat: os.stat_result, body: Optional[bytes], headers: Dict[str, str]):
+        self.path = path
+        self.stat = stat
+        self.body = body
+        self.headers = headers
+
+
+class AssetResponse(FileResponse):
+    """File response that uses the server's zero-copy send when it offers one."""
+
+    async def __call__(self, scope, receive, send):
+        if "http.response.zerocopysend" not in scope.get("extensions", {}) or scope["method"] == "HEAD":
+            return await super().__call__(scope, receive, send)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await send({"type": "http.response.zerocopysend", "file": file.wrapped.fileno(), "more_body": False})
+
+
+class StaticAssets:
+    """In-memory index of the (preferably built) frontend assets."""
+
+    def __init__(self, directory: str = STATIC_DIR):
+        self.directory = directory
+        self.assets: Dict[str, Dict[str, _Variant]] = {}
+        self.files: Dict[str, str] = {}
+        self.built = False
+
+    def load(self):
+        """Index the assets; call once at startup."""
+        dist = os.path.join(self.directory, DIST_DIR)
+        try:
+            with open(os.path.join(dist, MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+            self.built = True
+        except FileNotFoundError:
+            dist, manifest = self.directory, self._scan()
+            logger.info("No asset build in %s; serving %s unhashed and uncompressed", self.directory, dist)
+        self.files = manifest["files"]
+        self.assets = {}
+        for name, meta in manifest["assets"].items():
+            self.assets[name] = {}
+            for encoding, size in meta["variants"].items():
+                path = os.path.join(dist, name) + ENCODING_SUFFIXES.get(encoding, "")
+                etag = f'"{meta["etag"]}"' if encoding == "identity" else f'"{meta["etag"]}-{encoding}"'
+                headers = {
+                    "Content-Type": meta["type"],
+                    "Cache-Control": IMMUTABLE if meta["immutable"] else REVALIDATE,
+                    "ETag": etag,
+                    "Vary": "Accept-Encoding",
+                }
+                if encoding != "identity":
+                    headers["Content-Encoding"] = encoding
+                body = None
+                if size <= STATIC_MEMORY_MAX_BYTES:
+                    with open(path, "rb") as f:
+                        body = f.read()
+                self.assets[name][encoding] = _Variant(path, os.stat(path), body, headers)
+        # Unhashed names still work (pages cached before a deploy), but are
+        # revalidated instead of cached forever
+        for rel, name in self.files.items():
+            if rel != name:
+                self.assets[rel] = {
+                    encoding: _Variant(v.path, v.stat, v.body, {**v.headers, "Cache-Control": REVALIDATE})
+                    for encoding, v in self.assets[name].items()
+                }
+        logger.info("Loaded %d static assets (built: %s)", len(self.files), self.built)
+
+    def _scan(self) -> dict:
+        manifest = {"files": {}, "assets": {}}
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    data = f.read()
+                manifest["files"][rel] = rel
+                manifest["assets"][rel] = {
+                    "etag": hashlib.sha256(data).hexdigest()[:16],
+                    "type": _media_type(rel),
+                    "immutable": False,
+                    "variants": {"identity": len(data)},
+                }
+        return manifest
+
+    def url(self, rel: str) -> str:
+        """Public URL of the asset built from *rel* (e.g. ``js/app.js``)."""
+        return f"/static/{self.files.get(rel, rel)}"
+
+    @staticmethod
+    def _negotiate(accept_encoding: str, available) -> str:
+        if not accept_encoding or len(available) == 1:
+            return "identity"
+        accepted = {}
+        for part in accept_encoding.split(","):
+            token, _, params = part.strip().partition(";")
+            q = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    q = float(params.strip()[2:])
+                except ValueError:
+                    q = 0.0
+            accepted[token.strip().lower()] = q
+        wildcard = accepted.get("*")
+        best, best_q = "identity", 0.0
+        for encoding in SERVER_PREFERENCE:
+            if encoding not in available:
+                continue
+            q = accepted.get(encoding, wildcard if wildcard is not None else (1.0 if encoding == "identity" else 0.0))
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def response(self, name: str, headers) -> Response:
+        """Response for asset *name* given the request *headers*."""
+        variants = self.assets.get(name)
+        if variants is None:
+            return Response("Not Found", status_code=404, media_type="text/plain")
+        variant = variants[self._negotiate(headers.get("accept-encoding", ""), variants)]
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and (
+            if_none_match.strip() == "*"
+            or variant.headers["ETag"] in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+        ):
+            not_modified = {k: v for k, v in variant.headers.items() if k != "Content-Encoding"}
+            return Response(status_code=304, headers=not_modified)
+        if variant.body is not None:
+            return Response(variant.body, headers=variant.headers)
+        return AssetResponse(variant.path, headers=variant.headers, stat_result=variant.stat)
+
+
+static_assets = StaticAssets()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "build":
+        sys.exit("usage: python assets.py build <static dir> [<out dir>]")
+    built = build(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    for rel, name in sorted(built["files"].items()):
+        sizes = ", ".join(f"{e} {s}" for e, s in built["assets"][name]["variants"].items())
+        print(f"{rel} -> {name} ({sizes})")
@@ -0,0 +1,220 @@
+"""Asynchronous audit pipeline for employee mutations.
+
+Mutations record structured events in a bounded in-memory queue. A
+background task writes them in batches to the append-only ``employee_events``
+table (the change feed served at ``/api/changes``), to a JSONL file, or both.
+It then hands each batch to in-process subscribers. None of that I/O happens
+on the request path.
+
+Backpressure: a mutation reserves a queue slot before it touches the
+database. When the writer falls behind and the queue is full, the request
+waits up to ``AUDIT_ENQUEUE_TIMEOUT_SECONDS`` and then fails with ``503``
+before changing anything. Every committed change therefore has room in the
+queue for its audit record.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+
+from database import AsyncSessionLocal, EmployeeEvent
+from metrics import (
+    AUDIT_EVENTS,
+    AUDIT_EVENTS_DROPPED,
+    AUDIT_QUEUE_DEPTH,
+    AUDIT_WRITE_LATENCY,
+    timed,
+)
+
+logger = logging.getLogger(__name__)
+
+# Audit configuration
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "true").lower() == "true"
+AUDIT_SINK = os.getenv("AUDIT_SINK", "table")  # table | jsonl | both
+AUDIT_JSONL_PATH = os.getenv("AUDIT_JSONL_PATH", "/app/data/audit.jsonl")
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "0.2"))
+AUDIT_ENQUEUE_TIMEOUT_SECONDS = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT_SECONDS", "0.5"))
+AUDIT_MAX_RETRIES = int(os.getenv("AUDIT_MAX_RETRIES", "3"))
+
+
+def make_event(action: str, email: str, name: Optional[str] = None, actor: Optional[str] = None) -> dict:
+    """Build an audit event for *action* (e.g. ``employee.created``) on *email*."""
+    return {
+        "event_id": uuid.uuid4().hex,
+        "occurred_at": datetime.utcnow(),
+        "action": action,
+        "email": email,
+        "name": name,
+        "actor": actor,
+    }
+
+
+def _event_json(event: dict) -> str:
+    return json.dumps({**event, "occurred_at": event["occurred_at"].isoformat()}, separators=(",", ":"))
+
+
+class AuditLog:
+    """Bounded event queue drained by a background batch writer."""
+
+    def __init__(self, sink: str = AUDIT_SINK, jsonl_path: str = AUDIT_JSONL_PATH,
+                 queue_size: int = AUDIT_QUEUE_SIZE, batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_interval: float = AUDIT_FLUSH_INTERVAL_SECONDS):
+        self.sink = sink
+        self.jsonl_path = jsonl_path
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.subscribers: List[Callable[[List[dict]], Awaitable[None]]] = []
+        # Slots are reserved before a mutation and released once its event is written
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, callback: Callable[[List[dict]], Awaitable[None]]):
+        """Call ``await callback(events)`` after every written batch."""
+        self.subscribers.append(callback)
+
+    @asynccontextmanager
+    async def reserve(self):
+        """Reserve a queue slot for one mutation and yield a ``record(event)`` callable.
+
+        Raises 503 if no slot frees up within the enqueue timeout. If the
+        block exits without recording (validation error, rollback), the slot is
+        returned.
+        """
+        if not AUDIT_ENABLED or self._queue is None:
+            yield lambda event: None
+            return
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=AUDIT_ENQUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            AUDIT_EVENTS_DROPPED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Audit log is saturated, retry later",
+                headers={"Retry-After": "1"},
+            )
+
+        recorded: List[dict] = []
+
+        def record(event: dict):
+            if recorded:
+                raise RuntimeError("one audit event per reservation")
+            recorded.append(event)
+
+        try:
+            yield record
+        finally:
+            if recorded:
+                self._queue.put_nowait(recorded[0])
+                AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+            else:
+                self._slots.release()
+
+    async def _next_batch(self) -> List[dict]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write_table(self, batch: List[dict]):
+        async with AsyncSessionLocal() as session:
+            await session.execute(insert(EmployeeEvent), batch)
+            await session.commit()
+
+    def _write_jsonl(self, batch: List[dict], path: str):
+        # One write per batch on an O_APPEND descriptor keeps lines from
+        # several worker processes from interleaving
+        payload = "".join(_event_json(event) + "\n" for event in batch).encode("utf-8")
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+        try:
+            os.write(fd, payload)
+        finally:
+            os.close(fd)
+
+    async def _write(self, batch: List[dict]):
+        targets = ["table", "jsonl"] if self.sink == "both" else [self.sink]
+        for target in targets:
+            for attempt in range(AUDIT_MAX_RETRIES + 1):
+                try:
+                    with timed(AUDIT_WRITE_LATENCY, sink=target):
+                        if target == "table":
+                            await self._write_table(batch)
+                        else:
+                            await run_in_threadpool(self._write_jsonl, batch, self.jsonl_path)
+                    AUDIT_EVENTS.labels(target, "written").inc(len(batch))
+                    break
+                except Exception as e:
+                    if attempt < AUDIT_MAX_RETRIES:
+                        await asyncio.sleep(0.1 * 2 ** attempt)
+                        continue
+                    # Never drop audit records: park them next to the JSONL log
+                    logger.error(f"Audit write to {target} failed after {attempt + 1} attempts: {str(e)}")
+                    AUDIT_EVENTS.labels(target, "failed").inc(len(batch))
+                    await run_in_threadpool(self._write_jsonl, batch, f"{self.jsonl_path}.failed")
+
+    async def _publish(self, batch: List[dict]):
+        for callback in self.subscribers:
+            try:
+                await callback(batch)
+            except Exception as e:
+                logger.warning(f"Audit subscriber {getattr(callback, '__name__', callback)} failed: {str(e)}")
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write(batch)
+                await self._publish(batch)
+            except Exception as e:
+                logger.error(f"Audit batch of {len(batch)} events failed: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                    self._slots.release()
+                AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+
+    def start(self):
+        """Create the queue and start the writer on the running event loop."""
+        if not AUDIT_ENABLED or self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0):
+        """Flush queued events (up to *timeout* seconds) and stop the writer."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Audit queue not drained on shutdown; {self._queue.qsize()} events lost")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._queue = None
+
+
+audit_log = AuditLog()
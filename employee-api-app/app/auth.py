@@ -1,5 +1,6 @@
 """OAuth2 authentication for Employee API."""
 import os
+import hmac
 import logging
 from datetime import datetime, timedelta
 from typing import Optional
@@ -8,12 +9,14 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from google.cloud import secretmanager
+from employee_common.keys import JWT_ALGORITHM, claims_cache, key_ring
+
+from metrics import AUTH_LATENCY, timed
+from employee_common.tracing import span
 
 logger = logging.getLogger(__name__)
 
-# OAuth2 configuration
-SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
-ALGORITHM = "HS256"
+# OAuth2 configuration (signing keys live in employee_common.keys)
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 # OAuth2 scheme
@@ -36,7 +39,8 @@ def get_secret(project_id: str, secret_id: str, version: str = "latest") -> str:
     try:
         client = get_secret_manager_client()
         name = f"projects/{project_id}/secrets/{secret_id}/versions/{version}"
-        response = client.access_secret_version(request={"name": name})
+        with span("secretmanager.access_secret_version", secret_id=secret_id):
+            response = client.access_secret_version(request={"name": name})
         return response.payload.data.decode("UTF-8")
     except Exception as e:
         logger.error(f"Error retrieving secret {secret_id}: {str(e)}")
@@ -51,14 +55,27 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    kid, signing_key = key_ring.signing_key()
+    encoded_jwt = jwt.encode(to_encode, signing_key, algorithm=JWT_ALGORITHM, headers={"kid": kid})
     return encoded_jwt
 
 
 def verify_token(token: str) -> dict:
-    """Verify and decode a JWT token."""
+    """Verify and decode a JWT token.
+
+    Claims of recently verified tokens are cached until they expire, so hot
+    tokens skip the signature check.
+    """
+    payload = claims_cache.get(token)
+    if payload is not None:
+        return payload
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        kid = jwt.get_unverified_header(token).get("kid")
+        public_key = key_ring.public_key(kid) if kid else None
+        if public_key is None:
+            raise JWTError(f"Unknown signing key: {kid}")
+        payload = jwt.decode(token, public_key, algorithms=[JWT_ALGORITHM])
+        claims_cache.set(token, payload)
         return payload
     except JWTError as e:
         logger.warning(f"Token verification failed: {str(e)}")
@@ -78,7 +95,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    payload = verify_token(token)
+    with timed(AUTH_LATENCY, method="jwt"):
+        payload = verify_token(token)
     client_id: str = payload.get("sub")
     if client_id is None:
         raise HTTPException(
@@ -91,6 +109,19 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
 
 def verify_client_credentials(client_id: str, client_secret: str) -> bool:
     """Verify client credentials against Secret Manager."""
+    with timed(AUTH_LATENCY, method="client_credentials"):
+        return _verify_client_credentials(client_id, client_secret)
+
+
+def _verify_client_credentials(client_id: str, client_secret: str) -> bool:
+    # Local/benchmark override: credentials from the environment, no Secret Manager
+    env_client_id = os.getenv("EMPLOYEE_API_CLIENT_ID")
+    env_client_secret = os.getenv("EMPLOYEE_API_CLIENT_SECRET")
+    if env_client_id and env_client_secret:
+        return hmac.compare_digest(client_id, env_client_id) and hmac.compare_digest(
+            client_secret, env_client_secret
+        )
+
     try:
         project_id = os.getenv("GCP_PROJECT_ID")
         if not project_id:
@@ -1,7 +1,8 @@
 """Database configuration and models."""
 import os
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, create_engine
+from sqlalchemy import Column, Integer, String, DateTime, create_engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
@@ -41,10 +42,31 @@ class Employee(Base):
         return f"<Employee(name={self.name}, email={self.email})>"
 
 
+class EmployeeEvent(Base):
+    """Append-only audit record of an employee mutation (the change feed)."""
+    __tablename__ = "employee_events"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    event_id = Column(String, unique=True, nullable=False)
+    occurred_at = Column(DateTime, nullable=False)
+    action = Column(String, nullable=False)
+    email = Column(String, nullable=False, index=True)
+    name = Column(String, nullable=True)
+    actor = Column(String, nullable=True)
+
+
 async def init_db():
     """Initialize database tables."""
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        # WAL lets readers in other worker processes proceed during a write
+        await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    except OperationalError:
+        # Another worker created the tables between the existence check and CREATE
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
 
 
 async def get_db():
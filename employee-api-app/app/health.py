@@ -0,0 +1,49 @@
+"""Readiness checks for the Employee API.
+
+The check scheduling and caching live in ``employee_common.health``; this
+module registers the database, pool and Secret Manager checks.
+"""
+import os
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from employee_common.health import HEALTH_CHECK_TIMEOUT_SECONDS, HealthMonitor, register_key_checks
+
+HEALTH_SECRET_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_SECRET_CHECK_INTERVAL_SECONDS", "60"))
+
+
+def register_default_checks(monitor: HealthMonitor, engine):
+    """Register the database, pool, signing key, Secret Manager and (optional) KMS checks."""
+
+    async def check_database():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    monitor.register("database", check_database)
+
+    pool = getattr(engine, "sync_engine", engine).pool
+    if callable(getattr(pool, "size", None)) and callable(getattr(pool, "checkedout", None)):
+        async def check_pool():
+            capacity = pool.size() + max(0, getattr(pool, "_max_overflow", 0))
+            if pool.checkedout() >= capacity:
+                raise RuntimeError(f"connection pool exhausted ({pool.checkedout()}/{capacity})")
+
+        monitor.register("db_pool", check_pool)
+
+    project_id = os.getenv("GCP_PROJECT_ID")
+    env_credentials = os.getenv("EMPLOYEE_API_CLIENT_ID") and os.getenv("EMPLOYEE_API_CLIENT_SECRET")
+    if project_id and not env_credentials:
+        from auth import get_secret_manager_client
+
+        def _get_secret_metadata():
+            # Metadata only: no payload access, no secret material in memory
+            name = f"projects/{project_id}/secrets/employee-api-client-id"
+            get_secret_manager_client().get_secret(request={"name": name}, timeout=HEALTH_CHECK_TIMEOUT_SECONDS)
+
+        async def check_secret_manager():
+            await run_in_threadpool(_get_secret_metadata)
+
+        monitor.register("secret_manager", check_secret_manager, interval=HEALTH_SECRET_CHECK_INTERVAL_SECONDS)
+
+    register_key_checks(monitor, kms_interval=HEALTH_SECRET_CHECK_INTERVAL_SECONDS)
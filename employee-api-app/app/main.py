@@ -1,26 +1,65 @@
 """FastAPI Employee Management Application."""
 import os
+import hashlib
 import logging
 from datetime import datetime
 from contextlib import asynccontextmanager
-from typing import List
+from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException, Depends, status
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
 
-from database import init_db, get_db, Employee
+from database import init_db, get_db, engine, AsyncSessionLocal, Employee, EmployeeEvent
+from assets import static_assets
+from audit import audit_log, make_event
+from employee_common.cache import employee_cache
+from employee_common.compression import CompressionMiddleware
+from employee_common.health import health_monitor
+from employee_common.lifecycle import DrainMiddleware, draining
+from employee_common.logging_config import setup_logging
+from employee_common.singleflight import read_coalescer, request_key
+from employee_common.tracing import TracingMiddleware, setup_tracing, span
+from employee_common.notify import change_notifier
+from serializers import (
+    FAST_JSON_ENABLED,
+    NDJSON_BATCH_SIZE,
+    NDJSON_MEDIA_TYPE,
+    PAGE_SIZE_MAX,
+    decode_cursor,
+    encode_cursor,
+    encode_employee_ndjson,
+    encode_employee_page,
+    encode_employee_rows,
+)
+from metrics import (
+    PrometheusMiddleware,
+    SERIALIZATION_LATENCY,
+    render_metrics,
+    setup_metrics,
+    shutdown_metrics,
+    timed,
+)
+from health import register_default_checks
+from tracing import instrument_engine
 from models import (
     EmployeeCreate,
     EmployeeResponse,
     EmployeeListResponse,
+    EmployeePageResponse,
     MessageResponse,
     EmployeeCreatedResponse,
-    HealthResponse
+    HealthResponse,
+    ReadinessResponse,
+    ChangeEvent,
+    ChangeFeedResponse
 )
+from employee_common.keys import MissingSigningKeys, key_ring
+from employee_common.ratelimit import client_address
+from ratelimit import token_admission
 from auth import (
     create_access_token,
     verify_client_credentials,
@@ -41,11 +80,8 @@ class TokenRequest(BaseModel):
     client_id: str
     client_secret: str
 
-# Configure logging
-logging.basicConfig(
-    level=os.getenv("LOG_LEVEL", "INFO"),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (JSON to stdout through a background writer)
+setup_logging("employee-api-app")
 logger = logging.getLogger(__name__)
 
 
@@ -64,10 +100,27 @@ async def lifespan(app: FastAPI):
     await init_db()
     logger.info("Database initialized")
     
+    # Dependency checks feeding /readyz
+    register_default_checks(health_monitor, engine)
+    health_monitor.start()
+    
+    # Frontend assets are indexed (and small ones read) once
+    static_assets.load()
+    
+    # Background audit writer
+    audit_log.start()
+    
+    # Debounced notifications that trigger the downstream syncs
+    change_notifier.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Employee API application")
+    await health_monitor.stop()
+    await audit_log.stop()
+    await change_notifier.stop()
+    shutdown_metrics()
 
 
 # Create FastAPI app
@@ -87,6 +140,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON/NDJSON responses (precompressed static assets pass through)
+app.add_middleware(CompressionMiddleware)
+
+# Close keep-alive connections while the pod drains
+app.add_middleware(DrainMiddleware)
+
+# Metrics and tracing (outermost, so CORS and error handling are included)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(PrometheusMiddleware)
+setup_metrics(employee_cache, engine)
+setup_tracing("employee-api-app")
+instrument_engine(engine)
+
+
+@app.exception_handler(MissingSigningKeys)
+async def missing_signing_keys_handler(request: Request, exc: MissingSigningKeys):
+    """No signing key mounted: the pod is unready, so another replica should answer."""
+    return JSONResponse(status_code=503, content={"detail": "Token signing unavailable"}, headers={"Retry-After": "5"})
+
 
 # API Routes
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
@@ -98,10 +170,58 @@ async def health_check():
     )
 
 
+@app.get("/livez", response_model=HealthResponse, tags=["Health"])
+async def liveness_check():
+    """Liveness probe: the process and its event loop respond; dependencies are not checked."""
+    return HealthResponse(status="alive", timestamp=datetime.utcnow())
+
+
+@app.get("/readyz", response_model=ReadinessResponse, tags=["Health"])
+async def readiness_check(response: Response):
+    """Readiness probe served from cached dependency check results.
+
+    Fails while the pod drains, and while any critical check is failing,
+    slow or stale.
+    """
+    ready, checks = health_monitor.snapshot()
+    if draining.is_set():
+        state = "draining"
+    else:
+        state = "ready" if ready else "unavailable"
+    if state != "ready":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessResponse(status=state, timestamp=datetime.utcnow(), checks=checks)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
+@app.get("/cache/stats", tags=["Health"])
+async def cache_stats():
+    """Response cache hit/miss statistics."""
+    return employee_cache.stats()
+
+
+@app.get("/.well-known/jwks.json", tags=["Authentication"])
+async def jwks(response: Response):
+    """Public keys for verifying access tokens issued by this service."""
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return key_ring.jwks()
+
+
 @app.post("/api/token", response_model=Token, tags=["Authentication"])
-async def login(token_request: TokenRequest):
+async def login(token_request: TokenRequest, request: Request):
     """OAuth2 token endpoint using client credentials flow."""
-    if not verify_client_credentials(token_request.client_id, token_request.client_secret):
+    async with token_admission.admit(client_address(request)):
+        # Secret Manager calls block; keep them off the event loop
+        valid = await run_in_threadpool(
+            verify_client_credentials, token_request.client_id, token_request.client_secret
+        )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid client credentials",
@@ -114,24 +234,151 @@ async def login(token_request: TokenRequest):
         expires_delta=access_token_expires
     )
     
-    logger.info(f"Token generated for client: {token_request.client_id}")
+    logger.info("Token generated for client: %s", token_request.client_id, extra={"client_id": token_request.client_id})
     return Token(access_token=access_token, token_type="bearer")
 
 
-@app.get("/api/employees", response_model=EmployeeListResponse, tags=["Employees"])
+async def stream_employees_ndjson():
+    """Yield every employee as NDJSON, ordered by email, one batch at a time."""
+    # Own session: the request-scoped one may be closed before the body is sent
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            select(Employee.name, Employee.email, Employee.created_at)
+            .order_by(Employee.email)
+            .execution_options(yield_per=NDJSON_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield encode_employee_ndjson(rows)
+
+
+def json_with_etag(body: bytes, request: Request) -> Response:
+    """JSON response with an ETag of *body*; ``304`` when the client already has it."""
+    # blake2b: the full list can be megabytes, and this runs on every read
+    etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    # Compare weakly: the compression middleware turns the tag into W/"..."
+    if if_none_match and etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Every authenticated client sees the same employees, so they all share one
+# coalescing scope; a per-client view would put the client id here instead
+EMPLOYEE_READ_SCOPE = "employees:read"
+
+
+async def get_employee_page(db: AsyncSession, limit: int, cursor: Optional[str]) -> bytes:
+    """Encode the page of at most *limit* employees after *cursor*, ordered by email."""
+    query = select(Employee.name, Employee.email, Employee.created_at).order_by(Employee.email)
+    if cursor:
+        try:
+            query = query.where(Employee.email > decode_cursor(cursor))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    # One extra row tells whether there is a next page
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    next_cursor = encode_cursor(rows[limit - 1].email) if len(rows) > limit else None
+    rows = rows[:limit]
+    with (
+        timed(SERIALIZATION_LATENCY, route="/api/employees"),
+        span("json.encode", rows=len(rows)),
+    ):
+        return encode_employee_page(rows, next_cursor)
+
+
+async def load_employee_list() -> bytes:
+    """Query and encode the whole employee list, newest first."""
+    async with AsyncSessionLocal() as db:
+        if FAST_JSON_ENABLED:
+            # Fast path: plain row tuples encoded straight to bytes
+            result = await db.execute(
+                select(Employee.name, Employee.email, Employee.created_at)
+                .order_by(Employee.created_at.desc())
+            )
+            rows = result.all()
+            logger.debug("Retrieved %d employees", len(rows))
+            with (
+                timed(SERIALIZATION_LATENCY, route="/api/employees"),
+                span("json.encode", rows=len(rows)),
+            ):
+                return encode_employee_rows(rows)
+        result = await db.execute(select(Employee).order_by(Employee.created_at.desc()))
+        employees = result.scalars().all()
+        logger.debug("Retrieved %d employees", len(employees))
+        with (
+            timed(SERIALIZATION_LATENCY, route="/api/employees"),
+            span("json.encode", rows=len(employees)),
+        ):
+            return EmployeeListResponse(
+                employees=[EmployeeResponse.model_validate(emp) for emp in employees]
+            ).model_dump_json().encode("utf-8")
+
+
+async def load_cached(cache_key: str, load) -> bytes:
+    """Run *load* and store its body under *cache_key*."""
+    body = await load()
+    employee_cache.set(cache_key, body)
+    return body
+
+
+async def load_employee_page(limit: int, cursor: Optional[str]) -> bytes:
+    """get_employee_page on a session of its own, outliving any one request."""
+    async with AsyncSessionLocal() as db:
+        return await get_employee_page(db, limit, cursor)
+
+
+@app.get(
+    "/api/employees",
+    response_model=EmployeePageResponse,
+    response_model_exclude_none=True,
+    tags=["Employees"]
+)
 async def get_employees(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=PAGE_SIZE_MAX, description="Page size; omit for the whole list"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get list of all employees (requires authentication)."""
+    """Get the employees, whole or one page at a time (requires authentication)."""
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        # Bulk consumers (the sync functions) stream instead of buffering the list
+        return StreamingResponse(stream_employees_ndjson(), media_type=NDJSON_MEDIA_TYPE)
+
+    # Identical requests arriving while a miss is being computed share its result
+    if limit is not None or cursor is not None:
+        limit = limit or PAGE_SIZE_MAX
+        cache_key = employee_cache.key(f"page:{limit}:{cursor or ''}")
+        cached = employee_cache.get(cache_key)
+        if cached is not None:
+            return json_with_etag(cached, request)
+
+        try:
+            key = request_key(request, EMPLOYEE_READ_SCOPE, cache_key)
+            body = await read_coalescer.do(
+                "/api/employees", key, lambda: load_cached(cache_key, lambda: load_employee_page(limit, cursor))
+            )
+            return json_with_etag(body, request)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error retrieving employees: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to retrieve employees"
+            )
+
+    cache_key = employee_cache.key("list")
+    cached = employee_cache.get(cache_key)
+    if cached is not None:
+        return json_with_etag(cached, request)
+
     try:
-        result = await db.execute(select(Employee).order_by(Employee.created_at.desc()))
-        employees = result.scalars().all()
-        
-        logger.info(f"Retrieved {len(employees)} employees")
-        return EmployeeListResponse(
-            employees=[EmployeeResponse.model_validate(emp) for emp in employees]
+        key = request_key(request, EMPLOYEE_READ_SCOPE, cache_key)
+        body = await read_coalescer.do(
+            "/api/employees", key, lambda: load_cached(cache_key, load_employee_list)
         )
+        return json_with_etag(body, request)
     except Exception as e:
         logger.error(f"Error retrieving employees: {str(e)}")
         raise HTTPException(
@@ -152,47 +399,53 @@ async def create_employee(
     current_user: dict = Depends(get_current_user)
 ):
     """Add or update an employee (requires authentication)."""
-    try:
-        # Check if employee exists
-        result = await db.execute(
-            select(Employee).where(Employee.email == employee.email)
-        )
-        existing_employee = result.scalar_one_or_none()
-        
-        if existing_employee:
-            # Update existing employee
-            existing_employee.name = employee.name
-            await db.commit()
-            await db.refresh(existing_employee)
-            
-            logger.info(f"Updated employee: {employee.email}")
-            return EmployeeCreatedResponse(
-                message="Employee updated successfully",
-                employee=EmployeeResponse.model_validate(existing_employee)
-            )
-        else:
-            # Create new employee
-            new_employee = Employee(
-                name=employee.name,
-                email=employee.email,
-                created_at=datetime.utcnow()
+    async with audit_log.reserve() as record:
+        try:
+            # Check if employee exists
+            result = await db.execute(
+                select(Employee).where(Employee.email == employee.email)
             )
-            db.add(new_employee)
-            await db.commit()
-            await db.refresh(new_employee)
+            existing_employee = result.scalar_one_or_none()
             
-            logger.info(f"Created employee: {employee.email}")
-            return EmployeeCreatedResponse(
-                message="Employee added successfully",
-                employee=EmployeeResponse.model_validate(new_employee)
+            if existing_employee:
+                # Update existing employee
+                existing_employee.name = employee.name
+                await db.commit()
+                # Committed: publish before the refresh, which can still fail
+                employee_cache.invalidate()
+                change_notifier.notify()
+                record(make_event("employee.updated", employee.email, employee.name, current_user["client_id"]))
+                await db.refresh(existing_employee)
+                
+                return EmployeeCreatedResponse(
+                    message="Employee updated successfully",
+                    employee=EmployeeResponse.model_validate(existing_employee)
+                )
+            else:
+                # Create new employee
+                new_employee = Employee(
+                    name=employee.name,
+                    email=employee.email,
+                    created_at=datetime.utcnow()
+                )
+                db.add(new_employee)
+                await db.commit()
+                employee_cache.invalidate()
+                change_notifier.notify()
+                record(make_event("employee.created", employee.email, employee.name, current_user["client_id"]))
+                await db.refresh(new_employee)
+                
+                return EmployeeCreatedResponse(
+                    message="Employee added successfully",
+                    employee=EmployeeResponse.model_validate(new_employee)
+                )
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error creating/updating employee: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create/update employee"
             )
-    except Exception as e:
-        await db.rollback()
-        logger.error(f"Error creating/updating employee: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to create/update employee"
-        )
 
 
 @app.delete("/api/employees/{email}", response_model=MessageResponse, tags=["Employees"])
@@ -202,47 +455,70 @@ async def delete_employee(
     current_user: dict = Depends(get_current_user)
 ):
     """Remove an employee by email (requires authentication)."""
-    try:
-        # Check if employee exists
-        result = await db.execute(
-            select(Employee).where(Employee.email == email)
-        )
-        employee = result.scalar_one_or_none()
-        
-        if not employee:
-            logger.warning(f"Employee not found: {email}")
+    async with audit_log.reserve() as record:
+        try:
+            # Check if employee exists
+            result = await db.execute(
+                select(Employee).where(Employee.email == email)
+            )
+            employee = result.scalar_one_or_none()
+            
+            if not employee:
+                logger.warning(f"Employee not found: {email}")
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Employee not found"
+                )
+            
+            # Delete employee
+            await db.execute(
+                delete(Employee).where(Employee.email == email)
+            )
+            await db.commit()
+            employee_cache.invalidate()
+            change_notifier.notify()
+            record(make_event("employee.deleted", email, employee.name, current_user["client_id"]))
+            return MessageResponse(message="Employee deleted successfully")
+        except HTTPException:
+            raise
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error deleting employee: {str(e)}")
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Employee not found"
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to delete employee"
             )
-        
-        # Delete employee
-        await db.execute(
-            delete(Employee).where(Employee.email == email)
-        )
-        await db.commit()
-        
-        logger.info(f"Deleted employee: {email}")
-        return MessageResponse(message="Employee deleted successfully")
-    except HTTPException:
-        raise
-    except Exception as e:
-        await db.rollback()
-        logger.error(f"Error deleting employee: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to delete employee"
-        )
 
 
-# Mount static files and serve frontend
-app.mount("/static", StaticFiles(directory="/app/static"), name="static")
+@app.get("/api/changes", response_model=ChangeFeedResponse, tags=["Employees"])
+async def get_changes(
+    after: int = Query(0, ge=0, description="Return events with a sequence number greater than this"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Employee change feed from the audit log, oldest first (requires authentication)."""
+    result = await db.execute(
+        select(EmployeeEvent)
+        .where(EmployeeEvent.seq > after)
+        .order_by(EmployeeEvent.seq)
+        .limit(limit)
+    )
+    events = [ChangeEvent.model_validate(event) for event in result.scalars().all()]
+    return ChangeFeedResponse(events=events, next=events[-1].seq if events else after)
+
+
+# Frontend: fingerprinted, precompressed assets (see assets.py)
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_static(path: str, request: Request):
+    """Serve a frontend asset, precompressed for the client's Accept-Encoding."""
+    return static_assets.response(path, request.headers)
 
 
 @app.get("/", tags=["Frontend"])
-async def serve_frontend():
+async def serve_frontend(request: Request):
     """Serve the frontend HTML."""
-    return FileResponse("/app/static/index.html")
+    return static_assets.response("index.html", request.headers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+"""Prometheus metrics for the Employee API.
+
+Request latency is recorded by a plain ASGI middleware (no BaseHTTPMiddleware
+task overhead). DB query time comes from SQLAlchemy cursor events. Cache and
+pool figures are read lazily at scrape time by a custom collector.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set (``employee_common.serve`` sets it
+when running several workers), counters and histograms are aggregated across the workers
+of the pod. The custom collector reports the worker that served the scrape.
+"""
+import os
+import time
+import logging
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route and status",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "Database statement execution time by statement type",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_CONNECTIONS_IN_USE = Gauge(
+    "db_connections_in_use",
+    "Database connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+SERIALIZATION_LATENCY = Histogram(
+    "response_serialization_duration_seconds",
+    "Time spent encoding response bodies",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+AUTH_LATENCY = Histogram(
+    "auth_duration_seconds",
+    "Authentication latency (token verification, credential checks)",
+    ["method"],
+    buckets=LATENCY_BUCKETS,
+)
+AUDIT_QUEUE_DEPTH = Gauge(
+    "audit_queue_depth",
+    "Audit events waiting for the background writer",
+    multiprocess_mode="livesum",
+)
+AUDIT_EVENTS = Counter(
+    "audit_events",
+    "Audit events handled by the background writer",
+    ["sink", "outcome"],
+)
+AUDIT_EVENTS_DROPPED = Counter(
+    "audit_events_dropped",
+    "Mutations rejected with 503 because the audit queue stayed full",
+)
+AUDIT_WRITE_LATENCY = Histogram(
+    "audit_write_duration_seconds",
+    "Audit batch write latency by sink",
+    ["sink"],
+    buckets=LATENCY_BUCKETS,
+)
+# Notification, compression, coalescing, rate-limit and health check metrics live in employee_common.metrics
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels):
+    """Observe the duration of the wrapped block on *histogram*."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - start)
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording per-route latency histograms and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route on the scope; use its template
+            # so that path parameters do not explode label cardinality.
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or (
+                "/static" if scope["path"].startswith("/static") else "unmatched"
+            )
+            REQUEST_LATENCY.labels(scope["method"], route_path, str(status_code)).observe(
+                time.perf_counter() - start
+            )
+
+
+def instrument_engine(engine):
+    """Record statement execution time and connection checkouts for *engine*."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine.pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_CONNECTIONS_IN_USE.inc()
+
+    @event.listens_for(sync_engine.pool, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        DB_CONNECTIONS_IN_USE.dec()
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is None:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else "UNKNOWN"
+        DB_QUERY_LATENCY.labels(operation).observe(time.perf_counter() - start)
+
+
+class StatsCollector:
+    """Expose response cache and connection pool statistics at scrape time."""
+
+    def __init__(self, cache, engine):
+        self.cache = cache
+        self.pool = getattr(engine, "sync_engine", engine).pool
+
+    def collect(self):
+        stats = self.cache.stats()
+        for name in ("hits", "misses", "invalidations"):
+            counter = CounterMetricFamily(
+                f"response_cache_{name}", f"Response cache {name}", labels=["cache"]
+            )
+            counter.add_metric([stats["namespace"]], stats[name])
+            yield counter
+        ratio = GaugeMetricFamily(
+            "response_cache_hit_ratio", "Response cache hit ratio", labels=["cache"]
+        )
+        ratio.add_metric([stats["namespace"]], stats["hit_ratio"])
+        yield ratio
+
+        # NullPool/StaticPool do not track sizes; only report what the pool knows
+        for name in ("size", "checkedout", "overflow"):
+            method = getattr(self.pool, name, None)
+            if callable(method):
+                gauge = GaugeMetricFamily(f"db_pool_{name}", f"Database connection pool {name}")
+                gauge.add_metric([], method())
+                yield gauge
+
+
+_collectors = []
+
+
+def setup_metrics(cache, engine):
+    """Register the custom collector and DB instrumentation."""
+    instrument_engine(engine)
+    collector = StatsCollector(cache, engine)
+    REGISTRY.register(collector)
+    _collectors.append(collector)
+
+
+def render_metrics():
+    """Return the exposition payload and its content type."""
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in _collectors:
+        registry.register(collector)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def shutdown_metrics():
+    """Drop this worker's live gauges from the multiprocess aggregate."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,7 +1,7 @@
 """Pydantic models for request/response validation."""
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class EmployeeBase(BaseModel):
@@ -28,6 +28,11 @@ class EmployeeListResponse(BaseModel):
     employees: List[EmployeeResponse]
 
 
+class EmployeePageResponse(EmployeeListResponse):
+    """One page of employees ordered by email; pass ``next_cursor`` back for the next page."""
+    next_cursor: Optional[str] = None
+
+
 class MessageResponse(BaseModel):
     """Generic message response."""
     message: str
@@ -42,3 +47,38 @@ class HealthResponse(BaseModel):
     """Health check response."""
     status: str = "healthy"
     timestamp: datetime
+
+
+class DependencyCheck(BaseModel):
+    """Cached result of one dependency check."""
+    status: str
+    critical: bool
+    latency_ms: Optional[float] = None
+    latency_budget_ms: float
+    age_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ReadinessResponse(HealthResponse):
+    """Readiness probe response with per-dependency results."""
+    checks: Dict[str, DependencyCheck] = {}
+
+
+class ChangeEvent(BaseModel):
+    """One entry of the employee change feed."""
+    seq: int
+    event_id: str
+    occurred_at: datetime
+    action: str
+    email: str
+    name: Optional[str] = None
+    actor: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ChangeFeedResponse(BaseModel):
+    """Page of change events; pass ``next`` as ``after`` to continue."""
+    events: List[ChangeEvent]
+    next: int
@@ -0,0 +1,24 @@
+"""Admission control for ``/api/token``.
+
+Token issuance costs Secret Manager round trips, so the endpoint is guarded
+by a per-client bucket (keyed by caller IP), a global bucket
+and a per-process concurrency cap; see ``employee_common.ratelimit``.
+"""
+import os
+
+from employee_common.ratelimit import AdmissionController
+
+TOKEN_RATE_PER_CLIENT = float(os.getenv("TOKEN_RATE_PER_CLIENT", "0.5"))
+TOKEN_BURST_PER_CLIENT = float(os.getenv("TOKEN_BURST_PER_CLIENT", "10"))
+TOKEN_RATE_GLOBAL = float(os.getenv("TOKEN_RATE_GLOBAL", "20"))
+TOKEN_BURST_GLOBAL = float(os.getenv("TOKEN_BURST_GLOBAL", "40"))
+TOKEN_MAX_CONCURRENT = int(os.getenv("TOKEN_MAX_CONCURRENT", "4"))
+
+token_admission = AdmissionController(
+    "token",
+    per_client_rate=TOKEN_RATE_PER_CLIENT,
+    per_client_burst=TOKEN_BURST_PER_CLIENT,
+    global_rate=TOKEN_RATE_GLOBAL,
+    global_burst=TOKEN_BURST_GLOBAL,
+    max_concurrent=TOKEN_MAX_CONCURRENT,
+)
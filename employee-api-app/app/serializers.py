@@ -0,0 +1,84 @@
+"""Fast JSON encoding for employee list responses.
+
+Encodes ``(name, email, created_at)`` row tuples straight to bytes, skipping
+per-row Pydantic model construction. The output matches what
+``EmployeeListResponse.model_dump_json()`` produces for the same rows.
+"""
+import os
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Serve employee lists through the pre-serialized fast path
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_RESPONSES", "true").lower() == "true"
+# Rows fetched and encoded per chunk of a streamed NDJSON employee list
+NDJSON_BATCH_SIZE = int(os.getenv("NDJSON_BATCH_SIZE", "1000"))
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Largest page a client may request from the cursor-paged employee list
+PAGE_SIZE_MAX = int(os.getenv("EMPLOYEE_PAGE_SIZE_MAX", "1000"))
+
+EmployeeRow = Tuple[str, str, datetime]
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_employee_rows(rows: Iterable[EmployeeRow]) -> bytes:
+    """Encode employee row tuples as an ``EmployeeListResponse`` JSON body."""
+    return _encode_document(rows, {})
+
+
+def encode_employee_page(rows: Iterable[EmployeeRow], next_cursor: Optional[str]) -> bytes:
+    """Encode one page of employee row tuples as an ``EmployeePageResponse`` JSON body."""
+    return _encode_document(rows, {"next_cursor": next_cursor})
+
+
+def _encode_document(rows: Iterable[EmployeeRow], extra: dict) -> bytes:
+    employees = [
+        {"name": name, "email": email, "created_at": created_at}
+        for name, email, created_at in rows
+    ]
+    if orjson is not None:
+        return orjson.dumps({"employees": employees, **extra})
+    return json.dumps(
+        {"employees": employees, **extra}, default=_default, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def encode_cursor(email: str) -> str:
+    """Opaque page cursor for "after *email*"."""
+    return base64.urlsafe_b64encode(email.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """Inverse of :func:`encode_cursor`; raises ``ValueError`` for malformed cursors."""
+    try:
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def encode_employee_ndjson(rows: Iterable[EmployeeRow]) -> bytes:
+    """Encode employee row tuples as newline-delimited JSON objects."""
+    if orjson is not None:
+        return b"".join(
+            orjson.dumps({"name": name, "email": email, "created_at": created_at}) + b"\n"
+            for name, email, created_at in rows
+        )
+    return "".join(
+        json.dumps(
+            {"name": name, "email": email, "created_at": created_at},
+            default=_default, separators=(",", ":"),
+        ) + "\n"
+        for name, email, created_at in rows
+    ).encode("utf-8")
@@ -0,0 +1,23 @@
+"""Production server for the Employee API.
+
+uvicorn with one worker per CPU of the container and a graceful SIGTERM
+drain; see ``employee_common.serve``.
+
+Run:
+    python serve.py
+"""
+import os
+
+from employee_common.logging_config import setup_logging
+from employee_common.serve import run
+
+PORT = int(os.getenv("PORT", "8080"))
+
+
+def main():
+    setup_logging("employee-api-app")
+    run("main:app", PORT)
+
+
+if __name__ == "__main__":
+    main()
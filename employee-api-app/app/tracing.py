@@ -0,0 +1,43 @@
+"""Database tracing for the Employee API.
+
+The tracer provider, request middleware and ``span()`` helper live in
+``employee_common.tracing``; this module adds a client span per SQLAlchemy
+statement.
+"""
+from sqlalchemy import event
+
+from employee_common.tracing import tracer
+
+try:
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # pragma: no cover - tracing is optional
+    pass
+
+
+def instrument_engine(engine):
+    """Emit a client span for every statement run through *engine*."""
+    if tracer is None:
+        return
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._trace_span = tracer.start_span(
+            "db.query",
+            kind=SpanKind.CLIENT,
+            attributes={"db.system": sync_engine.dialect.name, "db.statement": statement},
+        )
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        current = getattr(context, "_trace_span", None)
+        if current is not None:
+            current.end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        current = getattr(exception_context.execution_context, "_trace_span", None)
+        if current is not None:
+            current.record_exception(exception_context.original_exception)
+            current.set_status(Status(StatusCode.ERROR))
+            current.end()
@@ -100,8 +100,13 @@ print_success "Terraform applied successfully"
 
 cd ..
 
+print_step "Creating JWT signing keys (first deployment only)..."
+bash ../scripts/ensure_jwt_signing_keys.sh employee-api
+print_success "Signing keys in place"
+
 print_step "Building and pushing Docker image..."
-gcloud builds submit \
+# The repository root is the build context (shared employee-common package)
+gcloud builds submit .. \
     --config=cloudbuild.yaml \
     --substitutions=_IMAGE_TAG=$IMAGE_TAG \
     --project=$PROJECT_ID
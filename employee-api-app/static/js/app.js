@@ -1,9 +1,30 @@
 /**
  * Employee Management Application
  * Frontend JavaScript for API interaction
+ *
+ * The directory is read page by page (cursor paging, ordered by email) and
+ * kept in IndexedDB. Cached pages are shown immediately and then revalidated
+ * with their ETags, so unchanged pages cost a 304. Only the rows in view are
+ * in the DOM (list virtualization), and adds and deletes update the local
+ * list right away and are rolled back if the API rejects them.
  */
 
 const API_BASE = '/api';
+const PAGE_SIZE = 1000;
+const REVALIDATE_CONCURRENCY = 4;
+const OVERSCAN_ROWS = 8;
+const REFRESH_INTERVAL_MS = 30000;
+
+// Employees sorted by email, as the API pages them
+const state = {
+    employees: [],
+    loaded: false,
+    // Confirmed adds and deletes; a revalidation that overlaps one is discarded
+    mutations: 0,
+};
+
+// Optimistic changes not yet confirmed by the API: email -> employee, or null for a delete
+const pendingChanges = new Map();
 
 // Utility functions
 const showNotification = (message, type = 'success') => {
@@ -11,7 +32,7 @@ const showNotification = (message, type = 'success') => {
     notification.className = `notification ${type}`;
     notification.textContent = message;
     document.body.appendChild(notification);
-    
+
     setTimeout(() => {
         notification.style.animation = 'slideInRight 0.4s ease reverse';
         setTimeout(() => notification.remove(), 400);
@@ -25,31 +46,117 @@ const formatDate = (dateString) => {
     const diffMins = Math.floor(diffMs / 60000);
     const diffHours = Math.floor(diffMs / 3600000);
     const diffDays = Math.floor(diffMs / 86400000);
-    
+
     if (diffMins < 1) return 'Just now';
     if (diffMins < 60) return `${diffMins} minute${diffMins > 1 ? 's' : ''} ago`;
     if (diffHours < 24) return `${diffHours} hour${diffHours > 1 ? 's' : ''} ago`;
     if (diffDays < 7) return `${diffDays} day${diffDays > 1 ? 's' : ''} ago`;
-    
-    return date.toLocaleDateString('en-US', { 
-        year: 'numeric', 
-        month: 'short', 
-        day: 'numeric' 
+
+    return date.toLocaleDateString('en-US', {
+        year: 'numeric',
+        month: 'short',
+        day: 'numeric'
     });
 };
 
+const HTML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
+
+const escapeHtml = (text) => String(text).replace(/[&<>"']/g, (char) => HTML_ESCAPES[char]);
+
+// Run fn over items with at most `limit` calls in flight; results keep the input order
+const mapLimit = async (items, limit, fn) => {
+    const results = new Array(items.length);
+    let next = 0;
+    const worker = async () => {
+        while (next < items.length) {
+            const index = next++;
+            results[index] = await fn(items[index]);
+        }
+    };
+    await Promise.all(Array.from({ length: Math.min(limit, items.length) }, worker));
+    return results;
+};
+
+// IndexedDB page cache: { cursor, etag, next, employees } keyed by the page's cursor ('' for the first)
+const pageCache = (() => {
+    const DB_NAME = 'employee-directory';
+    const DB_VERSION = 1;
+    const STORE = 'pages';
+    let opening = null;
+
+    const open = () => {
+        if (!opening) {
+            opening = new Promise((resolve) => {
+                if (!('indexedDB' in window)) {
+                    resolve(null);
+                    return;
+                }
+                const request = indexedDB.open(DB_NAME, DB_VERSION);
+                request.onupgradeneeded = () => request.result.createObjectStore(STORE, { keyPath: 'cursor' });
+                request.onsuccess = () => resolve(request.result);
+                // Private browsing or quota problems: run without a cache
+                request.onerror = () => resolve(null);
+            });
+        }
+        return opening;
+    };
+
+    const run = async (mode, fn) => {
+        const db = await open();
+        if (!db) return undefined;
+        return new Promise((resolve) => {
+            const tx = db.transaction(STORE, mode);
+            const request = fn(tx.objectStore(STORE));
+            tx.oncomplete = () => resolve(request ? request.result : undefined);
+            tx.onerror = tx.onabort = () => resolve(undefined);
+        });
+    };
+
+    return {
+        // Cached pages in list order, following next cursors from the first page
+        async chain() {
+            const byCursor = new Map(((await run('readonly', (store) => store.getAll())) || []).map((p) => [p.cursor, p]));
+            const pages = [];
+            let cursor = '';
+            while (cursor !== null && byCursor.has(cursor)) {
+                const page = byCursor.get(cursor);
+                byCursor.delete(cursor);
+                pages.push(page);
+                cursor = page.next;
+            }
+            return pages;
+        },
+        // Store changed pages and drop every page that is no longer part of the list
+        async update(changed, keep) {
+            const keepCursors = new Set(keep.map((page) => page.cursor));
+            await run('readwrite', (store) => {
+                const keys = store.getAllKeys();
+                keys.onsuccess = () => keys.result.filter((c) => !keepCursors.has(c)).forEach((c) => store.delete(c));
+                changed.forEach((page) => store.put(page));
+                return null;
+            });
+        },
+    };
+})();
+
 // API functions
-const fetchEmployees = async () => {
-    try {
-        const response = await fetch(`${API_BASE}/employees`);
-        if (!response.ok) throw new Error('Failed to fetch employees');
-        const data = await response.json();
-        return data.employees;
-    } catch (error) {
-        console.error('Error fetching employees:', error);
-        showNotification('Failed to load employees', 'error');
-        return [];
-    }
+const fetchPage = async (cursor, etag = null) => {
+    const params = new URLSearchParams({ limit: PAGE_SIZE });
+    if (cursor) params.set('cursor', cursor);
+    // The browser's HTTP cache would duplicate IndexedDB; revalidate explicitly instead
+    const response = await fetch(`${API_BASE}/employees?${params}`, {
+        cache: 'no-store',
+        headers: etag ? { 'If-None-Match': etag } : {},
+    });
+    if (response.status === 304) return null;
+    if (!response.ok) throw new Error('Failed to fetch employees');
+    const data = await response.json();
+    return {
+        cursor,
+        etag: response.headers.get('ETag'),
+        next: data.next_cursor || null,
+        employees: data.employees,
+    };
 };
 
 const addEmployee = async (name, email) => {
@@ -61,12 +168,12 @@ const addEmployee = async (name, email) => {
             },
             body: JSON.stringify({ name, email }),
         });
-        
+
         if (!response.ok) {
             const error = await response.json();
             throw new Error(error.detail || 'Failed to add employee');
         }
-        
+
         const data = await response.json();
         return data;
     } catch (error) {
@@ -80,12 +187,12 @@ const deleteEmployee = async (email) => {
         const response = await fetch(`${API_BASE}/employees/${encodeURIComponent(email)}`, {
             method: 'DELETE',
         });
-        
+
         if (!response.ok) {
             const error = await response.json();
             throw new Error(error.detail || 'Failed to delete employee');
         }
-        
+
         return await response.json();
     } catch (error) {
         console.error('Error deleting employee:', error);
@@ -93,74 +200,174 @@ const deleteEmployee = async (email) => {
     }
 };
 
-// UI rendering functions
-const renderEmployeeList = (employees) => {
-    const listContainer = document.getElementById('employeeList');
-    
-    if (employees.length === 0) {
-        listContainer.innerHTML = `
-            <div class="empty-state">
-                <div class="empty-state-icon">📭</div>
-                <p>No employees yet. Add your first employee above!</p>
-            </div>
-        `;
-        return;
+// Local list operations (binary search on the email order)
+const findIndex = (email) => {
+    let low = 0;
+    let high = state.employees.length;
+    while (low < high) {
+        const mid = (low + high) >>> 1;
+        if (state.employees[mid].email < email) low = mid + 1;
+        else high = mid;
+    }
+    return low;
+};
+
+// Insert or replace an employee; returns the replaced one, if any
+const upsertLocal = (employee) => {
+    const index = findIndex(employee.email);
+    const existing = state.employees[index];
+    if (existing && existing.email === employee.email) {
+        state.employees[index] = employee;
+        return existing;
+    }
+    state.employees.splice(index, 0, employee);
+    return undefined;
+};
+
+// Remove an employee; returns it, if it was there
+const removeLocal = (email) => {
+    const index = findIndex(email);
+    const existing = state.employees[index];
+    if (existing && existing.email === email) {
+        state.employees.splice(index, 1);
+        return existing;
     }
-    
-    listContainer.innerHTML = employees.map((employee, index) => `
-        <div class="employee-item" style="animation-delay: ${index * 0.05}s">
+    return undefined;
+};
+
+const restoreLocal = (email, previous) => {
+    if (previous) upsertLocal(previous);
+    else removeLocal(email);
+};
+
+const applyPendingChanges = () => {
+    pendingChanges.forEach((employee, email) => {
+        if (employee) upsertLocal(employee);
+        else removeLocal(email);
+    });
+};
+
+const showEmployees = (employees) => {
+    state.employees = employees;
+    state.loaded = true;
+    applyPendingChanges();
+    scheduleRender();
+};
+
+// UI rendering functions: only the visible slice of the list is in the DOM
+const view = {
+    list: null,
+    spacer: null,
+    window: null,
+    count: null,
+    rowHeight: 0,
+    frame: 0,
+};
+
+const measureRowHeight = () => {
+    view.rowHeight = parseFloat(getComputedStyle(view.list).getPropertyValue('--row-height')) || 112;
+};
+
+const renderRow = (employee) => `
+    <div class="employee-row" role="listitem">
+        <div class="employee-item${employee.pending ? ' pending' : ''}">
             <div class="employee-info">
                 <div class="employee-name">${escapeHtml(employee.name)}</div>
                 <div class="employee-email">${escapeHtml(employee.email)}</div>
-                <div class="employee-date">Added ${formatDate(employee.created_at)}</div>
+                <div class="employee-date">${employee.pending ? 'Saving…' : `Added ${formatDate(employee.created_at)}`}</div>
             </div>
-            <button 
-                class="btn btn-danger" 
-                onclick="handleDelete('${escapeHtml(employee.email)}')"
+            <button
+                class="btn btn-danger"
+                data-email="${escapeHtml(employee.email)}"
                 aria-label="Delete ${escapeHtml(employee.name)}"
+                ${employee.pending ? 'disabled' : ''}
             >
                 Delete
             </button>
         </div>
-    `).join('');
+    </div>
+`;
+
+const renderEmployeeList = () => {
+    view.frame = 0;
+    const { employees } = state;
+    view.count.textContent = state.loaded || employees.length ? employees.length.toLocaleString('en-US') : '';
+
+    if (employees.length === 0) {
+        view.spacer.style.height = '0px';
+        view.window.style.transform = '';
+        view.window.innerHTML = `
+            <div class="empty-state">
+                <div class="empty-state-icon">${state.loaded ? '📭' : '👥'}</div>
+                <p>${state.loaded ? 'No employees yet. Add your first employee above!' : 'Loading employees...'}</p>
+            </div>
+        `;
+        return;
+    }
+
+    const { rowHeight } = view;
+    const { scrollTop, clientHeight } = view.list;
+    const first = Math.max(0, Math.floor(scrollTop / rowHeight) - OVERSCAN_ROWS);
+    const last = Math.min(employees.length, Math.ceil((scrollTop + clientHeight) / rowHeight) + OVERSCAN_ROWS);
+    view.spacer.style.height = `${employees.length * rowHeight}px`;
+    view.window.style.transform = `translateY(${first * rowHeight}px)`;
+    view.window.innerHTML = employees.slice(first, last).map(renderRow).join('');
 };
 
-const escapeHtml = (text) => {
-    const div = document.createElement('div');
-    div.textContent = text;
-    return div.innerHTML;
+// Coalesce renders (scroll events, page arrivals, optimistic updates) into one per frame
+const scheduleRender = () => {
+    if (!view.frame) view.frame = requestAnimationFrame(renderEmployeeList);
+};
+
+const scrollToEmployee = (email) => {
+    const top = findIndex(email) * view.rowHeight;
+    if (top < view.list.scrollTop || top + view.rowHeight > view.list.scrollTop + view.list.clientHeight) {
+        view.list.scrollTop = Math.max(0, top - view.list.clientHeight / 2);
+    }
 };
 
 // Event handlers
 const handleSubmit = async (e) => {
     e.preventDefault();
-    
+
     const form = e.target;
     const name = form.name.value.trim();
     const email = form.email.value.trim();
-    
+
     if (!name || !email) {
         showNotification('Please fill in all fields', 'error');
         return;
     }
-    
+
+    // Show the employee right away; the API response confirms or rolls back
+    const optimistic = { name, email, created_at: new Date().toISOString(), pending: true };
+    const previous = upsertLocal(optimistic);
+    pendingChanges.set(email, optimistic);
+    scrollToEmployee(email);
+    scheduleRender();
+    form.reset();
+
     // Show loading state
     const submitBtn = document.getElementById('submitBtn');
     const btnText = document.getElementById('btnText');
     const btnLoading = document.getElementById('btnLoading');
-    
+
     submitBtn.disabled = true;
     btnText.style.display = 'none';
     btnLoading.style.display = 'inline-block';
-    
+
     try {
         const result = await addEmployee(name, email);
+        pendingChanges.delete(email);
+        upsertLocal(result.employee);
+        state.mutations++;
         showNotification(result.message, 'success');
-        form.reset();
-        await loadEmployees();
     } catch (error) {
+        pendingChanges.delete(email);
+        restoreLocal(email, previous);
         showNotification(error.message, 'error');
     } finally {
+        scheduleRender();
         submitBtn.disabled = false;
         btnText.style.display = 'inline';
         btnLoading.style.display = 'none';
@@ -171,23 +378,91 @@ const handleDelete = async (email) => {
     if (!confirm(`Are you sure you want to delete ${email}?`)) {
         return;
     }
-    
+
+    const previous = removeLocal(email);
+    pendingChanges.set(email, null);
+    scheduleRender();
+
     try {
         const result = await deleteEmployee(email);
+        pendingChanges.delete(email);
+        state.mutations++;
         showNotification(result.message, 'success');
-        await loadEmployees();
     } catch (error) {
+        pendingChanges.delete(email);
+        restoreLocal(email, previous);
+        scheduleRender();
         showNotification(error.message, 'error');
     }
 };
 
-// Make handleDelete available globally for onclick handlers
+// Make handleDelete available globally
 window.handleDelete = handleDelete;
 
-// Load employees
-const loadEmployees = async () => {
-    const employees = await fetchEmployees();
-    renderEmployeeList(employees);
+// Load employees: cached pages first, then revalidate them and fetch the rest.
+// Returns false if an add or delete was confirmed meanwhile, as the pages may predate it.
+const revalidateEmployees = async () => {
+    const mutations = state.mutations;
+    const cached = await pageCache.chain();
+    if (!state.loaded && cached.length) {
+        showEmployees(cached.flatMap((page) => page.employees));
+    }
+
+    // Cached cursors are known up front, so those pages are checked concurrently
+    const fresh = await mapLimit(cached, REVALIDATE_CONCURRENCY, (page) => fetchPage(page.cursor, page.etag));
+    const pages = [];
+    const changed = [];
+    let cursor = '';
+    for (let i = 0; i < cached.length && cursor !== null; i++) {
+        // An earlier page changed where it ends: the rest of the cached chain is out of step
+        if (cached[i].cursor !== cursor) break;
+        const page = fresh[i] || cached[i];
+        if (fresh[i]) changed.push(page);
+        pages.push(page);
+        cursor = page.next;
+    }
+
+    // Pages past the cached ones are fetched in order; on a first visit they are shown as they arrive
+    const progressive = !state.loaded;
+    if (progressive) state.employees = [];
+    while (cursor !== null) {
+        const page = await fetchPage(cursor);
+        changed.push(page);
+        pages.push(page);
+        cursor = page.next;
+        if (progressive) {
+            state.employees.push(...page.employees);
+            scheduleRender();
+        }
+    }
+
+    if (state.mutations !== mutations) return false;
+    if (changed.length || !state.loaded) {
+        showEmployees(pages.flatMap((page) => page.employees));
+    }
+    await pageCache.update(changed, pages);
+    return true;
+};
+
+const MAX_LOAD_ATTEMPTS = 3;
+let loading = null;
+
+const loadEmployees = () => {
+    if (!loading) {
+        loading = (async () => {
+            try {
+                for (let attempt = 1; attempt <= MAX_LOAD_ATTEMPTS; attempt++) {
+                    if (await revalidateEmployees()) break;
+                }
+            } catch (error) {
+                console.error('Error fetching employees:', error);
+                showNotification('Failed to load employees', 'error');
+            } finally {
+                loading = null;
+            }
+        })();
+    }
+    return loading;
 };
 
 // Initialize app
@@ -195,10 +470,33 @@ document.addEventListener('DOMContentLoaded', () => {
     // Set up form submission
     const form = document.getElementById('employeeForm');
     form.addEventListener('submit', handleSubmit);
-    
+
+    // Set up the virtualized list
+    view.list = document.getElementById('employeeList');
+    view.count = document.getElementById('employeeCount');
+    view.list.innerHTML = '<div class="employee-list-spacer"></div><div class="employee-list-window"></div>';
+    view.spacer = view.list.firstElementChild;
+    view.window = view.list.lastElementChild;
+    measureRowHeight();
+    view.list.addEventListener('scroll', scheduleRender, { passive: true });
+    window.addEventListener('resize', () => {
+        measureRowHeight();
+        scheduleRender();
+    });
+    view.list.addEventListener('click', (event) => {
+        const button = event.target.closest('button[data-email]');
+        if (button) handleDelete(button.dataset.email);
+    });
+    renderEmployeeList();
+
     // Load initial data
     loadEmployees();
-    
-    // Refresh every 30 seconds
-    setInterval(loadEmployees, 30000);
+
+    // Revalidate every 30 seconds while the page is visible
+    setInterval(() => {
+        if (document.visibilityState === 'visible') loadEmployees();
+    }, REFRESH_INTERVAL_MS);
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'visible') loadEmployees();
+    });
 });
@@ -30,7 +30,7 @@ resource "google_project_service" "container" {
 #     }
 #   }
 #   
-#   filename = "cloudbuild.yaml"
+#   filename = "employee-api-app/cloudbuild.yaml"
 #   
 #   substitutions = {
 #     _PROJECT_ID    = var.project_id
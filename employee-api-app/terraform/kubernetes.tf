@@ -59,9 +59,17 @@ resource "kubernetes_deployment" "employee_api" {
           app     = var.app_name
           version = "v1"
         }
+        annotations = {
+          "prometheus.io/scrape" = "true"
+          "prometheus.io/port"   = "8080"
+          "prometheus.io/path"   = "/metrics"
+        }
       }
       
       spec {
+        # DRAIN_SECONDS + GRACEFUL_TIMEOUT + margin
+        termination_grace_period_seconds = 45
+        
         security_context {
           run_as_non_root = true
           run_as_user     = 1000
@@ -94,20 +102,48 @@ resource "kubernetes_deployment" "employee_api" {
             value = "INFO"
           }
           
+          # Response cache shared by the replicas (the employee-api-cache
+          # Redis below); caching stops while it is unreachable
+          env {
+            name  = "RESPONSE_CACHE_BACKEND"
+            value = "redis"
+          }
+          
+          env {
+            name  = "RESPONSE_CACHE_REDIS_URL"
+            value = "redis://${kubernetes_service.response_cache.metadata[0].name}:6379/0"
+          }
+          
+          env {
+            name  = "RESPONSE_CACHE_REQUIRE_SHARED"
+            value = "true"
+          }
+          
+          env {
+            name  = "DRAIN_SECONDS"
+            value = "15"
+          }
+          
+          env {
+            name  = "GRACEFUL_TIMEOUT"
+            value = "20"
+          }
+          
+          # serve.py starts one worker per CPU of the limit below
           resources {
             requests = {
-              cpu    = "100m"
-              memory = "128Mi"
+              cpu    = "250m"
+              memory = "192Mi"
             }
             limits = {
-              cpu    = "500m"
-              memory = "512Mi"
+              cpu    = "2"
+              memory = "768Mi"
             }
           }
           
           liveness_probe {
             http_get {
-              path = "/health"
+              path = "/livez"
               port = 8080
             }
             initial_delay_seconds = 10
@@ -116,21 +152,28 @@ resource "kubernetes_deployment" "employee_api" {
             failure_threshold     = 3
           }
           
+          # Cached dependency checks; also fails as soon as SIGTERM arrives
           readiness_probe {
             http_get {
-              path = "/health"
+              path = "/readyz"
               port = 8080
             }
             initial_delay_seconds = 5
-            period_seconds        = 10
+            period_seconds        = 5
             timeout_seconds       = 3
-            failure_threshold     = 3
+            failure_threshold     = 2
           }
           
           volume_mount {
             name       = "data"
             mount_path = "/app/data"
           }
+
+          volume_mount {
+            name       = "jwt-signing-keys"
+            mount_path = "/app/keys"
+            read_only  = true
+          }
           
           security_context {
             allow_privilege_escalation = false
@@ -147,6 +190,17 @@ resource "kubernetes_deployment" "employee_api" {
             claim_name = kubernetes_persistent_volume_claim.employee_api_data.metadata[0].name
           }
         }
+
+        # ES256 signing keys shared by all replicas (see employee_common/keys.py); created
+        # by deploy.sh through scripts/ensure_jwt_signing_keys.sh
+        volume {
+          name = "jwt-signing-keys"
+          secret {
+            secret_name  = "jwt-signing-keys"
+            optional     = false
+            default_mode = "0440"
+          }
+        }
         
         restart_policy = "Always"
       }
@@ -154,6 +208,92 @@ resource "kubernetes_deployment" "employee_api" {
   }
 }
 
+# Response-cache Redis shared by the API replicas: no persistence, and only
+# entries with a TTL are evicted (the version counters have none)
+resource "kubernetes_deployment" "response_cache" {
+  metadata {
+    name      = "${var.app_name}-cache"
+    namespace = kubernetes_namespace.employee_api.metadata[0].name
+    labels = {
+      app = "${var.app_name}-cache"
+    }
+  }
+  
+  spec {
+    replicas = 1
+    
+    selector {
+      match_labels = {
+        app = "${var.app_name}-cache"
+      }
+    }
+    
+    template {
+      metadata {
+        labels = {
+          app = "${var.app_name}-cache"
+        }
+      }
+      
+      spec {
+        security_context {
+          run_as_non_root = true
+          run_as_user     = 999
+        }
+        
+        container {
+          name  = "redis"
+          image = "redis:7.2-alpine"
+          args  = ["--save", "", "--appendonly", "no", "--maxmemory", "96mb", "--maxmemory-policy", "volatile-lru"]
+          
+          port {
+            container_port = 6379
+            name           = "redis"
+          }
+          
+          resources {
+            requests = {
+              cpu    = "50m"
+              memory = "64Mi"
+            }
+            limits = {
+              memory = "128Mi"
+            }
+          }
+          
+          readiness_probe {
+            exec {
+              command = ["redis-cli", "ping"]
+            }
+            period_seconds = 5
+          }
+        }
+      }
+    }
+  }
+}
+
+resource "kubernetes_service" "response_cache" {
+  metadata {
+    name      = "${var.app_name}-cache"
+    namespace = kubernetes_namespace.employee_api.metadata[0].name
+  }
+  
+  spec {
+    selector = {
+      app = "${var.app_name}-cache"
+    }
+    
+    port {
+      port        = 6379
+      target_port = 6379
+      name        = "redis"
+    }
+    
+    type = "ClusterIP"
+  }
+}
+
 # Service
 resource "kubernetes_service" "employee_api" {
   metadata {
@@ -0,0 +1,564 @@
+"""
+Bulk import and export of the employees table with PostgreSQL COPY
+Files are CSV (with a header row), NDJSON or Parquet (needs the optional
+pyarrow package). They are read and written in chunks, so memory stays
+bounded whatever the file size.
+
+Import reads batches of rows and validates each batch with the Employee
+model. Validation runs in worker processes (--jobs). Valid rows are COPYed
+into a temporary staging table. A single INSERT ... ON CONFLICT (email) then
+merges them into employees. The whole import is one transaction: it is
+applied completely or not at all. Rows that fail validation are skipped and
+reported (--rejects). The import is aborted when more than --max-errors rows
+fail. When a file names an email more than once, its last row wins.
+employee_id is ignored: rows are matched by email.
+
+Export streams COPY ... TO STDOUT straight into the file.
+
+Run from the employee-api directory (or a pod, streaming through stdin or
+stdout with "-") with the usual DB_* settings:
+    python -m app.bulk import employees.csv
+    python -m app.bulk import - --format ndjson --mode insert < employees.ndjson
+    python -m app.bulk export employees.parquet
+"""
+
+import io
+import os
+import sys
+import csv
+import json
+import math
+import time
+import asyncio
+import logging
+import argparse
+import threading
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from employee_common.cache import employee_cache
+from employee_common.notify import change_notifier
+from employee_common.serve import cgroup_cpu_limit
+
+from app.db import db_router
+from app.models import Employee, employee_list_adapter
+
+logger = logging.getLogger(__name__)
+
+# Bulk configuration
+BULK_BATCH_ROWS = int(os.getenv("BULK_BATCH_ROWS", "10000"))
+BULK_JOBS = os.getenv("BULK_JOBS")  # validation processes; default: the CPU quota, as for server workers
+
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".parquet": "parquet"}
+# Employee fields as stored; employee_id is assigned by the database
+COLUMNS = ["first_name", "last_name", "email", "department", "position", "salary", "hire_date"]
+EXPORT_COLUMNS = ["employee_id"] + COLUMNS
+EXPORT_QUERY = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM employees ORDER BY employee_id"
+
+STAGING_TABLE = """
+    CREATE TEMP TABLE employees_import (
+        line BIGINT,
+        first_name TEXT,
+        last_name TEXT,
+        email TEXT,
+        department TEXT,
+        position TEXT,
+        salary NUMERIC,
+        hire_date DATE
+    ) ON COMMIT DROP
+"""
+
+_SOURCE = f"""
+    WITH source AS (
+        SELECT DISTINCT ON (email) {', '.join(COLUMNS)}
+        FROM employees_import
+        ORDER BY email, line DESC
+    ), merged AS (
+        INSERT INTO employees ({', '.join(COLUMNS)})
+        SELECT {', '.join(COLUMNS)} FROM source
+        ON CONFLICT (email) DO {{action}}
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT (SELECT count(*) FROM source),
+           count(*) FILTER (WHERE inserted),
+           count(*) FILTER (WHERE NOT inserted)
+    FROM merged
+"""
+MERGE = {
+    # Rows that match what is stored are left alone, so updated_at keeps meaning something
+    "upsert": _SOURCE.format(action=f"""UPDATE SET
+            {', '.join(f'{c} = EXCLUDED.{c}' for c in COLUMNS if c != 'email')},
+            updated_at = NOW()
+        WHERE ({', '.join(f'employees.{c}' for c in COLUMNS)})
+            IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in COLUMNS)})"""),
+    "insert": _SOURCE.format(action="NOTHING"),
+}
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+class ImportAborted(Exception):
+    """More rows failed validation than --max-errors allows"""
+
+
+class Progress:
+    """Rows done so far on stderr: an updating line on a terminal, a line every few seconds otherwise"""
+
+    def __init__(self, verb: str, enabled: bool = True):
+        self.verb = verb
+        self.enabled = enabled
+        self.tty = sys.stderr.isatty()
+        self.started = time.monotonic()
+        self.shown = 0.0
+        self.rows = 0
+
+    def update(self, rows: int, fraction: Optional[float] = None, force: bool = False):
+        self.rows = rows
+        now = time.monotonic()
+        if not self.enabled or (not force and now - self.shown < (0.2 if self.tty else 5.0)):
+            return
+        self.shown = now
+        elapsed = now - self.started
+        line = f"{self.verb} {rows:,} rows ({rows / elapsed if elapsed else 0:,.0f} rows/s"
+        line += f", {fraction:.0%})" if fraction is not None else ")"
+        sys.stderr.write(f"\r{line}\033[K" if self.tty else f"{line}\n")
+        sys.stderr.flush()
+
+    def done(self):
+        self.update(self.rows, force=True)
+        if self.enabled and self.tty:
+            sys.stderr.write("\n")
+
+
+def default_jobs() -> int:
+    if BULK_JOBS:
+        return max(1, int(BULK_JOBS))
+    cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def detect_format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise SystemExit(f"Cannot tell the format of {path!r}; pass --format csv|ndjson|parquet")
+    return FORMATS[ext]
+
+
+def _pyarrow():
+    try:
+        import pyarrow  # optional dependency
+        import pyarrow.csv
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("Parquet files need the optional pyarrow package (pip install pyarrow)")
+    return pyarrow
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def _normalize(row):
+    """Loosen file types to what the Employee model accepts"""
+    if not isinstance(row, dict):
+        return row
+    hire_date = row.get("hire_date")
+    if isinstance(hire_date, str) and len(hire_date) == 10:
+        row["hire_date"] = hire_date + "T00:00:00"  # a plain date, as exported
+    elif isinstance(hire_date, date) and not isinstance(hire_date, datetime):
+        row["hire_date"] = datetime.combine(hire_date, datetime.min.time())
+    return row
+
+
+def _text_batches(stream, parse, batch_rows: int) -> Iterator[Tuple[List[int], List, Optional[float]]]:
+    """Batches of (line numbers, rows, fraction of the file read) from a line-oriented file"""
+    size = None
+    try:
+        size = os.fstat(stream.fileno()).st_size or None
+    except (OSError, io.UnsupportedOperation):
+        pass
+    lines, batch = [], []
+    for number, row in parse():
+        lines.append(number)
+        batch.append(_normalize(row))
+        if len(batch) >= batch_rows:
+            yield lines, batch, _fraction(stream, size)
+            lines, batch = [], []
+    if batch:
+        yield lines, batch, _fraction(stream, size)
+
+
+def _fraction(stream, size: Optional[int]) -> Optional[float]:
+    if not size:
+        return None
+    try:
+        return min(1.0, stream.tell() / size)
+    except (OSError, io.UnsupportedOperation):
+        return None
+
+
+def read_batches(path: str, fmt: str, batch_rows: int = BULK_BATCH_ROWS):
+    """Batches of (line numbers, rows, fraction read) from *path* ("-" for stdin)"""
+    if fmt == "parquet":
+        pa = _pyarrow()
+        parquet = pa.parquet.ParquetFile(path)
+        total = parquet.metadata.num_rows or 1
+        present = [c for c in Employee.model_fields if c in parquet.schema_arrow.names]
+        line = 1
+        for record_batch in parquet.iter_batches(batch_size=batch_rows, columns=present):
+            rows = [_normalize(row) for row in record_batch.to_pylist()]
+            yield list(range(line, line + len(rows))), rows, min(1.0, (line - 1 + len(rows)) / total)
+            line += len(rows)
+        return
+
+    raw = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        if fmt == "csv":
+            def parse():
+                reader = csv.DictReader(text)
+                for row in reader:
+                    # An empty cell is a missing value
+                    yield reader.line_num, {k: (v if v != "" else None) for k, v in row.items() if k}
+        else:
+            def parse():
+                for number, line in enumerate(text, 1):
+                    if line.strip():
+                        try:
+                            yield number, json.loads(line)
+                        except ValueError:
+                            yield number, line.rstrip("\r\n")  # rejected as "not a valid dictionary"
+        yield from _text_batches(raw, parse, batch_rows)
+    finally:
+        if raw is not sys.stdin.buffer:
+            raw.close()
+
+
+# ---------------------------------------------------------------------------
+# Validation (runs in worker processes)
+# ---------------------------------------------------------------------------
+
+_limits: Dict[str, Tuple[str, float]] = {}
+
+
+def _init_worker(limits: Dict[str, Tuple[str, float]]):
+    global _limits
+    _limits = limits
+
+
+def column_limits(cur) -> Dict[str, Tuple[str, float]]:
+    """Length and magnitude limits of the employees columns, which the Employee model does not check"""
+    cur.execute(
+        """SELECT column_name, character_maximum_length, numeric_precision, numeric_scale
+           FROM information_schema.columns
+           WHERE table_name = 'employees' AND table_schema::name = ANY (current_schemas(false))"""
+    )
+    limits = {}
+    for name, length, precision, scale in cur.fetchall():
+        if name not in COLUMNS:
+            continue
+        if length:
+            limits[name] = ("length", length)
+        elif precision and scale is not None and name == "salary":
+            limits[name] = ("magnitude", 10 ** (precision - scale))
+    return limits
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        value = value.date()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def _limit_errors(employee: Employee) -> List[dict]:
+    errors = []
+    for column, (kind, limit) in _limits.items():
+        value = getattr(employee, column)
+        if value is None:
+            continue
+        if kind == "length" and len(value) > limit:
+            errors.append({"loc": [column], "msg": f"longer than {limit} characters"})
+        elif kind == "magnitude" and abs(value) >= limit:
+            errors.append({"loc": [column], "msg": f"must be below {limit:,}"})
+    return errors
+
+
+def validate_batch(job: Tuple[List[int], List]) -> Tuple[str, int, List[dict]]:
+    """Validate one batch; returns (COPY text of the valid rows, valid count, rejects)"""
+    lines, rows = job
+    rejects = {}
+    try:
+        employees = employee_list_adapter.validate_python(rows)
+        kept = list(range(len(rows)))
+    except ValidationError as e:
+        # The common case is one bad row in a batch: collect the errors per row,
+        # then validate the rest again in one go
+        for error in e.errors(include_url=False, include_input=False):
+            index, *loc = error["loc"]
+            rejects.setdefault(index, []).append({"loc": loc, "msg": error["msg"]})
+        kept = [i for i in range(len(rows)) if i not in rejects]
+        employees = employee_list_adapter.validate_python([rows[i] for i in kept])
+
+    out = io.StringIO()
+    valid = 0
+    for index, employee in zip(kept, employees):
+        errors = _limit_errors(employee)
+        if errors:
+            rejects[index] = errors
+            continue
+        out.write(f"{lines[index]}\t")
+        out.write("\t".join(_copy_value(getattr(employee, c)) for c in COLUMNS))
+        out.write("\n")
+        valid += 1
+    rejected = [
+        {"line": lines[i], "errors": rejects[i], "row": rows[i]}
+        for i in sorted(rejects)
+    ]
+    return out.getvalue(), valid, rejected
+
+
+def _validated(batches, jobs: int, limits):
+    """validate_batch over *batches* in order, with a bounded number of batches in flight"""
+    if jobs <= 1:
+        _init_worker(limits)
+        for lines, rows, fraction in batches:
+            yield len(rows), fraction, validate_batch((lines, rows))
+        return
+    with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(limits,)) as pool:
+        pending = deque()
+        for lines, rows, fraction in batches:
+            pending.append((len(rows), fraction, pool.submit(validate_batch, (lines, rows))))
+            if len(pending) >= 2 * jobs:
+                count, fraction, future = pending.popleft()
+                yield count, fraction, future.result()
+        while pending:
+            count, fraction, future = pending.popleft()
+            yield count, fraction, future.result()
+
+
+# ---------------------------------------------------------------------------
+# Import and export
+# ---------------------------------------------------------------------------
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+async def _announce(changes: int):
+    change_notifier.start()
+    change_notifier.notify(changes)
+    await change_notifier.stop()  # sends right away
+
+
+def import_employees(path: str, fmt: str, mode: str = "upsert", batch_rows: int = BULK_BATCH_ROWS,
+                     jobs: Optional[int] = None, max_errors: int = 0, rejects_path: Optional[str] = None,
+                     progress: bool = True) -> dict:
+    """Validate, stage and merge the rows of *path* into employees in one transaction"""
+    started = time.monotonic()
+    jobs = jobs or default_jobs()
+    meter = Progress("Imported", progress)
+    rejects_file = open(rejects_path, "w") if rejects_path else None
+    read = valid = rejected = 0
+    conn = db_router.connect_primary()
+    try:
+        cur = conn.cursor()
+        limits = column_limits(cur)
+        cur.execute(STAGING_TABLE)
+        with closing(_validated(read_batches(path, fmt, batch_rows), jobs, limits)) as batches:
+            for count, fraction, (copy_text, batch_valid, batch_rejects) in batches:
+                if copy_text:
+                    cur.copy_expert(f"COPY employees_import (line, {', '.join(COLUMNS)}) FROM STDIN",
+                                    io.StringIO(copy_text))
+                read += count
+                valid += batch_valid
+                rejected += len(batch_rejects)
+                for reject in batch_rejects:
+                    if rejects_file:
+                        rejects_file.write(json.dumps(reject, default=_json_default) + "\n")
+                    elif rejected <= 10:
+                        logger.warning("Line %d rejected: %s", reject["line"],
+                                       "; ".join(f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}"
+                                                 for e in reject["errors"]))
+                if rejected > max_errors:
+                    raise ImportAborted(f"{rejected} invalid rows (--max-errors {max_errors}); nothing was imported")
+                meter.update(read, fraction)
+        meter.done()
+
+        cur.execute("ANALYZE employees_import")
+        cur.execute(MERGE[mode])
+        distinct, inserted, updated = cur.fetchone()
+        conn.commit()
+        cur.close()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+        if rejects_file:
+            rejects_file.close()
+
+    if inserted or updated:
+        employee_cache.invalidate()
+        if not employee_cache.across_replicas:
+            logger.warning("RESPONSE_CACHE_BACKEND=%s is not shared with the serving pods; they keep "
+                           "cached lists for up to RESPONSE_CACHE_TTL_SECONDS", employee_cache.stats()["backend"])
+        if change_notifier.enabled:
+            asyncio.run(_announce(inserted + updated))
+    return {
+        "read": read,
+        "rejected": rejected,
+        "duplicates": valid - distinct,
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": distinct - inserted - updated,
+        "seconds": round(time.monotonic() - started, 2),
+    }
+
+
+class _CountingWriter:
+    """Binary file wrapper counting the lines COPY writes through it"""
+
+    def __init__(self, target, meter: Progress, total: int, skip: int = 0):
+        self.target = target
+        self.meter = meter
+        self.total = total or 1
+        self.lines = -skip
+
+    def write(self, data):
+        self.lines += data.count(b"\n")
+        self.meter.update(max(0, self.lines), min(1.0, self.lines / self.total))
+        return self.target.write(data)
+
+
+def _export_parquet(cur, target, meter: Progress, total: int):
+    """COPY as CSV into a pipe, parsed by pyarrow on this thread and written as Parquet row groups"""
+    pa = _pyarrow()
+    types = {
+        "employee_id": pa.int64(), "salary": pa.decimal128(10, 2), "hire_date": pa.date32(),
+        **{c: pa.string() for c in COLUMNS if c not in ("salary", "hire_date")},
+    }
+    read_fd, write_fd = os.pipe()
+    failure = []
+
+    def produce():
+        with open(write_fd, "wb") as pipe:
+            try:
+                cur.copy_expert(f"COPY ({EXPORT_QUERY}) TO STDOUT WITH (FORMAT csv, HEADER)", pipe)
+            except Exception as e:
+                failure.append(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    schema = pa.schema([(c, types[c]) for c in EXPORT_COLUMNS])
+    with open(read_fd, "rb") as pipe:
+        reader = pa.csv.open_csv(
+            pipe,
+            read_options=pa.csv.ReadOptions(block_size=8 << 20),
+            convert_options=pa.csv.ConvertOptions(
+                column_types=types, strings_can_be_null=True, quoted_strings_can_be_null=False
+            ),
+        )
+        with pa.parquet.ParquetWriter(target, schema) as writer:
+            rows = 0
+            for batch in reader:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+                meter.update(rows, min(1.0, rows / (total or 1)))
+    producer.join()
+    if failure:
+        raise failure[0]
+    return rows
+
+
+def export_employees(path: str, fmt: str, progress: bool = True) -> dict:
+    """Stream every employee into *path* ("-" for stdout)"""
+    started = time.monotonic()
+    meter = Progress("Exported", progress)
+    conn = db_router.connect_primary()
+    target = sys.stdout.buffer if path == "-" else open(path, "wb")
+    try:
+        cur = conn.cursor()
+        # One snapshot for the count and the data
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        cur.execute("SELECT count(*) FROM employees")
+        total = cur.fetchone()[0]
+        if fmt == "parquet":
+            rows = _export_parquet(cur, target, meter, total)
+        elif fmt == "csv":
+            out = _CountingWriter(target, meter, total, skip=1)
+            cur.copy_expert(f"COPY ({EXPORT_QUERY}) TO STDOUT WITH (FORMAT csv, HEADER)", out)
+            rows = max(0, out.lines)
+        else:
+            # row_to_json never emits a raw newline or control character, so CSV mode with
+            # quote and delimiter characters that cannot occur copies the JSON through verbatim
+            out = _CountingWriter(target, meter, total)
+            cur.copy_expert(
+                f"COPY (SELECT row_to_json(e) FROM ({EXPORT_QUERY}) e) TO STDOUT "
+                "WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')",
+                out,
+            )
+            rows = out.lines
+        meter.done()
+        conn.rollback()
+        cur.close()
+    finally:
+        conn.close()
+        if target is not sys.stdout.buffer:
+            target.close()
+        else:
+            target.flush()
+    return {"exported": rows, "seconds": round(time.monotonic() - started, 2)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export of the employees table with COPY")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="validate a file and upsert its rows by email")
+    imp.add_argument("path", help='CSV, NDJSON or Parquet file, or "-" for stdin')
+    imp.add_argument("--format", choices=sorted(set(FORMATS.values())), help="default: from the file extension")
+    imp.add_argument("--mode", choices=sorted(MERGE), default="upsert",
+                     help="upsert updates existing emails, insert leaves them alone")
+    imp.add_argument("--batch-rows", type=int, default=BULK_BATCH_ROWS)
+    imp.add_argument("--jobs", type=int, help="validation processes (default: the CPU quota)")
+    imp.add_argument("--max-errors", type=int, default=0, help="invalid rows tolerated before aborting")
+    imp.add_argument("--rejects", help="write invalid rows and their errors here as NDJSON")
+    imp.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    exp = sub.add_parser("export", help="write every employee to a file")
+    exp.add_argument("path", help='CSV, NDJSON or Parquet file, or "-" for stdout')
+    exp.add_argument("--format", choices=sorted(set(FORMATS.values())), help="default: from the file extension")
+    exp.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+    fmt = detect_format(args.path, args.format)
+    if fmt == "parquet" and args.path == "-":
+        raise SystemExit("Parquet needs a seekable file, not stdin or stdout")
+    try:
+        if args.command == "import":
+            summary = import_employees(args.path, fmt, args.mode, args.batch_rows, args.jobs,
+                                       args.max_errors, args.rejects, not args.quiet)
+        else:
+            summary = export_employees(args.path, fmt, not args.quiet)
+    except ImportAborted as e:
+        raise SystemExit(str(e))
+    print(json.dumps(summary), file=sys.stderr if args.path == "-" and args.command == "export" else sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
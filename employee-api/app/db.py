@@ -0,0 +1,360 @@
+"""
+Read/write routing between the Cloud SQL primary and its read replicas
+Writes always go to the primary (DB_HOST). Reads go to a replica from
+DB_REPLICA_HOSTS, round-robin, unless one of these holds:
+* the request carries the WAL position of the client's last write (see
+  record_write) and no replica has replayed that far yet, so the client sees
+  its own change. The marker travels with the client, not in this process,
+  so it holds across workers and pods;
+* no replica is known to be within DB_REPLICA_MAX_LAG_SECONDS of the primary.
+  Replication lag is measured in the background, and a replica that cannot
+  be reached counts as lagging.
+Connections record where they were routed (conn.role), so callers can retry
+a miss on the primary or avoid caching possibly stale replica reads.
+Request connections come from a bounded pool per server and keep their
+prepared statements (app.statements) for as long as they stay open
+"""
+
+import os
+import time
+import asyncio
+import logging
+import itertools
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+from fastapi.concurrency import run_in_threadpool
+
+from app.metrics import DB_POOL_CONNECTIONS, DB_READ_ROUTES, DB_REPLICA_LAG
+from app.statements import StatementCache
+
+logger = logging.getLogger(__name__)
+
+# Database configuration
+DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
+DB_PORT = os.getenv("DB_PORT", "5432")
+DB_NAME = os.getenv("DB_NAME", "jupyterhub_db")
+DB_USER = os.getenv("DB_USER", "jupyter-user-sa@suman-110797.iam")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "ignored-by-proxy")
+DB_REPLICA_HOSTS = os.getenv("DB_REPLICA_HOSTS", "")  # host:port,... (one Cloud SQL proxy port per replica)
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "10"))
+DB_REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv("DB_REPLICA_CHECK_INTERVAL_SECONDS", "2"))
+DB_REPLICA_CONNECT_TIMEOUT_SECONDS = int(os.getenv("DB_REPLICA_CONNECT_TIMEOUT_SECONDS", "2"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))  # per server (primary and each replica)
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "5"))
+DB_POOL_MAX_IDLE_SECONDS = float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "300"))
+
+# Seconds since the last replayed transaction (0 when the replica has replayed
+# everything it received, so an idle primary does not look like lag) and the
+# WAL position replayed so far
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END,
+    pg_last_wal_replay_lsn()::text
+"""
+
+
+def parse_lsn(value) -> Optional[int]:
+    """A pg_lsn such as '16/B374D848' as an integer, or None when *value* is not one"""
+    try:
+        high, low = value.split("/")
+        return (int(high, 16) << 32) | int(low, 16)
+    except (AttributeError, ValueError):
+        return None
+
+
+class RoutedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers whether it points at the primary or a replica"""
+
+    role = "primary"
+    pool: Optional["ConnectionPool"] = None
+
+
+class PoolTimeout(psycopg2.pool.PoolError):
+    """No pooled connection became free within DB_POOL_TIMEOUT_SECONDS"""
+
+
+class ConnectionPool:
+    """Bounded pool of connections to one server, most recently used first"""
+
+    def __init__(self, connect, target: str, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT_SECONDS,
+                 max_idle: float = DB_POOL_MAX_IDLE_SECONDS):
+        self._connect = connect
+        self.target = target
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle: List[Tuple[RoutedConnection, float]] = []
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.in_use = 0
+
+    def _gauges(self):
+        DB_POOL_CONNECTIONS.labels(self.target, "idle").set(len(self._idle))
+        DB_POOL_CONNECTIONS.labels(self.target, "in_use").set(self.in_use)
+
+    def getconn(self) -> RoutedConnection:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"No {self.target} connection free after {self.timeout:g}s")
+        try:
+            while True:
+                with self._lock:
+                    conn, released_at = self._idle.pop() if self._idle else (None, None)
+                if conn is None:
+                    conn = self._connect()
+                    conn.pool = self
+                elif conn.closed or time.monotonic() - released_at > self.max_idle:
+                    # Idle long enough that a proxy or the server may have dropped it
+                    conn.close()
+                    continue
+                with self._lock:
+                    self.in_use += 1
+                    self._gauges()
+                return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn: RoutedConnection):
+        try:
+            if not conn.closed and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            keep = not conn.closed
+        except psycopg2.Error:
+            keep = False
+        if not keep:
+            conn.close()
+        with self._lock:
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            self.in_use -= 1
+            self._gauges()
+        self._slots.release()
+
+    def closeall(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._gauges()
+        for conn, _ in idle:
+            conn.close()
+
+    def exhausted(self) -> bool:
+        """Every slot is taken: the next getconn() waits for a release"""
+        return self.in_use >= self.size
+
+    def stats(self) -> dict:
+        return {"size": self.size, "idle": len(self._idle), "in_use": self.in_use}
+
+
+class Replica:
+    """One read replica endpoint and its last measured lag"""
+
+    def __init__(self, host: str, port: str):
+        self.host = host
+        self.port = port
+        self.name = f"{host}:{port}"
+        self.lag: Optional[float] = None
+        self.replayed: Optional[int] = None  # WAL position replayed when last measured
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    def usable(self, now: float, max_lag: float, interval: float) -> bool:
+        """Measured recently and within the lag budget"""
+        if self.lag is None or self.checked_at is None:
+            return False
+        return self.lag <= max_lag and now - self.checked_at <= 3 * interval + DB_REPLICA_CONNECT_TIMEOUT_SECONDS
+
+    def result(self, now: float) -> dict:
+        return {
+            "lag_seconds": self.lag,
+            "error": self.error,
+            "age_seconds": round(now - self.checked_at, 3) if self.checked_at is not None else None,
+        }
+
+
+def parse_replicas(spec: str) -> List[Replica]:
+    replicas = []
+    for item in spec.split(","):
+        item = item.strip()
+        if item:
+            host, _, port = item.partition(":")
+            replicas.append(Replica(host, port or DB_PORT))
+    return replicas
+
+
+class DatabaseRouter:
+    """Opens primary or replica connections and tracks replica lag"""
+
+    def __init__(self, replicas: Optional[List[Replica]] = None, max_lag: float = DB_REPLICA_MAX_LAG_SECONDS,
+                 read_your_writes: float = DB_READ_YOUR_WRITES_SECONDS,
+                 interval: float = DB_REPLICA_CHECK_INTERVAL_SECONDS):
+        self.replicas = replicas if replicas is not None else parse_replicas(DB_REPLICA_HOSTS)
+        self.max_lag = max_lag
+        self.read_your_writes = read_your_writes
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self._pools: Dict[str, ConnectionPool] = {}
+
+    def _connect(self, host: str, port: str, role: str, **kwargs) -> RoutedConnection:
+        conn = psycopg2.connect(
+            host=host, port=port, database=DB_NAME, user=DB_USER, password=DB_PASSWORD,
+            sslmode='disable', connection_factory=RoutedConnection, **kwargs
+        )
+        conn.role = role
+        conn.statements = StatementCache()
+        return conn
+
+    def _pool(self, target: str, connect) -> ConnectionPool:
+        pool = self._pools.get(target)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.setdefault(target, ConnectionPool(connect, target))
+        return pool
+
+    def connect_primary(self, **kwargs) -> RoutedConnection:
+        """Unpooled primary connection, for startup and health checks; close it when done"""
+        return self._connect(DB_HOST, DB_PORT, "primary", **kwargs)
+
+    def primary(self) -> RoutedConnection:
+        """Pooled primary connection, for writes; hand it back with release()"""
+        return self._pool("primary", lambda: self._connect(DB_HOST, DB_PORT, "primary")).getconn()
+
+    def release(self, conn: RoutedConnection):
+        """Return a pooled connection (rolling back anything uncommitted), or close an unpooled one"""
+        if conn.pool is not None:
+            conn.pool.putconn(conn)
+        else:
+            conn.close()
+
+    def record_write(self, conn: RoutedConnection) -> Optional[str]:
+        """WAL position that reads must reach to include what *conn* just committed
+
+        Hand it to the client (see app.main.read_after); None without replicas
+        """
+        if not self.replicas:
+            return None
+        cur = conn.cursor()
+        cur.execute("SELECT pg_current_wal_lsn()::text")
+        lsn = cur.fetchone()[0]
+        cur.close()
+        return lsn
+
+    def route(self, after: Optional[str] = None) -> Tuple[Optional[Replica], str]:
+        """Pick a replica for a read that must see WAL position *after*, or None and the reason to use the primary"""
+        if not self.replicas:
+            return None, "no_replicas"
+        now = time.monotonic()
+        usable = [r for r in self.replicas if r.usable(now, self.max_lag, self.interval)]
+        if not usable:
+            return None, "replica_lag"
+        position = parse_lsn(after)
+        if position is not None:
+            # Replicas only move forward, so the last measurement is a safe bound
+            usable = [r for r in usable if r.replayed is not None and r.replayed >= position]
+            if not usable:
+                return None, "read_your_writes"
+        return usable[next(self._round_robin) % len(usable)], "replica"
+
+    def connect_read(self, after: Optional[str] = None) -> RoutedConnection:
+        """Pooled connection for a read that must see WAL position *after* (a replica when that is safe)"""
+        replica, reason = self.route(after)
+        if replica is not None:
+            try:
+                conn = self._pool(replica.name, lambda: self._connect(
+                    replica.host, replica.port, "replica", connect_timeout=DB_REPLICA_CONNECT_TIMEOUT_SECONDS
+                )).getconn()
+                DB_READ_ROUTES.labels("replica", reason).inc()
+                return conn
+            except psycopg2.OperationalError as e:
+                # Stop routing here until the next lag check succeeds
+                replica.lag, replica.error = None, str(e).strip()
+                logger.warning("Replica %s unreachable, reading from the primary: %s", replica.name, replica.error)
+                reason = "replica_error"
+        DB_READ_ROUTES.labels("primary", reason).inc()
+        return self.primary()
+
+    def is_current(self, conn: RoutedConnection, changed_at: float) -> bool:
+        """Whether reads on *conn* include writes committed up to *changed_at* (time.monotonic())"""
+        return conn.role == "primary" or time.monotonic() - changed_at > self.max_lag
+
+    def _measure(self, replica: Replica):
+        try:
+            conn = self._connect(replica.host, replica.port, "replica",
+                                 connect_timeout=DB_REPLICA_CONNECT_TIMEOUT_SECONDS)
+            try:
+                cur = conn.cursor()
+                cur.execute(LAG_QUERY)
+                lag, replayed = cur.fetchone()
+                replica.lag, replica.replayed = float(lag), parse_lsn(replayed)
+                cur.close()
+            finally:
+                conn.close()
+            replica.error = None
+            DB_REPLICA_LAG.labels(replica.name).set(replica.lag)
+        except Exception as e:
+            replica.lag, replica.error = None, str(e).strip() or type(e).__name__
+            DB_REPLICA_LAG.labels(replica.name).set(float("inf"))
+        replica.checked_at = time.monotonic()
+
+    async def check_lag(self):
+        """Measure every replica's lag, concurrently"""
+        await asyncio.gather(*(run_in_threadpool(self._measure, replica) for replica in self.replicas))
+
+    async def _loop(self):
+        usable = None
+        while True:
+            try:
+                await self.check_lag()
+                current = self.usable_replicas()
+                if current != usable:
+                    logger.info("%d of %d read replicas usable", current, len(self.replicas))
+                    usable = current
+            except Exception as e:
+                logger.error("Replica lag check failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start lag tracking on the running event loop (no-op without replicas)"""
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for pool in self._pools.values():
+            pool.closeall()
+
+    def exhausted_pools(self) -> List[str]:
+        """Targets whose pool has no free slot"""
+        return [target for target, pool in list(self._pools.items()) if pool.exhausted()]
+
+    def usable_replicas(self) -> int:
+        """Replicas measured recently and within the lag budget"""
+        now = time.monotonic()
+        return sum(r.usable(now, self.max_lag, self.interval) for r in self.replicas)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "max_lag_seconds": self.max_lag,
+            "read_your_writes_seconds": self.read_your_writes,
+            "replicas": {r.name: r.result(now) for r in self.replicas},
+            "pools": {target: pool.stats() for target, pool in self._pools.items()},
+        }
+
+
+db_router = DatabaseRouter()
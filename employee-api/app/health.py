@@ -0,0 +1,52 @@
+"""
+Readiness checks for the Employee Management API
+Check scheduling and caching live in employee_common.health; this module
+registers the database, connection pool and read replica checks
+"""
+
+import os
+
+from fastapi.concurrency import run_in_threadpool
+from employee_common.health import HealthMonitor, register_key_checks
+
+HEALTH_KMS_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_KMS_CHECK_INTERVAL_SECONDS", "60"))
+
+
+def register_default_checks(monitor: HealthMonitor, connect, router):
+    """
+    Register the database, pool, replica, signing key and (optional) KMS checks
+    *connect* opens an unpooled psycopg2 connection; *router* is the DatabaseRouter
+    """
+
+    def _select_one():
+        conn = connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+        finally:
+            conn.close()
+
+    async def check_database():
+        await run_in_threadpool(_select_one)
+
+    monitor.register("database", check_database)
+
+    async def check_pool():
+        # Every slot taken: new requests would wait DB_POOL_TIMEOUT_SECONDS and fail
+        exhausted = router.exhausted_pools()
+        if exhausted:
+            raise RuntimeError(f"connection pool exhausted: {', '.join(exhausted)}")
+
+    monitor.register("db_pool", check_pool)
+
+    if router.replicas:
+        async def check_replicas():
+            # Not critical: reads fall back to the primary
+            usable, total = router.usable_replicas(), len(router.replicas)
+            if not usable:
+                raise RuntimeError(f"no usable read replica (0 of {total})")
+
+        monitor.register("read_replicas", check_replicas, critical=False)
+
+    register_key_checks(monitor, kms_interval=HEALTH_KMS_CHECK_INTERVAL_SECONDS)
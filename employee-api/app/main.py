@@ -3,29 +3,52 @@ Employee Management API
 A FastAPI application for managing employee data with PostgreSQL backend
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from fastapi.responses import JSONResponse
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
-import psycopg2
-from psycopg2.extras import RealDictCursor
 import os
 import secrets
 import hashlib
 import jwt
 
-# Configuration
-DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
-DB_PORT = os.getenv("DB_PORT", "5432")
-DB_NAME = os.getenv("DB_NAME", "jupyterhub_db")
-DB_USER = os.getenv("DB_USER", "jupyter-user-sa@suman-110797.iam")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "ignored-by-proxy")
+from employee_common.cache import employee_cache
+from employee_common.compression import CompressionMiddleware
+from employee_common.health import health_monitor
+from employee_common.lifecycle import DrainMiddleware, draining
+from employee_common.logging_config import setup_logging
+from employee_common.singleflight import read_coalescer, request_key
+from employee_common.tracing import TracingMiddleware, setup_tracing, span
+from employee_common.notify import change_notifier
+from employee_common.keys import JWT_ALGORITHM, MissingSigningKeys, claims_cache, key_ring
+from employee_common.ratelimit import client_address
+
+from app.models import APIKeyRequest, APIKeyResponse, Employee, UserLogin, UserSignup, employee_list_adapter
+from app.db import PoolTimeout, db_router, parse_lsn
+from app import statements
+from app.ratelimit import login_admission
+from app.metrics import (
+    AUTH_LATENCY,
+    DB_CONNECTIONS_IN_USE,
+    SERIALIZATION_LATENCY,
+    InstrumentedCursor,
+    PrometheusMiddleware,
+    render_metrics,
+    setup_metrics,
+    shutdown_metrics,
+    timed,
+)
+from app.health import register_default_checks
+
+# JSON logs to stdout through a background writer
+setup_logging("employee-api")
 
+# Configuration
 API_SECRET_KEY = os.getenv("API_SECRET_KEY", secrets.token_urlsafe(32))
-JWT_SECRET = os.getenv("JWT_SECRET", secrets.token_urlsafe(32))
-JWT_ALGORITHM = "HS256"
 
 app = FastAPI(
     title="Employee Management API",
@@ -42,63 +65,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Response compression
+app.add_middleware(CompressionMiddleware)
+
+# Close keep-alive connections while draining
+app.add_middleware(DrainMiddleware)
+
+# Metrics and tracing
+app.add_middleware(TracingMiddleware)
+app.add_middleware(PrometheusMiddleware)
+setup_metrics(employee_cache)
+setup_tracing("employee-api")
+
 security = HTTPBearer()
 
-# Pydantic Models
-class UserSignup(BaseModel):
-    username: str
-    email: EmailStr
-    password: str
-    full_name: str
-
-class UserLogin(BaseModel):
-    username: str
-    password: str
-
-class Employee(BaseModel):
-    employee_id: Optional[int] = None
-    first_name: str
-    last_name: str
-    email: EmailStr
-    department: str
-    position: str
-    salary: Optional[float] = None
-    hire_date: Optional[datetime] = None
-
-class APIKeyRequest(BaseModel):
-    username: str
-
-class APIKeyResponse(BaseModel):
-    api_id: str
-    api_secret: str
-    created_at: datetime
-    expires_at: datetime
-
-# Database connection
-def get_db():
-    conn = psycopg2.connect(
-        host=DB_HOST,
-        port=DB_PORT,
-        database=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        sslmode='disable'
-    )
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    """All pooled connections stayed busy: ask the client to retry instead of queueing further"""
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(MissingSigningKeys)
+async def missing_signing_keys_handler(request: Request, exc: MissingSigningKeys):
+    """No signing key mounted: the pod is unready, so another replica should answer"""
+    return JSONResponse(status_code=503, content={"detail": "Token signing unavailable"}, headers={"Retry-After": "5"})
+
+# Database connections (see app.db for read/write routing and pooling)
+def _hold(conn):
+    DB_CONNECTIONS_IN_USE.inc()
     try:
         yield conn
     finally:
-        conn.close()
+        db_router.release(conn)
+        DB_CONNECTIONS_IN_USE.dec()
+
+def get_db():
+    """Pooled primary connection, for writes"""
+    yield from _hold(db_router.primary())
+
+# Short-lived connection for background health checks
+def connect_for_health_check():
+    return db_router.connect_primary(connect_timeout=2)
 
 # Initialize database tables
 def init_db():
-    conn = psycopg2.connect(
-        host=DB_HOST,
-        port=DB_PORT,
-        database=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        sslmode='disable'
-    )
+    conn = db_router.connect_primary()
     cur = conn.cursor()
     
     # Users table
@@ -128,6 +138,8 @@ def init_db():
             updated_at TIMESTAMP DEFAULT NOW()
         )
     """)
+    # Incremental reads (?updated_since=) scan only the recently changed rows
+    cur.execute("CREATE INDEX IF NOT EXISTS employees_updated_at_idx ON employees (updated_at)")
     
     # API Keys table
     cur.execute("""
@@ -157,15 +169,25 @@ def create_jwt_token(data: dict, expires_delta: timedelta = timedelta(hours=24))
     to_encode = data.copy()
     expire = datetime.utcnow() + expires_delta
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    kid, signing_key = key_ring.signing_key()
+    return jwt.encode(to_encode, signing_key, algorithm=JWT_ALGORITHM, headers={"kid": kid})
 
 def verify_jwt_token(token: str):
+    """Verify an ES256 token against the key ring; hot tokens hit the claims cache"""
+    payload = claims_cache.get(token)
+    if payload is not None:
+        return payload
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        kid = jwt.get_unverified_header(token).get("kid")
+        public_key = key_ring.public_key(kid) if kid else None
+        if public_key is None:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        payload = jwt.decode(token, public_key, algorithms=[JWT_ALGORITHM])
+        claims_cache.set(token, payload)
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)):
@@ -174,26 +196,33 @@ def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)
     
     # Check if it's a JWT token
     try:
-        payload = verify_jwt_token(token)
+        with timed(AUTH_LATENCY, method="jwt"):
+            payload = verify_jwt_token(token)
         return payload
     except:
         pass
     
+    with timed(AUTH_LATENCY, method="api_key"):
+        return _verify_api_key(token)
+
+def _lookup_api_key(conn, api_id: str):
+    cur = conn.cursor(cursor_factory=InstrumentedCursor)
+    try:
+        statements.execute(cur, "api_key_lookup", (api_id,))
+        return cur.fetchone()
+    finally:
+        cur.close()
+        db_router.release(conn)
+
+def _verify_api_key(token: str):
     # Check if it's an API key (format: api_id:api_secret)
     try:
         api_id, api_secret = token.split(":")
-        conn = psycopg2.connect(
-            host=DB_HOST, port=DB_PORT, database=DB_NAME,
-            user=DB_USER, password=DB_PASSWORD, sslmode='disable'
-        )
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute(
-            "SELECT * FROM api_keys WHERE api_id = %s AND is_active = TRUE",
-            (api_id,)
-        )
-        key = cur.fetchone()
-        cur.close()
-        conn.close()
+        conn = db_router.connect_read()
+        key = _lookup_api_key(conn, api_id)
+        if key is None and conn.role == "replica":
+            # Keys created moments ago may not have replicated yet
+            key = _lookup_api_key(db_router.primary(), api_id)
         
         if key and verify_password(api_secret, key['api_secret_hash']):
             if key['expires_at'] and datetime.now() > key['expires_at']:
@@ -204,10 +233,58 @@ def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)
     except ValueError:
         raise HTTPException(status_code=401, detail="Invalid authorization format")
 
+# Read-your-writes: a write hands the client the WAL position it reached, as a
+# header and a cookie. Reads that send it back only use replicas that have
+# replayed that far, whichever worker or pod serves them
+READ_AFTER_HEADER = "X-Read-After-LSN"
+READ_AFTER_COOKIE = "read_after_lsn"
+
+def read_after(request: Request) -> Optional[str]:
+    """WAL position of the client's last write, from the header or the cookie (None if absent or malformed)"""
+    marker = request.headers.get(READ_AFTER_HEADER) or request.cookies.get(READ_AFTER_COOKIE)
+    return marker if parse_lsn(marker) is not None else None
+
+def remember_write(response: Response, lsn: Optional[str]):
+    """Give the client the marker its next reads send back (kept by cookie jars for the window)"""
+    if lsn is None:
+        return
+    response.headers[READ_AFTER_HEADER] = lsn
+    response.set_cookie(READ_AFTER_COOKIE, lsn, max_age=int(db_router.read_your_writes),
+                        path="/api", httponly=True, samesite="strict")
+
+@contextmanager
+def read_connection(after: Optional[str]):
+    """Read connection that sees WAL position *after*: a replica unless none has replayed it
+    
+    A context manager rather than a dependency, because coalesced reads run
+    in a task that may outlive the request that started them
+    """
+    yield from _hold(db_router.connect_read(after))
+
+def read_scope(after: Optional[str]) -> str:
+    """Coalescing scope: any replica will do, unless the client must see its own write"""
+    return "any" if after is None else f"after:{after}"
+
+@contextmanager
+def public_read_connection():
+    """Read connection for unauthenticated lookups (login)"""
+    yield from _hold(db_router.connect_read())
+
 # Routes
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    register_default_checks(health_monitor, connect_for_health_check, db_router)
+    health_monitor.start()
+    db_router.start()
+    change_notifier.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await health_monitor.stop()
+    await db_router.stop()
+    await change_notifier.stop()
+    shutdown_metrics()
 
 @app.get("/")
 async def root():
@@ -224,7 +301,7 @@ async def root():
 
 @app.post("/auth/signup", status_code=status.HTTP_201_CREATED)
 async def signup(user: UserSignup, conn=Depends(get_db)):
-    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur = conn.cursor(cursor_factory=InstrumentedCursor)
     
     # Check if user exists
     cur.execute("SELECT * FROM users WHERE username = %s OR email = %s", (user.username, user.email))
@@ -243,14 +320,37 @@ async def signup(user: UserSignup, conn=Depends(get_db)):
     
     return {"message": "User created successfully", "user_id": user_id}
 
-@app.post("/auth/login")
-async def login(user: UserLogin, conn=Depends(get_db)):
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute("SELECT * FROM users WHERE username = %s", (user.username,))
+def _find_user(conn, username: str):
+    cur = conn.cursor(cursor_factory=InstrumentedCursor)
+    cur.execute("SELECT * FROM users WHERE username = %s", (username,))
     db_user = cur.fetchone()
     cur.close()
+    return db_user
+
+def authenticate_user(user: UserLogin):
+    with public_read_connection() as conn:
+        db_user = _find_user(conn, user.username)
+        if db_user is None and conn.role == "replica":
+            # Users who signed up moments ago may not have replicated yet
+            primary = db_router.primary()
+            try:
+                db_user = _find_user(primary, user.username)
+            finally:
+                db_router.release(primary)
     
     if not db_user or not verify_password(user.password, db_user['password_hash']):
+        return None
+    return db_user
+
+@app.post("/auth/login")
+async def login(user: UserLogin, request: Request):
+    async with login_admission.admit(client_address(request)):
+        # The pooled connection is checked out only once admitted, so
+        # throttled logins never hold or wait for a pool slot. The lookup and
+        # password hashing run off the event loop
+        db_user = await run_in_threadpool(authenticate_user, user)
+    
+    if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     token = create_jwt_token({"user_id": db_user['user_id'], "username": db_user['username']})
@@ -259,7 +359,7 @@ async def login(user: UserLogin, conn=Depends(get_db)):
 @app.post("/auth/api-key", response_model=APIKeyResponse)
 async def create_api_key(request: APIKeyRequest, conn=Depends(get_db)):
     """Generate API key for a user"""
-    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur = conn.cursor(cursor_factory=InstrumentedCursor)
     
     # Get user
     cur.execute("SELECT user_id FROM users WHERE username = %s", (request.username,))
@@ -290,47 +390,163 @@ async def create_api_key(request: APIKeyRequest, conn=Depends(get_db)):
         expires_at=expires_at
     )
 
+def json_with_etag(body: bytes, request: Request, headers: Optional[dict] = None) -> Response:
+    """JSON response with an ETag of *body*; 304 when the client already has it"""
+    etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    # Compare weakly: the compression middleware turns the tag into W/"..."
+    if if_none_match and etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _load_changes(after: Optional[str], since: datetime) -> Tuple[bytes, datetime]:
+    """Employees changed after *since*, and the newest updated_at as the next since-token"""
+    with read_connection(after) as conn:
+        cur = conn.cursor(cursor_factory=InstrumentedCursor)
+        statements.execute(cur, "employee_changes", (since,))
+        employees = cur.fetchall()
+        cur.close()
+    
+    with timed(SERIALIZATION_LATENCY, route="/api/employees"), span("json.encode", rows=len(employees)):
+        body = employee_list_adapter.dump_json(employee_list_adapter.validate_python(employees))
+    return body, max((e['updated_at'] for e in employees if e['updated_at']), default=since)
+
+def _load_list(after: Optional[str], cache_key: str) -> bytes:
+    with read_connection(after) as conn:
+        cur = conn.cursor(cursor_factory=InstrumentedCursor)
+        statements.execute(cur, "employee_list")
+        employees = cur.fetchall()
+        cur.close()
+        
+        with timed(SERIALIZATION_LATENCY, route="/api/employees"), span("json.encode", rows=len(employees)):
+            body = employee_list_adapter.dump_json(employee_list_adapter.validate_python(employees))
+        # A replica may still be replaying the write that moved the cache version
+        if db_router.is_current(conn, employee_cache.changed_at):
+            employee_cache.set(cache_key, body)
+    return body
+
+def _load_employee(after: Optional[str], employee_id: int, cache_key: str) -> bytes:
+    with read_connection(after) as conn:
+        cur = conn.cursor(cursor_factory=InstrumentedCursor)
+        statements.execute(cur, "employee_by_id", (employee_id,))
+        employee = cur.fetchone()
+        cur.close()
+        
+        if not employee:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        
+        with timed(SERIALIZATION_LATENCY, route="/api/employees/{employee_id}"), span("json.encode"):
+            body = Employee.model_validate(employee).model_dump_json().encode("utf-8")
+        if db_router.is_current(conn, employee_cache.changed_at):
+            employee_cache.set(cache_key, body)
+    return body
+
 @app.get("/api/employees", response_model=List[Employee])
-async def get_employees(auth=Depends(verify_api_key), conn=Depends(get_db)):
-    """Get all employees (requires authentication)"""
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute("SELECT * FROM employees ORDER BY employee_id")
-    employees = cur.fetchall()
-    cur.close()
-    return employees
+async def get_employees(
+    request: Request,
+    updated_since: Optional[datetime] = Query(None, description="Only employees changed after this time"),
+    auth=Depends(verify_api_key),
+):
+    """Get all employees, or those changed since a time (requires authentication)"""
+    after = read_after(request)
+    # Misses run off the event loop, once for all identical requests in flight
+    if updated_since is not None:
+        key = request_key(request, read_scope(after), employee_cache.key("changes"))
+        body, updated_through = await read_coalescer.do(
+            "/api/employees", key, lambda: run_in_threadpool(_load_changes, after, updated_since)
+        )
+        return json_with_etag(body, request, {"X-Updated-Through": updated_through.isoformat()})
+    
+    cache_key = employee_cache.key("list")
+    # A client that just wrote skips the cache: this pod may not have seen the version bump yet
+    cached = employee_cache.get(cache_key) if after is None else None
+    if cached is not None:
+        return json_with_etag(cached, request)
+    
+    body = await read_coalescer.do(
+        "/api/employees", request_key(request, read_scope(after), cache_key),
+        lambda: run_in_threadpool(_load_list, after, cache_key)
+    )
+    return json_with_etag(body, request)
 
 @app.post("/api/employees", response_model=Employee, status_code=status.HTTP_201_CREATED)
-async def create_employee(employee: Employee, auth=Depends(verify_api_key), conn=Depends(get_db)):
+async def create_employee(employee: Employee, response: Response, auth=Depends(verify_api_key),
+                          conn=Depends(get_db)):
     """Create a new employee (requires authentication)"""
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute(
-        """INSERT INTO employees (first_name, last_name, email, department, position, salary, hire_date)
-           VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING *""",
+    cur = conn.cursor(cursor_factory=InstrumentedCursor)
+    statements.execute(
+        cur, "employee_insert",
         (employee.first_name, employee.last_name, employee.email, 
          employee.department, employee.position, employee.salary, employee.hire_date)
     )
     new_employee = cur.fetchone()
     conn.commit()
     cur.close()
+    remember_write(response, db_router.record_write(conn))
+    employee_cache.invalidate()
+    change_notifier.notify()
     return new_employee
 
 @app.get("/api/employees/{employee_id}", response_model=Employee)
-async def get_employee(employee_id: int, auth=Depends(verify_api_key), conn=Depends(get_db)):
+async def get_employee(employee_id: int, request: Request, auth=Depends(verify_api_key)):
     """Get employee by ID (requires authentication)"""
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute("SELECT * FROM employees WHERE employee_id = %s", (employee_id,))
-    employee = cur.fetchone()
-    cur.close()
+    after = read_after(request)
+    cache_key = employee_cache.key(f"id={employee_id}")
+    cached = employee_cache.get(cache_key) if after is None else None
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
     
-    if not employee:
-        raise HTTPException(status_code=404, detail="Employee not found")
-    return employee
+    body = await read_coalescer.do(
+        "/api/employees/{employee_id}", request_key(request, read_scope(after), cache_key),
+        lambda: run_in_threadpool(_load_employee, after, employee_id, cache_key)
+    )
+    return Response(content=body, media_type="application/json")
+
+@app.get("/.well-known/jwks.json")
+async def jwks(response: Response):
+    """Public keys for verifying tokens issued by this service"""
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return key_ring.jwks()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Response cache hit/miss statistics"""
+    return employee_cache.stats()
+
+@app.get("/db/replicas")
+async def replica_stats():
+    """Read replica lag as last measured, the routing thresholds and connection pool usage"""
+    return db_router.stats()
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/livez")
+async def liveness_check():
+    """Liveness probe: the process and event loop respond; dependencies are not checked"""
+    return {"status": "alive", "timestamp": datetime.now().isoformat()}
+
+@app.get("/readyz")
+async def readiness_check(response: Response):
+    """Readiness probe from cached dependency checks; fails while draining or degraded"""
+    ready, checks = health_monitor.snapshot()
+    if draining.is_set():
+        state = "draining"
+    else:
+        state = "ready" if ready else "unavailable"
+    if state != "ready":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": state, "timestamp": datetime.now().isoformat(), "checks": checks}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,174 @@
+"""
+Prometheus metrics for the Employee Management API
+Request latency histograms, DB timing via an instrumented psycopg2 cursor,
+and cache statistics collected at scrape time. With PROMETHEUS_MULTIPROC_DIR
+set (employee_common.serve sets it for several workers) counters and
+histograms are aggregated across the workers of the pod
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from psycopg2.extras import RealDictCursor
+
+from employee_common.tracing import span
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route and status",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", multiprocess_mode="livesum"
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "Database statement execution time by statement type",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_CONNECTIONS_IN_USE = Gauge(
+    "db_connections_in_use", "Open database connections held by requests", multiprocess_mode="livesum"
+)
+DB_READ_ROUTES = Counter(
+    "db_read_routes", "Read connections by target (primary or replica) and routing reason", ["target", "reason"]
+)
+DB_REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds", "Measured replication lag per read replica (+Inf when unreachable)", ["replica"],
+    multiprocess_mode="max"
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Pooled database connections by target and state (idle or in use)", ["target", "state"],
+    multiprocess_mode="livesum"
+)
+DB_STATEMENT_PREPARES = Counter(
+    "db_statement_prepares", "Server-side PREPAREs by statement (once per pooled connection when warm)", ["statement"]
+)
+SERIALIZATION_LATENCY = Histogram(
+    "response_serialization_duration_seconds",
+    "Time spent encoding response bodies",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+AUTH_LATENCY = Histogram(
+    "auth_duration_seconds",
+    "Authentication latency by credential type",
+    ["method"],
+    buckets=LATENCY_BUCKETS,
+)
+# Notification, compression, coalescing, rate-limit and health check metrics live in employee_common.metrics
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Observe the duration of the wrapped block on a histogram"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - start)
+
+
+class InstrumentedCursor(RealDictCursor):
+    """RealDictCursor that records statement execution time and a trace span"""
+
+    def execute(self, query, vars=None, operation=None):
+        if operation is None:
+            operation = query.lstrip().split(None, 1)[0].upper() if query else "UNKNOWN"
+        with (
+            timed(DB_QUERY_LATENCY, operation=operation),
+            span("db.query", **{"db.system": "postgresql", "db.statement": query}),
+        ):
+            return super().execute(query, vars)
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording per-route latency and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # Label by route template, not the raw path, to bound cardinality
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], route, str(status_code)).observe(
+                time.perf_counter() - start
+            )
+
+
+class CacheStatsCollector:
+    """Expose response cache counters at scrape time"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def collect(self):
+        stats = self.cache.stats()
+        for name in ("hits", "misses", "invalidations"):
+            counter = CounterMetricFamily(
+                f"response_cache_{name}", f"Response cache {name}", labels=["cache"]
+            )
+            counter.add_metric([stats["namespace"]], stats[name])
+            yield counter
+        ratio = GaugeMetricFamily("response_cache_hit_ratio", "Response cache hit ratio", labels=["cache"])
+        ratio.add_metric([stats["namespace"]], stats["hit_ratio"])
+        yield ratio
+
+
+_collectors = []
+
+
+def setup_metrics(cache):
+    collector = CacheStatsCollector(cache)
+    REGISTRY.register(collector)
+    _collectors.append(collector)
+
+
+def render_metrics():
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    # Aggregate across workers; the cache collector reports the scraped worker
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in _collectors:
+        registry.register(collector)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def shutdown_metrics():
+    """Drop this worker's live gauges from the multiprocess aggregate"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
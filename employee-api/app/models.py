@@ -0,0 +1,40 @@
+"""
+Pydantic models for the Employee Management API
+Shared by the routes (app.main) and the bulk import/export tool (app.bulk)
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, EmailStr, TypeAdapter
+
+class UserSignup(BaseModel):
+    username: str
+    email: EmailStr
+    password: str
+    full_name: str
+
+class UserLogin(BaseModel):
+    username: str
+    password: str
+
+class Employee(BaseModel):
+    employee_id: Optional[int] = None
+    first_name: str
+    last_name: str
+    email: EmailStr
+    department: str
+    position: str
+    salary: Optional[float] = None
+    hire_date: Optional[datetime] = None
+
+employee_list_adapter = TypeAdapter(List[Employee])
+
+class APIKeyRequest(BaseModel):
+    username: str
+
+class APIKeyResponse(BaseModel):
+    api_id: str
+    api_secret: str
+    created_at: datetime
+    expires_at: datetime
@@ -0,0 +1,23 @@
+"""
+Admission control for /auth/login
+Per-client (caller IP) and global token buckets plus a per-process
+concurrency cap; see employee_common.ratelimit
+"""
+import os
+
+from employee_common.ratelimit import AdmissionController
+
+LOGIN_RATE_PER_CLIENT = float(os.getenv("LOGIN_RATE_PER_CLIENT", "0.5"))
+LOGIN_BURST_PER_CLIENT = float(os.getenv("LOGIN_BURST_PER_CLIENT", "10"))
+LOGIN_RATE_GLOBAL = float(os.getenv("LOGIN_RATE_GLOBAL", "20"))
+LOGIN_BURST_GLOBAL = float(os.getenv("LOGIN_BURST_GLOBAL", "40"))
+LOGIN_MAX_CONCURRENT = int(os.getenv("LOGIN_MAX_CONCURRENT", "4"))
+
+login_admission = AdmissionController(
+    "login",
+    per_client_rate=LOGIN_RATE_PER_CLIENT,
+    per_client_burst=LOGIN_BURST_PER_CLIENT,
+    global_rate=LOGIN_RATE_GLOBAL,
+    global_burst=LOGIN_BURST_GLOBAL,
+    max_concurrent=LOGIN_MAX_CONCURRENT,
+)
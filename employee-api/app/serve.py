@@ -0,0 +1,24 @@
+"""
+Production server for the Employee Management API
+uvicorn with one worker per CPU of the container's cgroup quota and a
+graceful SIGTERM drain; see employee_common.serve
+
+Run:
+    python -m app.serve
+"""
+
+import os
+
+from employee_common.logging_config import setup_logging
+from employee_common.serve import run
+
+PORT = int(os.getenv("PORT", "8000"))
+
+
+def main():
+    setup_logging("employee-api")
+    run("app.main:app", PORT)
+
+
+if __name__ == "__main__":
+    main()
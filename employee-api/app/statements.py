@@ -0,0 +1,111 @@
+"""
+Server-side prepared statements for the hot queries
+A pooled connection PREPAREs a statement the first time it runs it and then
+EXECUTEs it by name, so PostgreSQL skips parsing and analysis and can reuse
+the plan. The statement text is sent only once per connection. Each
+connection keeps the names it has prepared in a small LRU (conn.statements).
+Statements that fall out of the LRU are DEALLOCATEd.
+With DB_PREPARED_STATEMENTS=false the same SQL runs as plain statements, for
+poolers in transaction mode that cannot keep session state
+"""
+
+import os
+import re
+from collections import OrderedDict
+from typing import Sequence
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+
+from app.metrics import DB_STATEMENT_PREPARES
+
+# Statement cache configuration
+DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "true").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "32"))
+
+# Hot statements by name; parameters are positional %s placeholders
+STATEMENTS = {
+    "api_key_lookup": "SELECT * FROM api_keys WHERE api_id = %s AND is_active = TRUE",
+    "employee_list": "SELECT * FROM employees ORDER BY employee_id",
+    "employee_changes": "SELECT * FROM employees WHERE updated_at > %s ORDER BY employee_id",
+    "employee_by_id": "SELECT * FROM employees WHERE employee_id = %s",
+    "employee_insert": """INSERT INTO employees (first_name, last_name, email, department, position, salary, hire_date)
+           VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING *""",
+}
+
+
+def _numbered(sql: str) -> str:
+    """Rewrite %s placeholders as $1, $2, ... for PREPARE"""
+    counter = iter(range(1, sql.count("%s") + 1))
+    return re.sub(r"%s", lambda _: f"${next(counter)}", sql)
+
+
+PREPARED = {
+    name: (f"PREPARE {name} AS {_numbered(sql)}", sql.count("%s"), sql.lstrip().split(None, 1)[0].upper())
+    for name, sql in STATEMENTS.items()
+}
+
+
+class StatementCache:
+    """Names of the statements prepared on one connection, least recently used first"""
+
+    def __init__(self, size: int = DB_STATEMENT_CACHE_SIZE):
+        self.size = size
+        self.names: "OrderedDict[str, None]" = OrderedDict()
+        # Set when the server's statements may no longer match the cache
+        self.reset_pending = False
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+def _prepare(cur, cache: StatementCache, name: str):
+    while len(cache) >= cache.size:
+        evicted, _ = cache.names.popitem(last=False)
+        cur.execute(f"DEALLOCATE {evicted}")
+    cur.execute(PREPARED[name][0])
+    cache.names[name] = None
+    DB_STATEMENT_PREPARES.labels(name).inc()
+
+
+def _execute_prepared(cur, cache: StatementCache, name: str, params: Sequence):
+    if name in cache:
+        cache.names.move_to_end(name)
+    else:
+        _prepare(cur, cache, name)
+    _, arity, operation = PREPARED[name]
+    if arity:
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * arity)})", params, operation=operation)
+    else:
+        cur.execute(f"EXECUTE {name}", operation=operation)
+
+
+def execute(cur, name: str, params: Sequence = ()):
+    """Run statement *name* on an InstrumentedCursor, prepared on its connection when enabled"""
+    conn = cur.connection
+    cache = getattr(conn, "statements", None)
+    if not DB_PREPARED_STATEMENTS or cache is None:
+        cur.execute(STATEMENTS[name], params or None, operation=PREPARED[name][2])
+        return
+
+    idle = conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    if cache.reset_pending and idle:
+        cur.execute("DEALLOCATE ALL")
+        cache.names.clear()
+        cache.reset_pending = False
+    try:
+        _execute_prepared(cur, cache, name, params)
+    except psycopg2.errors.FeatureNotSupported:
+        # "cached plan must not change result type": the table changed since PREPARE
+        if not idle:
+            # Rolling back would discard the caller's earlier work; start over once the pool has reset it
+            cache.reset_pending = True
+            raise
+        conn.rollback()
+        cur.execute("DEALLOCATE ALL")
+        cache.names.clear()
+        _execute_prepared(cur, cache, name, params)
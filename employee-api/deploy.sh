@@ -13,14 +13,17 @@ echo ""
 
 # Step 1: Build and push Docker image
 echo "📦 Building Docker image..."
+# The repository root is the build context (shared employee-common package)
+docker build -f employee-api/Dockerfile -t gcr.io/$PROJECT_ID/employee-api:latest .
 cd employee-api
-docker build -t gcr.io/$PROJECT_ID/employee-api:latest .
 
 echo "📤 Pushing to Google Container Registry..."
 docker push gcr.io/$PROJECT_ID/employee-api:latest
 
 # Step 2: Deploy to Kubernetes
 echo "☸️  Deploying to Kubernetes..."
+bash ../scripts/ensure_jwt_signing_keys.sh jhub
+kubectl apply -f k8s/redis.yaml
 kubectl apply -f k8s/deployment.yaml
 
 # Step 3: Wait for deployment
@@ -0,0 +1,17 @@
+"""Modules shared by the employee-api and employee-api-app services.
+
+* ``cache``: versioned response cache, shared across replicas through Redis
+* ``compression``: zstd/brotli/gzip response compression middleware
+* ``health``: background dependency checks cached for the readiness probe
+* ``keys``: ES256 signing keys, rotation and JWKS
+* ``lifecycle``: the draining flag and middleware for graceful shutdown
+* ``logging_config``: structured JSON logging through a background writer
+* ``notify``: debounced change notifications for the sync functions
+* ``ratelimit``: token buckets and admission control for expensive endpoints
+* ``serve``: uvicorn workers sized to the CPU quota, with a SIGTERM drain
+* ``singleflight``: coalescing of identical concurrent reads
+* ``tracing``: OpenTelemetry setup, request spans and the ``span()`` helper
+
+Both images install this package (``pip install ./employee-common``); each
+service keeps its own routes, database access and ``metrics.py``.
+"""
@@ -0,0 +1,317 @@
+"""Read-through response cache for employee reads.
+
+Encoded response bodies are kept in an in-process LRU and, optionally, in a
+shared backend so that replicas can reuse each other's work. Entries are keyed
+by namespace, table version and query; write paths bump the version instead of
+deleting keys, so stale entries simply age out of the LRU.
+"""
+import os
+import time
+import fcntl
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # memory | local | file | redis
+CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+# A replica may serve responses up to this old after another replica's write.
+# Ignored when CACHE_REQUIRE_SHARED is set: the version is then read on every lookup
+CACHE_VERSION_REFRESH_SECONDS = float(os.getenv("RESPONSE_CACHE_VERSION_REFRESH_SECONDS", "1"))
+CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", "/tmp/employee-api-cache")
+# Set when several replicas serve the same table: caching then stays off unless
+# the backend is shared across replicas (redis) and reachable, since a version
+# bump on one pod would not reach the others
+CACHE_REQUIRE_SHARED = os.getenv("RESPONSE_CACHE_REQUIRE_SHARED", "false").lower() == "true"
+
+
+class LRUCache:
+    """Bounded in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LocalSharedBackend:
+    """In-process stand-in for a shared backend (the Redis subset we use).
+
+    Useful for local development and tests where no Redis is available.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ex: Optional[float] = None):
+        with self._lock:
+            self._data[key] = (time.time() + ex if ex else None, value)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            _, value = self._data.get(key, (None, b"0"))
+            new_value = int(value) + 1
+            self._data[key] = (None, str(new_value).encode())
+            return new_value
+
+
+class FileVersionBackend:
+    """Table versions kept in files, shared by the worker processes of one pod.
+
+    Only counters are stored. Response bodies stay in each worker's LRU, so
+    ``set`` is a no-op.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key.replace("/", "_"))
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read() or None
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: bytes, ex: Optional[float] = None):
+        pass
+
+    def incr(self, key: str) -> int:
+        with open(self._path(key), "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            new_value = int(f.read() or b"0") + 1
+            f.seek(0)
+            f.truncate()
+            f.write(str(new_value).encode())
+            f.flush()
+            return new_value
+
+
+class RedisBackend:
+    """Shared backend backed by Redis (requires the optional ``redis`` package)."""
+
+    across_replicas = True
+
+    def __init__(self, url: str = CACHE_REDIS_URL):
+        import redis  # optional dependency
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.25)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ex: Optional[float] = None):
+        self._client.set(key, value, ex=int(ex) if ex else None)
+
+    def incr(self, key: str) -> int:
+        return int(self._client.incr(key))
+
+
+class ResponseCache:
+    """Versioned read-through cache for encoded API responses."""
+
+    def __init__(self, namespace: str, local: Optional[LRUCache] = None, shared=None,
+                 require_shared: bool = CACHE_REQUIRE_SHARED):
+        self.namespace = namespace
+        self.local = local or LRUCache()
+        self.shared = shared
+        self.require_shared = require_shared
+        # Replicas sharing a table read the version on every lookup (one GET),
+        # so a write on one pod is visible on all of them immediately
+        self.version_refresh = 0.0 if require_shared else CACHE_VERSION_REFRESH_SECONDS
+        self.enabled = CACHE_ENABLED
+        if require_shared and not self.across_replicas:
+            logger.warning(f"Response cache '{namespace}' disabled: RESPONSE_CACHE_REQUIRE_SHARED "
+                           f"is set but the '{CACHE_BACKEND}' backend is not shared across replicas")
+            self.enabled = False
+        # Set while the shared backend fails; an invalidation it missed is retried
+        self._shared_down = False
+        self._invalidation_pending = False
+        self._version = 0
+        self._version_checked_at = 0.0
+        # time.monotonic() when a version change was last seen here
+        self.changed_at = 0.0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def across_replicas(self) -> bool:
+        """Whether a version bump here reaches every replica."""
+        return getattr(self.shared, "across_replicas", False)
+
+    @property
+    def _bypass(self) -> bool:
+        return not self.enabled or (self.require_shared and self._shared_down)
+
+    def _shared_failed(self, what: str, e: Exception):
+        logger.warning(f"Shared cache {what} failed: {str(e)}")
+        self._shared_down = True
+
+    def _shared_recovered(self):
+        # Entries kept locally may predate writes the shared version missed
+        self._shared_down = False
+        self.local.clear()
+        if self._invalidation_pending:
+            self._invalidation_pending = False
+            self.invalidate()
+
+    @property
+    def _version_key(self) -> str:
+        return f"{self.namespace}:version"
+
+    @property
+    def version(self) -> int:
+        """Current table version, refreshed from the shared backend at most once per ``version_refresh``."""
+        if self.shared is not None:
+            now = time.monotonic()
+            if now - self._version_checked_at >= self.version_refresh:
+                self._version_checked_at = now
+                try:
+                    raw = self.shared.get(self._version_key)
+                    if raw is not None and int(raw) != self._version:
+                        self._version = int(raw)
+                        self.changed_at = now
+                except Exception as e:
+                    self._shared_failed("version refresh", e)
+                else:
+                    if self._shared_down:
+                        self._shared_recovered()
+        return self._version
+
+    def key(self, query: str) -> str:
+        """Build a cache key for *query* bound to the current table version."""
+        return f"{self.namespace}:v{self.version}:{query}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached body for *key*, or None on a miss."""
+        if self._bypass:
+            return None
+        value = self.local.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self.shared is not None:
+            try:
+                value = self.shared.get(key)
+            except Exception as e:
+                self._shared_failed("read", e)
+                value = None
+            if value is not None:
+                self.local.set(key, value)
+                self.hits += 1
+                self.shared_hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: bytes):
+        """Store an encoded body under *key* (as returned by :meth:`key`)."""
+        if self._bypass:
+            return
+        self.local.set(key, value)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value, ex=self.local.ttl)
+            except Exception as e:
+                self._shared_failed("write", e)
+
+    def invalidate(self):
+        """Bump the table version so every cached response becomes unreachable."""
+        self.invalidations += 1
+        self.changed_at = time.monotonic()
+        if self.shared is not None:
+            try:
+                self._version = self.shared.incr(self._version_key)
+                self._version_checked_at = time.monotonic()
+                return
+            except Exception as e:
+                self._shared_failed("invalidation", e)
+                self._invalidation_pending = True
+        self._version += 1
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the hit ratio."""
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "backend": CACHE_BACKEND,
+            "enabled": not self._bypass,
+            "across_replicas": self.across_replicas,
+            "version": self._version,
+            "entries": len(self.local),
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_shared_backend(backend: str = CACHE_BACKEND):
+    """Create the configured shared backend, or None for a purely local cache."""
+    if backend == "redis":
+        try:
+            return RedisBackend()
+        except ImportError:
+            logger.warning("redis package not installed; falling back to local cache only")
+            return None
+    if backend == "local":
+        return LocalSharedBackend()
+    if backend == "file":
+        return FileVersionBackend()
+    return None
+
+
+# Shared cache for employee responses
+employee_cache = ResponseCache("employees", shared=create_shared_backend())
@@ -0,0 +1,290 @@
+"""Response compression (zstd, brotli, gzip) as ASGI middleware.
+
+The encoding is negotiated from ``Accept-Encoding``: the client's q-values
+first, then the server's order (``COMPRESSION_ENCODINGS``). zstd and brotli
+are used when ``zstandard`` / ``brotli`` are installed. Responses are left
+alone when they:
+
+* already have a ``Content-Encoding`` (e.g. precompressed static assets);
+* are not a compressible type (JSON, NDJSON, text, JavaScript, XML);
+* are smaller than ``COMPRESSION_MIN_BYTES``.
+
+Streamed responses (e.g. NDJSON employee lists) are compressed chunk by chunk and
+flushed after every chunk, so the client keeps receiving rows as they are
+produced. Memory stays bounded by one chunk.
+
+Bodies and chunks of at least ``COMPRESSION_THREADPOOL_MIN_BYTES`` are
+compressed in the threadpool so a large list does not stall the event loop;
+smaller ones are cheaper to compress inline than to hand off.
+
+The level comes from a per-route profile (``COMPRESSION_ROUTE_PROFILES``,
+longest path prefix wins). ``fast`` is for large or latency-sensitive
+bodies, ``default`` balances CPU and size, ``small`` is for rarely changing
+responses.
+"""
+import os
+import zlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from employee_common.metrics import COMPRESSION_BYTES
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compression configuration
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_ENCODINGS = [e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if e.strip()]
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_THREADPOOL_MIN_BYTES = int(os.getenv("COMPRESSION_THREADPOOL_MIN_BYTES", "65536"))
+COMPRESSION_DEFAULT_PROFILE = os.getenv("COMPRESSION_DEFAULT_PROFILE", "default")
+# e.g. "/api/employees=fast,/api/changes=default"
+COMPRESSION_ROUTE_PROFILES = os.getenv("COMPRESSION_ROUTE_PROFILES", "/api/employees=fast,/metrics=fast")
+
+# Levels per profile and encoding
+PROFILES = {
+    "fast": {"zstd": 1, "br": 1, "gzip": 1},
+    "default": {"zstd": 3, "br": 4, "gzip": 6},
+    "small": {"zstd": 10, "br": 9, "gzip": 9},
+}
+COMPRESSIBLE_TYPES = (
+    b"application/json",
+    b"application/x-ndjson",
+    b"application/javascript",
+    b"application/xml",
+    b"text/",
+)
+AVAILABLE = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+
+
+def parse_route_profiles(spec: str) -> List[Tuple[str, str]]:
+    """Parse ``prefix=profile`` pairs, longest prefix first."""
+    routes = []
+    for item in spec.split(","):
+        prefix, _, profile = item.strip().partition("=")
+        if prefix and profile in PROFILES:
+            routes.append((prefix, profile))
+        elif item.strip():
+            logger.warning("Ignoring compression route profile %r", item)
+    return sorted(routes, key=lambda route: len(route[0]), reverse=True)
+
+
+def negotiate(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """Pick an encoding from *encodings* (server order) acceptable to the client, or None."""
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Encoder:
+    """Incremental compressor with a common interface across encodings."""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+        else:
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress *data* and flush, so everything so far can be decoded."""
+        if self.encoding == "gzip":
+            return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.flush()
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "gzip":
+            return self._obj.compress(data) + self._obj.flush(zlib.Z_FINISH)
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.finish()
+        return self._obj.compress(data) + self._obj.flush()
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    """One-shot compression of a complete body."""
+    if encoding == "gzip":
+        return zlib.compress(data, level, wbits=16 + zlib.MAX_WBITS)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing eligible responses with the negotiated encoding."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES, encodings: Optional[List[str]] = None,
+                 route_profiles: str = COMPRESSION_ROUTE_PROFILES, default_profile: str = COMPRESSION_DEFAULT_PROFILE,
+                 threadpool_size: int = COMPRESSION_THREADPOOL_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.threadpool_size = threadpool_size
+        self.encodings = [e for e in (encodings or COMPRESSION_ENCODINGS) if AVAILABLE.get(e)]
+        self.routes = parse_route_profiles(route_profiles)
+        self.default_profile = default_profile
+
+    def level(self, path: str, encoding: str) -> int:
+        for prefix, profile in self.routes:
+            if path.startswith(prefix):
+                return PROFILES[profile][encoding]
+        return PROFILES[self.default_profile][encoding]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate(accept_encoding, self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(send, encoding, self.level(scope["path"], encoding), self.minimum_size,
+                               self.threadpool_size)
+        await self.app(scope, receive, responder)
+
+
+class _Responder:
+    """Wraps ``send`` for one response and decides whether to compress it."""
+
+    def __init__(self, send, encoding: str, level: int, minimum_size: int,
+                 threadpool_size: int = COMPRESSION_THREADPOOL_MIN_BYTES):
+        self.send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.threadpool_size = threadpool_size
+        self.start: Optional[dict] = None
+        self.passthrough = False
+        self.buffer: List[bytes] = []
+        self.buffered = 0
+        self.encoder: Optional[_Encoder] = None
+
+    def _eligible(self, message: dict) -> bool:
+        status = message["status"]
+        if status < 200 or status in (204, 206, 304):
+            return False
+        content_type = b""
+        for name, value in message.get("headers", []):
+            name = name.lower()
+            if name == b"content-encoding":
+                return False  # precompressed
+            if name == b"content-type":
+                content_type = value.lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _compressed_start(self, content_length: Optional[int]) -> dict:
+        headers = []
+        vary = None
+        for name, value in self.start.get("headers", []):
+            lowered = name.lower()
+            if lowered == b"content-length":
+                continue
+            if lowered == b"vary":
+                vary = value
+                continue
+            if lowered == b"etag" and not value.startswith(b"W/"):
+                # The compressed bytes differ from what a strong ETag named
+                value = b"W/" + value
+            headers.append((name, value))
+        if vary is None:
+            vary = b"Accept-Encoding"
+        elif b"accept-encoding" not in vary.lower():
+            vary += b", Accept-Encoding"
+        headers.append((b"vary", vary))
+        headers.append((b"content-encoding", self.encoding.encode("ascii")))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("ascii")))
+        return {**self.start, "headers": headers}
+
+    async def _run(self, func, data: bytes, *args) -> bytes:
+        # Large inputs are compressed off the event loop
+        if len(data) >= self.threadpool_size:
+            return await run_in_threadpool(func, data, *args)
+        return func(data, *args)
+
+    async def _flush_uncompressed(self, more_body: bool):
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": b"".join(self.buffer), "more_body": more_body})
+        self.buffer = []
+        self.passthrough = True
+
+    async def __call__(self, message: dict):
+        kind = message["type"]
+        if kind == "http.response.start":
+            self.start = message
+            if not self._eligible(message):
+                self.passthrough = True
+                await self.send(message)
+            return
+        if kind != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is not None:
+            # Streaming: compress and flush every chunk as it arrives
+            data = await self._run(self.encoder.compress if more_body else self.encoder.finish, body)
+            COMPRESSION_BYTES.labels(self.encoding, "in").inc(len(body))
+            COMPRESSION_BYTES.labels(self.encoding, "out").inc(len(data))
+            if data or not more_body:
+                await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        self.buffer.append(body)
+        self.buffered += len(body)
+        if self.buffered < self.minimum_size:
+            if more_body:
+                return  # wait for more before deciding
+            await self._flush_uncompressed(more_body=False)
+            return
+
+        data = b"".join(self.buffer)
+        self.buffer = []
+        COMPRESSION_BYTES.labels(self.encoding, "in").inc(len(data))
+        if not more_body:
+            compressed = await self._run(compress, data, self.encoding, self.level)
+            COMPRESSION_BYTES.labels(self.encoding, "out").inc(len(compressed))
+            await self.send(self._compressed_start(len(compressed)))
+            await self.send({"type": "http.response.body", "body": compressed, "more_body": False})
+            return
+        self.encoder = _Encoder(self.encoding, self.level)
+        compressed = await self._run(self.encoder.compress, data)
+        COMPRESSION_BYTES.labels(self.encoding, "out").inc(len(compressed))
+        await self.send(self._compressed_start(None))
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": True})
@@ -0,0 +1,177 @@
+"""Dependency health checks behind the readiness probe.
+
+Checks run in a background task on their own schedule, and ``/readyz``
+only reads the last results. Probe traffic therefore never reaches the
+database or Secret Manager, however often kubelet polls. Each result records
+the check's status, its latency and how old it is. A pod becomes unready when
+a critical check fails, exceeds its latency budget, or has not reported
+recently.
+
+Each service registers its own database checks on :data:`health_monitor`
+and adds the signing key and KMS checks with :func:`register_key_checks`.
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from employee_common.keys import key_ring
+from employee_common.metrics import HEALTH_CHECK_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# Health check configuration
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "5"))
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "2"))
+HEALTH_CHECK_LATENCY_BUDGET_MS = float(os.getenv("HEALTH_CHECK_LATENCY_BUDGET_MS", "500"))
+HEALTH_KMS_KEY = os.getenv("HEALTH_KMS_KEY")  # projects/.../cryptoKeys/...; unset disables the check
+
+
+class HealthCheck:
+    """One dependency check and its most recent result."""
+
+    def __init__(self, name: str, func: Callable[[], Awaitable[None]], interval: float,
+                 timeout: float, latency_budget_ms: float, critical: bool):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.timeout = timeout
+        self.latency_budget_ms = latency_budget_ms
+        self.critical = critical
+        self.status = "pending"
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    def due(self, now: float) -> bool:
+        return self.checked_at is None or now - self.checked_at >= self.interval
+
+    def healthy(self, now: float) -> bool:
+        """Passing, within budget and fresh (not older than three intervals)."""
+        if self.status != "ok" or self.checked_at is None:
+            return False
+        return now - self.checked_at <= 3 * self.interval + self.timeout
+
+    def result(self, now: float) -> dict:
+        return {
+            "status": self.status,
+            "critical": self.critical,
+            "latency_ms": self.latency_ms,
+            "latency_budget_ms": self.latency_budget_ms,
+            "age_seconds": round(now - self.checked_at, 3) if self.checked_at is not None else None,
+            "error": self.error,
+        }
+
+
+class HealthMonitor:
+    """Runs registered checks in the background and caches their results."""
+
+    def __init__(self):
+        self.checks: Dict[str, HealthCheck] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[bool] = None
+
+    def register(self, name: str, func: Callable[[], Awaitable[None]], interval: float = HEALTH_CHECK_INTERVAL_SECONDS,
+                 timeout: float = HEALTH_CHECK_TIMEOUT_SECONDS,
+                 latency_budget_ms: float = HEALTH_CHECK_LATENCY_BUDGET_MS, critical: bool = True):
+        """Add a check; *func* is a coroutine function that raises on failure."""
+        self.checks[name] = HealthCheck(name, func, interval, timeout, latency_budget_ms, critical)
+
+    async def _run(self, check: HealthCheck):
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(check.func(), timeout=check.timeout)
+            error = None
+        except asyncio.TimeoutError:
+            error = f"timed out after {check.timeout}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        if error is not None:
+            check.status = "error"
+        elif latency_ms > check.latency_budget_ms:
+            check.status = "slow"
+        else:
+            check.status = "ok"
+        check.error = error
+        check.latency_ms = round(latency_ms, 2)
+        check.checked_at = time.monotonic()
+        HEALTH_CHECK_LATENCY.labels(check.name, check.status).observe(latency_ms / 1000)
+
+    async def run_due(self):
+        """Run every check whose interval has elapsed, concurrently."""
+        now = time.monotonic()
+        due = [check for check in self.checks.values() if check.due(now)]
+        if due:
+            await asyncio.gather(*(self._run(check) for check in due))
+        self._log_transition()
+
+    def _log_transition(self):
+        ready, _ = self.snapshot()
+        if ready != self._ready:
+            if ready:
+                logger.info("Dependencies healthy; pod is ready")
+            else:
+                failing = [c.name for c in self.checks.values() if c.critical and not c.healthy(time.monotonic())]
+                logger.warning(f"Pod not ready; failing checks: {', '.join(failing)}")
+            self._ready = ready
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_due()
+            except Exception as e:
+                logger.error(f"Health monitor iteration failed: {str(e)}")
+            await asyncio.sleep(1)
+
+    def start(self):
+        """Start the background loop on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self):
+        """Return ``(ready, checks)`` from the cached results."""
+        now = time.monotonic()
+        ready = all(check.healthy(now) for check in self.checks.values() if check.critical)
+        return ready, {name: check.result(now) for name, check in self.checks.items()}
+
+
+def register_key_checks(monitor: HealthMonitor, kms_interval: float):
+    """Register the signing key check, and the KMS check when ``HEALTH_KMS_KEY`` is set."""
+
+    async def check_signing_keys():
+        # Raises MissingSigningKeys when no key is mounted (reloads at most once a minute)
+        key_ring.signing_key()
+
+    monitor.register("signing_keys", check_signing_keys)
+
+    if HEALTH_KMS_KEY:
+        try:
+            from google.cloud import kms
+        except ImportError:
+            logger.warning("HEALTH_KMS_KEY set but google-cloud-kms is not installed; skipping KMS check")
+        else:
+            kms_client = kms.KeyManagementServiceClient()
+
+            async def check_kms():
+                await run_in_threadpool(
+                    kms_client.get_crypto_key, request={"name": HEALTH_KMS_KEY}, timeout=HEALTH_CHECK_TIMEOUT_SECONDS
+                )
+
+            monitor.register("kms", check_kms, interval=kms_interval)
+
+
+health_monitor = HealthMonitor()
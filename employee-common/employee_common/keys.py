@@ -0,0 +1,263 @@
+"""JWT signing keys, rotation and JWKS.
+
+Tokens are signed with ES256 using the key whose ``kid`` is active. Keys are
+PEM files named ``<kid>.pem`` in ``JWT_SIGNING_KEYS_DIR``, which is a mounted
+Kubernetes Secret shared by every replica. Any replica can therefore verify
+any token without a shared HMAC secret or a database lookup. Rotation works
+by adding a new key file. The newest ``kid`` (in lexical order) becomes the
+signing key unless ``JWT_ACTIVE_KID`` pins one, and older keys stay valid for
+verification until their files are removed.
+
+Without mounted keys no tokens are issued and the readiness check fails. For
+local development ``JWT_ALLOW_EPHEMERAL_KEYS=true`` signs with a key invented
+by the process instead; replicas then reject each other's tokens.
+
+Verifiers can also trust keys published by other services through
+``JWT_JWKS_URLS``. Remote JWKS documents are cached and re-fetched when an
+unknown ``kid`` shows up, at most once per ``JWT_JWKS_REFRESH_SECONDS``.
+
+Generate a key:
+    python -m employee_common.keys generate --kid 2025-11-01 --out ./keys
+"""
+import os
+import sys
+import json
+import time
+import base64
+import hashlib
+import logging
+import secrets
+import threading
+import urllib.request
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+logger = logging.getLogger(__name__)
+
+# Key configuration
+JWT_ALGORITHM = "ES256"
+JWT_SIGNING_KEYS_DIR = os.getenv("JWT_SIGNING_KEYS_DIR", "/app/keys")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID")
+JWT_JWKS_URLS = [u.strip() for u in os.getenv("JWT_JWKS_URLS", "").split(",") if u.strip()]
+JWT_KEYS_RELOAD_SECONDS = float(os.getenv("JWT_KEYS_RELOAD_SECONDS", "60"))
+JWT_JWKS_REFRESH_SECONDS = float(os.getenv("JWT_JWKS_REFRESH_SECONDS", "30"))
+JWT_CLAIMS_CACHE_SIZE = int(os.getenv("JWT_CLAIMS_CACHE_SIZE", "10000"))
+JWT_ALLOW_EPHEMERAL_KEYS = os.getenv("JWT_ALLOW_EPHEMERAL_KEYS", "false").lower() == "true"  # development only
+
+
+def _b64url_uint(value: int) -> str:
+    raw = value.to_bytes(32, "big")  # P-256 coordinates are always 32 bytes
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64url_decode_uint(value: str) -> int:
+    padded = value + "=" * (-len(value) % 4)
+    return int.from_bytes(base64.urlsafe_b64decode(padded), "big")
+
+
+class MissingSigningKeys(RuntimeError):
+    """No signing key is mounted and ephemeral keys are not allowed."""
+
+
+def has_key_files(keys_dir: str) -> bool:
+    """Whether *keys_dir* holds at least one ``<kid>.pem``."""
+    return os.path.isdir(keys_dir) and any(f.endswith(".pem") for f in os.listdir(keys_dir))
+
+
+def public_key_to_jwk(kid: str, public_key: ec.EllipticCurvePublicKey) -> dict:
+    """Serialize a P-256 public key as a JWK."""
+    numbers = public_key.public_numbers()
+    return {
+        "kty": "EC",
+        "crv": "P-256",
+        "kid": kid,
+        "use": "sig",
+        "alg": JWT_ALGORITHM,
+        "x": _b64url_uint(numbers.x),
+        "y": _b64url_uint(numbers.y),
+    }
+
+
+def jwk_to_public_key(jwk: dict) -> ec.EllipticCurvePublicKey:
+    """Parse a P-256 JWK into a public key object."""
+    if jwk.get("kty") != "EC" or jwk.get("crv") != "P-256":
+        raise ValueError(f"Unsupported JWK: kty={jwk.get('kty')} crv={jwk.get('crv')}")
+    numbers = ec.EllipticCurvePublicNumbers(
+        _b64url_decode_uint(jwk["x"]), _b64url_decode_uint(jwk["y"]), ec.SECP256R1()
+    )
+    return numbers.public_key()
+
+
+class KeyRing:
+    """Local signing keys plus trusted public keys from remote JWKS."""
+
+    def __init__(self, keys_dir: str = JWT_SIGNING_KEYS_DIR, active_kid: Optional[str] = JWT_ACTIVE_KID,
+                 jwks_urls=None):
+        self.keys_dir = keys_dir
+        self.active_kid = active_kid
+        self.jwks_urls = JWT_JWKS_URLS if jwks_urls is None else jwks_urls
+        self._private: Dict[str, ec.EllipticCurvePrivateKey] = {}
+        self._public: Dict[str, ec.EllipticCurvePublicKey] = {}
+        self._remote: Dict[str, ec.EllipticCurvePublicKey] = {}
+        self._loaded_at = float("-inf")
+        self._remote_fetched_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _load_local(self):
+        private, public = {}, {}
+        if os.path.isdir(self.keys_dir):
+            for filename in sorted(os.listdir(self.keys_dir)):
+                if not filename.endswith(".pem"):
+                    continue
+                kid = filename[:-len(".pem")]
+                with open(os.path.join(self.keys_dir, filename), "rb") as f:
+                    key = serialization.load_pem_private_key(f.read(), password=None)
+                if not isinstance(key, ec.EllipticCurvePrivateKey):
+                    logger.warning(f"Skipping non-EC signing key: {filename}")
+                    continue
+                private[kid] = key
+                public[kid] = key.public_key()
+
+        if not private and not self._private:
+            if not JWT_ALLOW_EPHEMERAL_KEYS:
+                logger.error(f"No signing keys in {self.keys_dir}; mount the jwt-signing-keys Secret "
+                             f"(JWT_ALLOW_EPHEMERAL_KEYS=true for local development)")
+                return
+            # Development fallback: a per-process key only verifies its own tokens
+            kid = f"ephemeral-{secrets.token_hex(4)}"
+            logger.warning(f"No signing keys in {self.keys_dir}; using ephemeral key {kid}")
+            key = ec.generate_private_key(ec.SECP256R1())
+            private[kid] = key
+            public[kid] = key.public_key()
+        elif not private:
+            return  # Keep the ephemeral key rather than dropping it on reload
+
+        if set(private) != set(self._private):
+            logger.info(f"Loaded signing keys: {', '.join(sorted(private))}")
+        self._private, self._public = private, public
+
+    def _maybe_reload(self, interval: float = JWT_KEYS_RELOAD_SECONDS):
+        now = time.monotonic()
+        if now - self._loaded_at >= interval:
+            with self._lock:
+                if now - self._loaded_at >= interval:
+                    self._load_local()
+                    self._loaded_at = now
+
+    def _fetch_remote(self):
+        now = time.monotonic()
+        if not self.jwks_urls or now - self._remote_fetched_at < JWT_JWKS_REFRESH_SECONDS:
+            return
+        self._remote_fetched_at = now
+        remote = {}
+        for url in self.jwks_urls:
+            try:
+                with urllib.request.urlopen(url, timeout=2) as resp:
+                    document = json.load(resp)
+                for jwk in document.get("keys", []):
+                    remote[jwk["kid"]] = jwk_to_public_key(jwk)
+            except Exception as e:
+                logger.warning(f"Failed to fetch JWKS from {url}: {str(e)}")
+        if remote:
+            self._remote = remote
+
+    def signing_key(self) -> Tuple[str, ec.EllipticCurvePrivateKey]:
+        """Return ``(kid, private_key)`` for the active signing key."""
+        self._maybe_reload()
+        if not self._private:
+            raise MissingSigningKeys(f"No signing keys in {self.keys_dir}")
+        kid = self.active_kid if self.active_kid in self._private else max(self._private)
+        return kid, self._private[kid]
+
+    def public_key(self, kid: str) -> Optional[ec.EllipticCurvePublicKey]:
+        """Look up a verification key, refreshing local and remote keys on a miss."""
+        self._maybe_reload()
+        key = self._public.get(kid) or self._remote.get(kid)
+        if key is None:
+            # Unknown kid: maybe a freshly rotated key. Bounded so that forged
+            # kids cannot turn every request into a reload.
+            self._maybe_reload(interval=1.0)
+            self._fetch_remote()
+            key = self._public.get(kid) or self._remote.get(kid)
+        return key
+
+    def jwks(self) -> dict:
+        """Public JWKS document for the local keys."""
+        self._maybe_reload()
+        return {"keys": [public_key_to_jwk(kid, key) for kid, key in sorted(self._public.items())]}
+
+
+class ClaimsCache:
+    """LRU of verified token claims, keyed by token digest and bounded by ``exp``."""
+
+    def __init__(self, max_entries: int = JWT_CLAIMS_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, claims = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return claims
+
+    def set(self, token: str, claims: dict):
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+        with self._lock:
+            self._data[self._key(token)] = (float(expires_at), claims)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+key_ring = KeyRing()
+claims_cache = ClaimsCache()
+
+
+def generate_key_file(kid: str, out_dir: str) -> str:
+    """Write a new P-256 private key as ``<out_dir>/<kid>.pem``."""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{kid}.pem")
+    key = ec.generate_private_key(ec.SECP256R1())
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    with open(path, "xb") as f:
+        f.write(pem)
+    os.chmod(path, 0o600)
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage JWT signing keys")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gen = sub.add_parser("generate", help="create a new signing key")
+    gen.add_argument("--kid", required=True, help="key id, e.g. 2025-11-01 (newest kid signs)")
+    gen.add_argument("--out", default=JWT_SIGNING_KEYS_DIR)
+    sub.add_parser("jwks", help="print the JWKS for the keys in JWT_SIGNING_KEYS_DIR")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        print(generate_key_file(args.kid, args.out))
+    else:
+        json.dump(KeyRing(jwks_urls=[]).jwks(), sys.stdout, indent=2)
+        print()
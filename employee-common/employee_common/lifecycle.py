@@ -0,0 +1,35 @@
+"""Process lifecycle state shared by the server and the application.
+
+``employee_common.serve`` flips :data:`draining` when the pod receives SIGTERM. From then
+on the readiness probe fails and responses carry ``Connection: close``.
+Load balancers stop routing new requests to the pod, while requests already
+in flight still finish normally.
+"""
+import threading
+
+draining = threading.Event()
+
+
+def begin_drain():
+    """Mark this worker as draining."""
+    draining.set()
+
+
+class DrainMiddleware:
+    """ASGI middleware that closes keep-alive connections while draining."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and draining.is_set():
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"connection"]
+                message = {**message, "headers": headers + [(b"connection", b"close")]}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
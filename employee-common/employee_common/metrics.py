@@ -0,0 +1,41 @@
+"""Prometheus metrics recorded by the shared modules.
+
+Defined once here so that both services register them under the same names;
+each service's own ``metrics.py`` holds the rest and serves ``/metrics``.
+"""
+from prometheus_client import Counter, Histogram
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CHANGE_NOTIFICATIONS = Counter(
+    "change_notifications",
+    "Debounced change notifications sent to downstream syncs",
+    ["outcome"],
+)
+COMPRESSION_BYTES = Counter(
+    "response_compression_bytes",
+    "Response bytes before (in) and after (out) compression",
+    ["encoding", "stage"],
+)
+HEALTH_CHECK_LATENCY = Histogram(
+    "health_check_duration_seconds",
+    "Background dependency check latency by check and outcome",
+    ["check", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections",
+    "Requests rejected by admission control",
+    ["limiter", "reason"],
+)
+SINGLEFLIGHT_REQUESTS = Counter(
+    "singleflight_requests",
+    "Coalescable reads by route and outcome (leader, coalesced, wait_timeout)",
+    ["route", "outcome"],
+)
+SINGLEFLIGHT_WAIT = Histogram(
+    "singleflight_wait_duration_seconds",
+    "Time coalesced requests waited for the leader's result",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
@@ -0,0 +1,192 @@
+"""Debounced change notifications for downstream syncs.
+
+Every employee mutation marks the data as changed. A background task waits
+until no further change has arrived for ``NOTIFY_DEBOUNCE_SECONDS``, or at
+most ``NOTIFY_MAX_DELAY_SECONDS`` after the first change of a burst. It then
+sends one notification for the whole burst. Nothing on the request path
+blocks on the network.
+
+Targets (either or both):
+
+* ``NOTIFY_TOPIC`` (``projects/<p>/topics/<t>``): published to Pub/Sub, whose
+  push subscriptions invoke the sync functions. ``PUBSUB_EMULATOR_HOST`` sends
+  to the emulator, or to ``benchmarks/fake_pubsub.py``, without credentials.
+  Otherwise the token comes from the metadata server (Workload Identity).
+* ``NOTIFY_URL``: the notification is POSTed as JSON. If ``NOTIFY_SECRET`` is
+  set, the body is signed in ``X-Signature-256: sha256=<hmac>``.
+
+A notification only says that something changed; receivers reread the API.
+"""
+import os
+import json
+import hmac
+import time
+import uuid
+import base64
+import asyncio
+import hashlib
+import logging
+import urllib.request
+from datetime import datetime
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from employee_common.metrics import CHANGE_NOTIFICATIONS
+
+logger = logging.getLogger(__name__)
+
+# Notification configuration
+NOTIFY_TOPIC = os.getenv("NOTIFY_TOPIC")  # projects/<project>/topics/<topic>
+NOTIFY_URL = os.getenv("NOTIFY_URL")
+NOTIFY_SECRET = os.getenv("NOTIFY_SECRET")
+NOTIFY_DEBOUNCE_SECONDS = float(os.getenv("NOTIFY_DEBOUNCE_SECONDS", "5"))
+NOTIFY_MAX_DELAY_SECONDS = float(os.getenv("NOTIFY_MAX_DELAY_SECONDS", "30"))
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+NOTIFY_TIMEOUT_SECONDS = float(os.getenv("NOTIFY_TIMEOUT_SECONDS", "5"))
+PUBSUB_EMULATOR_HOST = os.getenv("PUBSUB_EMULATOR_HOST")
+NOTIFY_SOURCE = os.getenv("NOTIFY_SOURCE", "employee-api")  # the service, as named in notifications
+
+METADATA_TOKEN_URL = (
+    "http://metadata.google.internal/computeMetadata/v1/instance/service-accounts/default/token"
+)
+
+
+def sign(body: bytes, secret: str) -> str:
+    """Return the ``X-Signature-256`` value for *body*."""
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+class ChangeNotifier:
+    """Coalesces mutations into one notification per burst."""
+
+    def __init__(self, source: str, topic: Optional[str] = NOTIFY_TOPIC, url: Optional[str] = NOTIFY_URL,
+                 debounce: float = NOTIFY_DEBOUNCE_SECONDS, max_delay: float = NOTIFY_MAX_DELAY_SECONDS):
+        self.source = source
+        self.topic = topic
+        self.url = url
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._changes = 0
+        self._first: Optional[float] = None
+        self._last = 0.0
+        self._first_at: Optional[datetime] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.topic or self.url)
+
+    def notify(self, changes: int = 1):
+        """Record *changes* committed mutations; never blocks."""
+        if self._task is None:
+            return
+        now = time.monotonic()
+        if self._first is None:
+            self._first = now
+            self._first_at = datetime.utcnow()
+        self._last = now
+        self._changes += changes
+        self._wake.set()
+
+    def _message(self) -> dict:
+        message = {
+            "type": "employees.changed",
+            "notification_id": uuid.uuid4().hex,
+            "source": self.source,
+            "changes": self._changes,
+            "first_change_at": self._first_at.isoformat() + "Z",
+            "sent_at": datetime.utcnow().isoformat() + "Z",
+        }
+        self._changes = 0
+        self._first = None
+        self._first_at = None
+        self._wake.clear()
+        return message
+
+    def _post(self, url: str, body: bytes, headers: dict):
+        request = urllib.request.Request(
+            url, data=body, method="POST", headers={"Content-Type": "application/json", **headers}
+        )
+        with urllib.request.urlopen(request, timeout=NOTIFY_TIMEOUT_SECONDS) as response:
+            response.read()
+
+    def _access_token(self) -> str:
+        if self._token is None or time.monotonic() >= self._token_expires:
+            request = urllib.request.Request(METADATA_TOKEN_URL, headers={"Metadata-Flavor": "Google"})
+            with urllib.request.urlopen(request, timeout=NOTIFY_TIMEOUT_SECONDS) as response:
+                token = json.loads(response.read())
+            self._token = token["access_token"]
+            self._token_expires = time.monotonic() + token.get("expires_in", 300) - 60
+        return self._token
+
+    def _publish(self, message: dict):
+        body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        if self.topic:
+            envelope = {"messages": [{
+                "data": base64.b64encode(body).decode("ascii"),
+                "attributes": {"type": message["type"], "source": self.source},
+            }]}
+            if PUBSUB_EMULATOR_HOST:
+                base, headers = f"http://{PUBSUB_EMULATOR_HOST}", {}
+            else:
+                base, headers = "https://pubsub.googleapis.com", {"Authorization": f"Bearer {self._access_token()}"}
+            self._post(f"{base}/v1/{self.topic}:publish", json.dumps(envelope).encode("utf-8"), headers)
+        if self.url:
+            headers = {"X-Signature-256": sign(body, NOTIFY_SECRET)} if NOTIFY_SECRET else {}
+            self._post(self.url, body, headers)
+
+    async def _send(self, message: dict):
+        for attempt in range(1, NOTIFY_MAX_ATTEMPTS + 1):
+            try:
+                await run_in_threadpool(self._publish, message)
+                CHANGE_NOTIFICATIONS.labels("sent").inc()
+                logger.info("Sent change notification for %d changes", message["changes"])
+                return
+            except Exception as e:
+                if attempt == NOTIFY_MAX_ATTEMPTS:
+                    # The next change, or the scheduled reconcile, catches up
+                    CHANGE_NOTIFICATIONS.labels("failed").inc()
+                    logger.error("Change notification failed after %d attempts: %s", attempt, e)
+                    return
+                await asyncio.sleep(min(30.0, 0.5 * 2 ** attempt))
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            # Wait for a quiet period, but never longer than max_delay overall
+            while True:
+                wait = min(self._last + self.debounce, self._first + self.max_delay) - time.monotonic()
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            await self._send(self._message())
+
+    def start(self):
+        """Start the notifier on the running event loop (no-op without a target)."""
+        if not self.enabled or self._task is not None:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0):
+        """Send any pending notification right away and stop."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._changes:
+            try:
+                await asyncio.wait_for(self._send(self._message()), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.error("Pending change notification not sent on shutdown")
+
+
+change_notifier = ChangeNotifier(NOTIFY_SOURCE)
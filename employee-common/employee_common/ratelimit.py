@@ -0,0 +1,193 @@
+"""Token-bucket rate limiting and admission control for expensive endpoints.
+
+An ``AdmissionController`` guards one endpoint with three checks:
+
+* a per-client token bucket, keyed by the caller's address (see
+  ``client_address``) so that a client cannot pick its own bucket,
+* a global token bucket shared by all clients,
+* a cap on concurrent requests per process.
+
+Rejected requests get ``429`` (rate) or ``503`` (concurrency) with a
+``Retry-After`` header. Buckets live in process memory by default. With
+``RATE_LIMIT_BACKEND=redis`` they are shared across replicas through an
+atomic Lua script. If Redis fails, the limiter falls back to the in-memory
+buckets. Each service creates its controllers with its own limits.
+"""
+import os
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Tuple
+
+from fastapi import HTTPException, Request, status
+
+from employee_common.metrics import RATE_LIMIT_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Rate limit configuration
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory | redis
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+# Proxies in front of the service that append to X-Forwarded-For (the ingress)
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "1"))
+
+
+class MemoryBucketStore:
+    """Token buckets held in process memory, least recently used first.
+
+    A bucket that has refilled to its burst carries no state, so every new key
+    first prunes refilled buckets from the least recently used end. A bucket
+    that is still draining is dropped only when ``max_keys`` is reached, and
+    then the least recently used one goes first.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> (tokens, updated, time the bucket is full again)
+        self._buckets: "OrderedDict[str, Tuple[float, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float):
+        while self._buckets:
+            key, (_, _, full_at) = next(iter(self._buckets.items()))
+            if full_at > now and len(self._buckets) < self.max_keys:
+                return
+            del self._buckets[key]
+
+    def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        """Take one token; return ``(allowed, seconds_until_next_token)``."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._prune(now)
+                tokens = burst
+            else:
+                tokens, updated, _ = bucket
+                tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            full_at = now + (burst - tokens) / rate if rate > 0 else math.inf
+            self._buckets[key] = (tokens, now, full_at)
+            self._buckets.move_to_end(key)
+        if allowed:
+            return True, 0.0
+        return False, (1 - tokens) / rate if rate > 0 else 60.0
+
+
+class RedisBucketStore:
+    """Token buckets shared across replicas (requires the optional ``redis`` package)."""
+
+    # KEYS[1] bucket key; ARGV: rate, burst, now (seconds)
+    SCRIPT = """
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local tokens = tonumber(bucket[1]) or burst
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL):
+        import redis  # optional dependency
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.1)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        allowed, tokens = self._script(keys=[f"ratelimit:{key}"], args=[rate, burst, time.time()])
+        if int(allowed):
+            return True, 0.0
+        return False, (1 - float(tokens)) / rate if rate > 0 else 60.0
+
+
+class AdmissionController:
+    """Per-client and global token buckets plus a concurrency cap."""
+
+    def __init__(self, name: str, per_client_rate: float, per_client_burst: float,
+                 global_rate: float, global_burst: float, max_concurrent: int, backend: str = RATE_LIMIT_BACKEND):
+        self.name = name
+        self.per_client = (per_client_rate, per_client_burst)
+        self.global_ = (global_rate, global_burst)
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.memory = MemoryBucketStore()
+        self.store = self.memory
+        if backend == "redis":
+            try:
+                self.store = RedisBucketStore()
+            except ImportError:
+                logger.warning("redis package not installed; using in-memory rate limits")
+
+    def _take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        try:
+            return self.store.take(key, rate, burst)
+        except Exception as e:
+            logger.warning(f"Rate limit backend failed, using local buckets: {str(e)}")
+            return self.memory.take(key, rate, burst)
+
+    def _reject(self, status_code: int, reason: str, retry_after: float):
+        RATE_LIMIT_REJECTIONS.labels(self.name, reason).inc()
+        raise HTTPException(
+            status_code=status_code,
+            detail="Too many requests, retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    def check(self, client_key: str):
+        """Consume one token from the client and global buckets or raise 429.
+
+        *client_key* must not be chosen by the caller (e.g. ``client_address``);
+        a key built from request fields lets a client rotate into fresh buckets.
+        """
+        allowed, retry_after = self._take(f"{self.name}:client:{client_key}", *self.per_client)
+        if not allowed:
+            self._reject(status.HTTP_429_TOO_MANY_REQUESTS, "client", retry_after)
+        allowed, retry_after = self._take(f"{self.name}:global", *self.global_)
+        if not allowed:
+            self._reject(status.HTTP_429_TOO_MANY_REQUESTS, "global", retry_after)
+
+    @asynccontextmanager
+    async def admit(self, client_key: str):
+        """Admit one request: rate checks first, then a concurrency slot (503 when full)."""
+        if not RATE_LIMIT_ENABLED:
+            yield
+            return
+        self.check(client_key)
+        if self.in_flight >= self.max_concurrent:
+            self._reject(status.HTTP_503_SERVICE_UNAVAILABLE, "concurrency", 1)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+
+def client_address(request: Request, trusted_proxies: int = RATE_LIMIT_TRUSTED_PROXIES) -> str:
+    """Caller IP as seen by the outermost trusted proxy.
+
+    Each proxy appends the address it received the request from to
+    ``X-Forwarded-For``, so only the right-most ``trusted_proxies`` hops are
+    ours; anything left of them is whatever the client chose to send. With
+    fewer hops than that (or no trusted proxies) the peer address is used.
+    """
+    peer = request.client.host if request.client else "unknown"
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded or trusted_proxies <= 0:
+        return peer
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    if len(hops) < trusted_proxies:
+        return peer
+    return hops[-trusted_proxies]
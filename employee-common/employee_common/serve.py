@@ -0,0 +1,169 @@
+"""Production server shared by the Employee APIs.
+
+Runs uvicorn with one worker per CPU granted to the container. The worker
+count comes from the cgroup CPU quota, not the node's core count, and
+``WEB_CONCURRENCY`` overrides it. uvloop and httptools are used when they
+are installed.
+
+Shutdown is graceful. On SIGTERM every worker starts draining at once: the
+readiness probe returns 503 and keep-alive connections are closed after
+their current response. The worker keeps serving for ``DRAIN_SECONDS`` so
+that endpoints and load balancers can stop routing to the pod. After that,
+uvicorn stops accepting connections and waits up to ``GRACEFUL_TIMEOUT``
+for in-flight requests.
+
+Each service's ``serve.py`` sets up logging and calls :func:`run` with its
+application path and port.
+"""
+import os
+import math
+import shutil
+import signal
+import logging
+import tempfile
+import threading
+import importlib.util
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from employee_common import lifecycle
+
+logger = logging.getLogger("uvicorn.error")
+
+# Server configuration
+WEB_CONCURRENCY = os.getenv("WEB_CONCURRENCY")  # overrides the cgroup-derived worker count
+KEEPALIVE_TIMEOUT = int(os.getenv("KEEPALIVE_TIMEOUT", "75"))  # above common 60s proxy idle timeouts
+DRAIN_SECONDS = float(os.getenv("DRAIN_SECONDS", "15"))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "20"))
+
+
+def cgroup_cpu_limit():
+    """CPUs granted by the cgroup quota (v2, then v1), or None when unlimited."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def worker_count() -> int:
+    """Workers to start: WEB_CONCURRENCY, else the CPU quota rounded up."""
+    if WEB_CONCURRENCY:
+        return max(1, int(WEB_CONCURRENCY))
+    cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def prepare_shared_state(shared_dir: str):
+    """Point per-process state at locations shared by all workers of the pod."""
+
+    # Prometheus: aggregate metrics across workers
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(shared_dir, "metrics")
+        os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+    # Response cache: share the table version so a write in one worker
+    # invalidates the others
+    if os.getenv("RESPONSE_CACHE_BACKEND", "memory") == "memory":
+        os.environ["RESPONSE_CACHE_BACKEND"] = "file"
+        os.environ.setdefault("RESPONSE_CACHE_DIR", os.path.join(shared_dir, "cache"))
+
+    # JWT (development only, see require_signing_keys): without mounted keys
+    # every worker would invent its own ephemeral key and reject tokens signed
+    # by its siblings
+    from employee_common.keys import JWT_SIGNING_KEYS_DIR, generate_key_file, has_key_files
+
+    if not has_key_files(JWT_SIGNING_KEYS_DIR):
+        keys_dir = os.path.join(shared_dir, "keys")
+        generate_key_file(f"ephemeral-{os.getpid()}", keys_dir)
+        os.environ["JWT_SIGNING_KEYS_DIR"] = keys_dir
+        logger.warning(f"No signing keys mounted; workers share an ephemeral key in {keys_dir}")
+
+
+def require_signing_keys():
+    """Refuse to start without mounted signing keys unless JWT_ALLOW_EPHEMERAL_KEYS is set.
+
+    Each replica would otherwise sign with a key of its own, and a token
+    issued by one pod would fail verification on the next.
+    """
+    from employee_common.keys import JWT_ALLOW_EPHEMERAL_KEYS, JWT_SIGNING_KEYS_DIR, has_key_files
+
+    if has_key_files(JWT_SIGNING_KEYS_DIR) or JWT_ALLOW_EPHEMERAL_KEYS:
+        return
+    logger.error(f"No signing keys in {JWT_SIGNING_KEYS_DIR}: mount the jwt-signing-keys Secret, "
+                 f"or set JWT_ALLOW_EPHEMERAL_KEYS=true for local development")
+    raise SystemExit(1)
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that fails readiness before stopping on SIGTERM."""
+
+    def handle_exit(self, sig, frame):
+        if sig != signal.SIGTERM or lifecycle.draining.is_set() or DRAIN_SECONDS <= 0:
+            return super().handle_exit(sig, frame)
+        logger.info(f"SIGTERM received; draining for {DRAIN_SECONDS}s before shutdown")
+        lifecycle.begin_drain()
+        timer = threading.Timer(DRAIN_SECONDS, super().handle_exit, (sig, frame))
+        timer.daemon = True
+        timer.start()
+
+
+class DrainingMultiprocess(Multiprocess):
+    """Supervisor that signals every worker before waiting on any of them."""
+
+    def shutdown(self):
+        # The stock supervisor terminates and joins workers one by one, which
+        # would serialize the drain windows
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        logger.info(f"Stopping parent process [{self.pid}]")
+
+
+def run(app: str, port: int):
+    """Serve the ASGI application at import path *app* (e.g. ``"main:app"``) on *port*."""
+    require_signing_keys()
+    workers = worker_count()
+    config = uvicorn.Config(
+        app,
+        host="0.0.0.0",
+        port=port,
+        workers=workers,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        timeout_keep_alive=KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        log_level=os.getenv("LOG_LEVEL", "info").lower(),
+        log_config=None,  # uvicorn loggers propagate to the JSON handler
+    )
+    server = DrainingServer(config)
+    logger.info(f"Serving with {workers} worker(s), loop={config.loop}, http={config.http}")
+
+    if workers == 1:
+        server.run()
+        return
+    shared_dir = tempfile.mkdtemp(prefix="employee-api-")
+    try:
+        prepare_shared_state(shared_dir)
+        sock = config.bind_socket()
+        DrainingMultiprocess(config, target=server.run, sockets=[sock]).run()
+    finally:
+        shutil.rmtree(shared_dir, ignore_errors=True)
@@ -0,0 +1,98 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+When a scheduled sync, a few notebooks and the frontend all ask for
+``/api/employees`` at the same moment, the first request (the leader) runs
+the query and encodes the body. The others wait for that body instead of
+running the same query and serialization themselves. Requests are identical
+when their method, path, query string and auth scope match. The scope stops a
+caller from receiving a result computed for a different view of the data.
+The key also carries the response-cache key, whose version moves with every
+write, so a request made after a write never joins a computation that
+started before it.
+
+A waiting request gives up after ``SINGLEFLIGHT_MAX_WAIT_SECONDS`` and
+computes its own result, so a stuck leader cannot hold up everyone behind it.
+The shared computation runs as its own task. A leader whose client
+disconnects therefore does not cancel the work the others are waiting for.
+Only calls in flight are shared; keeping results afterwards is the response
+cache's job. Coalescing is per worker process.
+"""
+import os
+import time
+import asyncio
+from functools import partial
+from typing import Awaitable, Callable, Dict, TypeVar
+from urllib.parse import urlencode
+
+from fastapi import Request
+
+from employee_common.metrics import SINGLEFLIGHT_REQUESTS, SINGLEFLIGHT_WAIT
+
+# Coalescing configuration
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+SINGLEFLIGHT_MAX_WAIT_SECONDS = float(os.getenv("SINGLEFLIGHT_MAX_WAIT_SECONDS", "5"))
+
+T = TypeVar("T")
+
+
+def request_key(request: Request, scope: str, version: str = "") -> str:
+    """Coalescing key: method, path, sorted query parameters, *scope* and data *version*."""
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return f"{request.method} {request.url.path}?{query}#{scope}@{version}"
+
+
+class SingleFlight:
+    """The computations in flight in this process, by key."""
+
+    def __init__(self, max_wait: float = SINGLEFLIGHT_MAX_WAIT_SECONDS, enabled: bool = SINGLEFLIGHT_ENABLED):
+        self.max_wait = max_wait
+        self.enabled = enabled
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    async def do(self, route: str, key: str, compute: Callable[[], Awaitable[T]]) -> T:
+        """Return the result of ``compute()``, shared with identical calls in flight.
+
+        *route* is the metrics label (the route template, not the URL).
+        Exceptions raised by the shared computation reach every caller.
+        """
+        if not self.enabled:
+            return await compute()
+
+        call = self._calls.get(key)
+        if call is not None:
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(asyncio.shield(call), self.max_wait)
+            except asyncio.TimeoutError:
+                if call.done():
+                    # The leader's own computation timed out
+                    SINGLEFLIGHT_REQUESTS.labels(route, "coalesced").inc()
+                    raise
+                SINGLEFLIGHT_REQUESTS.labels(route, "wait_timeout").inc()
+                return await compute()
+            except Exception:
+                SINGLEFLIGHT_REQUESTS.labels(route, "coalesced").inc()
+                raise
+            finally:
+                SINGLEFLIGHT_WAIT.labels(route).observe(time.perf_counter() - start)
+            SINGLEFLIGHT_REQUESTS.labels(route, "coalesced").inc()
+            return result
+
+        task = asyncio.ensure_future(compute())
+        self._calls[key] = task
+        task.add_done_callback(partial(self._finished, key))
+        SINGLEFLIGHT_REQUESTS.labels(route, "leader").inc()
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved; the callers awaiting the task re-raise it
+            task.exception()
+
+    def __len__(self):
+        return len(self._calls)
+
+
+read_coalescer = SingleFlight()
@@ -0,0 +1,104 @@
+"""OpenTelemetry tracing for the Employee APIs.
+
+Tracing is optional: without the OpenTelemetry packages, or with
+``TRACING_EXPORTER=none``, every helper here is a cheap no-op. Incoming W3C
+``traceparent`` headers are honoured so spans from callers (sync functions,
+notebook clients) and from the service end up in the same trace. Each
+service calls :func:`setup_tracing` with its own name.
+"""
+import os
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # pragma: no cover - tracing is optional
+    trace = None
+
+# Tracing configuration
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")  # none | console | file | otlp
+TRACING_FILE = os.getenv("TRACING_FILE", "/tmp/traces.jsonl")
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "0.05"))
+
+tracer = trace.get_tracer(__name__) if trace is not None else None
+
+
+def setup_tracing(service_name: str):
+    """Install a tracer provider with the configured exporter and sampler."""
+    if trace is None or TRACING_EXPORTER == "none":
+        return
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    if TRACING_EXPORTER == "file":
+        # One JSON document per line; works fully offline
+        exporter = ConsoleSpanExporter(
+            out=open(TRACING_FILE, "a", buffering=1),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    elif TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        exporter = OTLPSpanExporter()
+    else:
+        exporter = ConsoleSpanExporter()
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Tracing enabled: exporter={TRACING_EXPORTER}, sample_ratio={TRACING_SAMPLE_RATIO}")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Run the wrapped block inside a child span of the current trace."""
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens a server span per request.
+
+    The span continues any trace propagated by the caller and is named after
+    the matched route template once routing has happened.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if tracer is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        context = propagate.extract(carrier)
+        with tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}", context=context, kind=SpanKind.SERVER
+        ) as server_span:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    server_span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        server_span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            server_span.set_attribute("http.method", scope["method"])
+            await self.app(scope, receive, send_wrapper)
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                server_span.set_attribute("http.route", route)
+                server_span.update_name(f"{scope['method']} {route}")
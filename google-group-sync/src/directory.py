@@ -0,0 +1,220 @@
+"""Admin SDK Directory API client for group membership.
+
+Membership changes are sent as HTTP batch requests (``multipart/mixed``),
+many insert/delete calls per round trip. Each call in a batch gets its own
+status back, which ``send`` reports as a per-call result.
+
+Tokens come from keyless domain-wide delegation. The function's service
+account signs a JWT for ``DELEGATED_ADMIN_EMAIL`` through the IAM
+Credentials API and exchanges it for an access token. Set
+``DIRECTORY_API_URL`` and ``DIRECTORY_API_TOKEN`` to point the client at the
+local fake server in ``benchmarks/fake_directory_api.py``.
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+
+from sync_common.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Directory API configuration
+DIRECTORY_API_URL = os.getenv("DIRECTORY_API_URL", "https://admin.googleapis.com").rstrip("/")
+DIRECTORY_API_TOKEN = os.getenv("DIRECTORY_API_TOKEN")  # fixed token for local/fake servers
+DELEGATED_ADMIN_EMAIL = os.getenv("DELEGATED_ADMIN_EMAIL")
+SERVICE_ACCOUNT_EMAIL = os.getenv("SERVICE_ACCOUNT_EMAIL")
+DIRECTORY_SCOPE = "https://www.googleapis.com/auth/admin.directory.group.member"
+
+# Per-call statuses that mean the change is already in place
+_ALREADY_APPLIED = {"insert": {409}, "delete": {404}}
+# Quota errors; the Directory API reports them as 429 or as 403 with these reasons
+_RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded"}
+
+
+class CallResult(NamedTuple):
+    """Outcome of one membership call."""
+    status: int
+    reason: Optional[str] = None
+    retry_after: Optional[float] = None
+
+    @property
+    def throttled(self) -> bool:
+        return self.status == 429 or (self.status == 403 and self.reason in _RATE_LIMIT_REASONS)
+
+    @property
+    def retryable(self) -> bool:
+        return self.throttled or self.status >= 500 or self.status == 0
+
+
+def get_delegated_token(session: requests.Session) -> str:
+    """Access token for the Directory API, impersonating DELEGATED_ADMIN_EMAIL."""
+    if DIRECTORY_API_TOKEN:
+        return DIRECTORY_API_TOKEN
+
+    import google.auth
+    from google.auth.transport.requests import Request
+
+    creds, _ = google.auth.default(scopes=["https://www.googleapis.com/auth/cloud-platform"])
+    creds.refresh(Request())
+    sa_email = SERVICE_ACCOUNT_EMAIL or creds.service_account_email
+    now = int(time.time())
+    claims = {
+        "iss": sa_email,
+        "sub": DELEGATED_ADMIN_EMAIL,
+        "scope": DIRECTORY_SCOPE,
+        "aud": "https://oauth2.googleapis.com/token",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    with span("iamcredentials.sign_jwt"):
+        resp = session.post(
+            f"https://iamcredentials.googleapis.com/v1/projects/-/serviceAccounts/{sa_email}:signJwt",
+            headers={"Authorization": f"Bearer {creds.token}"},
+            json={"payload": json.dumps(claims)},
+            timeout=10,
+        )
+        resp.raise_for_status()
+    resp = session.post(
+        "https://oauth2.googleapis.com/token",
+        data={"grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer", "assertion": resp.json()["signedJwt"]},
+        timeout=10,
+    )
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+def _retry_after(headers) -> Optional[float]:
+    value = headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _error_reason(body: bytes) -> Optional[str]:
+    try:
+        errors = json.loads(body)["error"].get("errors") or [{}]
+        return errors[0].get("reason")
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+class DirectoryClient:
+    """Lists and changes the members of one group."""
+
+    def __init__(self, group: str, token: str, base_url: str = DIRECTORY_API_URL, timeout: float = 30):
+        self.group = group
+        self.token = token
+        self.base_url = base_url
+        self.timeout = timeout
+        self._members_path = f"/admin/directory/v1/groups/{quote(group, safe='')}/members"
+        # requests.Session is not safe to share between writer threads
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers["Authorization"] = f"Bearer {self.token}"
+        return session
+
+    def iter_members(self) -> Iterator[Tuple[str, str]]:
+        """Yield ``(email, role)`` for every USER member of the group, page by page."""
+        params = {"maxResults": 200}
+        while True:
+            with span("directory.list_members", group=self.group):
+                resp = self.session.get(f"{self.base_url}{self._members_path}", params=params, timeout=self.timeout)
+                resp.raise_for_status()
+                page = resp.json()
+            for member in page.get("members", []):
+                if member.get("type", "USER") == "USER" and member.get("email"):
+                    yield member["email"], member.get("role", "MEMBER")
+            token = page.get("nextPageToken")
+            if not token:
+                return
+            params["pageToken"] = token
+
+    def _request_line(self, op: str, email: str) -> Tuple[str, str, Optional[dict]]:
+        if op == "insert":
+            return "POST", self._members_path, {"email": email, "role": "MEMBER"}
+        return "DELETE", f"{self._members_path}/{quote(email, safe='')}", None
+
+    def send(self, ops: List[Tuple[str, str]]) -> List[CallResult]:
+        """Apply ``(op, email)`` changes (op is insert/delete); one result per change, in order."""
+        if len(ops) == 1:
+            return [self._send_one(*ops[0])]
+        return self._send_batch(ops)
+
+    def _result(self, op: str, status: int, body: bytes, headers) -> CallResult:
+        if status in _ALREADY_APPLIED[op]:
+            return CallResult(200)
+        reason = _error_reason(body) if status >= 400 else None
+        return CallResult(status, reason, _retry_after(headers))
+
+    def _send_one(self, op: str, email: str) -> CallResult:
+        method, path, body = self._request_line(op, email)
+        try:
+            resp = self.session.request(method, f"{self.base_url}{path}", json=body, timeout=self.timeout)
+        except requests.RequestException as e:
+            return CallResult(0, type(e).__name__)
+        return self._result(op, resp.status_code, resp.content, resp.headers)
+
+    def _send_batch(self, ops: List[Tuple[str, str]]) -> List[CallResult]:
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for i, (op, email) in enumerate(ops):
+            method, path, body = self._request_line(op, email)
+            inner = f"{method} {path} HTTP/1.1\r\n"
+            if body is not None:
+                inner += f"Content-Type: application/json\r\n\r\n{json.dumps(body)}"
+            else:
+                inner += "\r\n"
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <item{i}>\r\n\r\n{inner}\r\n"
+            )
+        payload = ("".join(parts) + f"--{boundary}--\r\n").encode("utf-8")
+
+        try:
+            with span("directory.batch", group=self.group, calls=len(ops)):
+                resp = self.session.post(
+                    f"{self.base_url}/batch/admin/directory_v1",
+                    data=payload,
+                    headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+                    timeout=self.timeout,
+                )
+        except requests.RequestException as e:
+            return [CallResult(0, type(e).__name__)] * len(ops)
+        if resp.status_code != 200:
+            # The whole batch was rejected (quota, outage); every call shares the outcome
+            result = CallResult(resp.status_code, _error_reason(resp.content), _retry_after(resp.headers))
+            return [result] * len(ops)
+        return self._parse_batch(ops, resp)
+
+    def _parse_batch(self, ops: List[Tuple[str, str]], resp: requests.Response) -> List[CallResult]:
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {resp.headers['Content-Type']}\r\n\r\n".encode("ascii") + resp.content
+        )
+        # Calls missing from the response are retried
+        results = [CallResult(0, "missing")] * len(ops)
+        for part in message.iter_parts():
+            content_id = part.get("Content-ID", "")
+            index = content_id.strip("<>").rsplit("item", 1)[-1]
+            if not index.isdigit() or int(index) >= len(ops):
+                continue
+            raw = part.get_payload(decode=True) or part.get_payload().encode("utf-8")
+            head, _, body = raw.partition(b"\r\n\r\n")
+            status_line, *header_lines = head.decode("iso-8859-1").split("\r\n")
+            headers = dict(line.split(": ", 1) for line in header_lines if ": " in line)
+            status = int(status_line.split(" ", 2)[1])
+            results[int(index)] = self._result(ops[int(index)][0], status, body, headers)
+        return results
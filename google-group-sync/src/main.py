@@ -1,14 +1,33 @@
 import os
 import json
+import time
+import logging
 import requests
 import google.auth
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from google.cloud import secretmanager
 
+from sync_common.checkpoint import open_checkpoint, open_lease
+from sync_common.coordinator import RunCoordinator
+from sync_common.logging_config import flush_logs, setup_logging
+from sync_common.members import RunStats, SortedMembers, iter_employee_emails, merge_diff
+from sync_common.tracing import inject_headers, setup_tracing, span
+from sync_common.trigger import InvalidSignature, has_pending, mark_pending, parse_trigger, take_pending, trigger_continuation
+
+from directory import DirectoryClient, get_delegated_token
+from writer import MembershipWriter
+
+logger = logging.getLogger(__name__)
+
 # Configuration (environment variables)
 API_ENDPOINT   = os.getenv("EMPLOYEE_API_URL")
 TARGET_ROLES   = os.getenv("TARGET_ROLES", "roles/viewer")  # comma‑separated list of IAM roles
 PROJECT_ID     = os.getenv("PROJECT_ID")
+GROUP_EMAIL    = os.getenv("GOOGLE_GROUP_EMAIL")
+SYNC_DEADLINE_SECONDS = float(os.getenv("SYNC_DEADLINE_SECONDS", "50"))  # keep below the function timeout
+LEASE_TTL_SECONDS = float(os.getenv("LEASE_TTL_SECONDS", "120"))  # keep above the function timeout
+IAM_CONFLICT_RETRIES = int(os.getenv("IAM_CONFLICT_RETRIES", "3"))
 
 # Secret Manager client
 secret_client = secretmanager.SecretManagerServiceClient()
@@ -17,7 +36,8 @@ secret_client = secretmanager.SecretManagerServiceClient()
 def get_secret(secret_id: str, version: str = "latest") -> str:
     """Retrieve a secret from Google Cloud Secret Manager."""
     name = f"projects/{PROJECT_ID}/secrets/{secret_id}/versions/{version}"
-    response = secret_client.access_secret_version(request={"name": name})
+    with span("secretmanager.access_secret_version", secret_id=secret_id):
+        response = secret_client.access_secret_version(request={"name": name})
     return response.payload.data.decode("UTF-8")
 
 
@@ -29,49 +49,51 @@ def get_oauth_token() -> str:
         
         # Request token from Employee API
         token_url = f"{API_ENDPOINT}/api/token"
-        response = requests.post(
-            token_url,
-            json={"client_id": client_id, "client_secret": client_secret},
-            timeout=10
-        )
+        with span("employee_api.token"):
+            response = requests.post(
+                token_url,
+                json={"client_id": client_id, "client_secret": client_secret},
+                headers=inject_headers({}),
+                timeout=10
+            )
         response.raise_for_status()
         token_data = response.json()
         return token_data["access_token"]
     except Exception as e:
-        print(f"Error getting OAuth token: {str(e)}")
+        logger.error("Error getting OAuth token: %s", e)
         raise
 
 
-def fetch_employees_from_api():
-    """Fetch employee list from the Employee API and return a set of IAM‑compatible members.
-    Example return: {"user:alice@example.com", "user:bob@example.com"}
+def fetch_employees_from_api() -> SortedMembers:
+    """Stream the employee list from the Employee API into sorted IAM‑compatible members.
+    Example members: "user:alice@example.com", "user:bob@example.com"
     """
     # Get OAuth2 token
     token = get_oauth_token()
     
-    # Make authenticated request
+    # Make authenticated request; NDJSON is streamed, JSON pages follow Link: rel="next"
     headers = {"Authorization": f"Bearer {token}"}
-    resp = requests.get(f"{API_ENDPOINT}/api/employees", headers=headers, timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
-    # Filter out any placeholder/example addresses – only real Google accounts are allowed
-    emails = {
-        f"user:{emp['email'].lower()}"
-        for emp in data.get("employees", [])
-        if not emp['email'].lower().endswith("@example.com")
-    }
-    print(f"Fetched {len(emails)} valid employee members: {emails}")
-    return emails
+    with span("employee_api.list_employees"), requests.Session() as session:
+        emails = iter_employee_emails(session, f"{API_ENDPOINT}/api/employees", inject_headers(headers))
+        # Normalized once; example.com and other EXCLUDED_EMAIL_DOMAINS are dropped
+        members = SortedMembers.from_emails(emails)
+    logger.info(
+        "Fetched %d valid employee members (%d bytes)", len(members), members.nbytes,
+        extra={"member_count": len(members)},
+    )
+    return members
 
 def get_iam_policy(svc, project_id):
     """Retrieve the current IAM policy for the given project."""
-    return svc.projects().getIamPolicy(resource=project_id, body={}).execute()
+    with span("iam.get_policy", project_id=project_id):
+        return svc.projects().getIamPolicy(resource=project_id, body={}).execute()
 
 def set_iam_policy(svc, project_id, policy):
     """Write the updated IAM policy back to the project."""
-    return svc.projects().setIamPolicy(resource=project_id, body={"policy": policy}).execute()
+    with span("iam.set_policy", project_id=project_id):
+        return svc.projects().setIamPolicy(resource=project_id, body={"policy": policy}).execute()
 
-def sync_role(svc, project_id, role, desired_members):
+def sync_role(svc, project_id, role, desired_members: SortedMembers):
     """Synchronize a single IAM role to match *desired_members*.
     Returns a dict with the members that were added and removed for this role.
     """
@@ -84,42 +106,253 @@ def sync_role(svc, project_id, role, desired_members):
         target_binding = {"role": role, "members": []}
         bindings.append(target_binding)
 
-    # Current members that are user:… (ignore service accounts, groups, etc.)
-    current_members = {m.lower() for m in target_binding.get("members", []) if m.lower().startswith("user:")}
-    to_add    = desired_members - current_members
-    to_remove = current_members - desired_members
+    # Lowercase every member once; only user:… members are managed (ignore
+    # service accounts, groups, etc.)
+    members = target_binding.get("members", [])
+    lowered = [m.lower() for m in members]
+    current_members = sorted({m for m in lowered if m.startswith("user:")})
 
-    print(f"Role {role}: adding {len(to_add)} members, removing {len(to_remove)} members")
+    to_add, to_remove = [], set()
+    for op, member in merge_diff(desired_members, current_members):
+        if op == "add":
+            to_add.append(member)
+        else:
+            to_remove.add(member)
+
+    logger.info(
+        "Role %s: adding %d members, removing %d members", role, len(to_add), len(to_remove),
+        extra={"role": role, "added": len(to_add), "removed": len(to_remove)},
+    )
+    logger.debug("Role %s changes: add=%s remove=%s", role, to_add, sorted(to_remove))
 
     # Build the new member list while preserving non‑user members (service accounts, groups)
-    new_members = [m for m in target_binding["members"] if not (m.lower().startswith("user:") and m.lower() in to_remove)]
+    new_members = [m for m, low in zip(members, lowered) if low not in to_remove]
     new_members.extend(to_add)
     target_binding["members"] = new_members
     policy["bindings"] = bindings
 
-    # Apply the updated policy (atomic operation)
+    # Apply the updated policy (atomic operation; the policy's etag makes it
+    # fail with 409 if someone else changed the policy since we read it)
     set_iam_policy(svc, project_id, policy)
-    return {"added": list(to_add), "removed": list(to_remove)}
+    return {"added": to_add, "removed": sorted(to_remove)}
+
+def sync_role_with_retry(svc, project_id, role, desired_members: SortedMembers):
+    """Run :func:`sync_role`, rereading the policy when a concurrent change wins the etag race."""
+    for attempt in range(1, IAM_CONFLICT_RETRIES + 1):
+        try:
+            return sync_role(svc, project_id, role, desired_members)
+        except HttpError as e:
+            if e.resp.status != 409 or attempt == IAM_CONFLICT_RETRIES:
+                raise
+            logger.warning("IAM policy of %s changed during sync of %s; retrying (%d)", project_id, role, attempt)
+            time.sleep(attempt)
 
 def sync_iam(request):
-    """Entry point for the Cloud Function (invoked by Cloud Scheduler)."""
-    print(f"--- Starting IAM sync for project {PROJECT_ID} ---")
+    """Entry point for the Cloud Function (change notifications, continuations, Cloud Scheduler)."""
+    setup_logging("google-group-sync")
+    setup_tracing("google-group-sync")
+    try:
+        trigger = parse_trigger(request)
+    except (InvalidSignature, ValueError):
+        logger.warning("Rejected change notification with an invalid signature or body")
+        flush_logs()
+        return json.dumps({"error": "invalid notification"}), 401
+    try:
+        with span("sync_iam", project_id=PROJECT_ID or "", trigger=trigger["kind"]), RunStats("IAM sync"):
+            return _sync_iam(trigger)
+    except Exception:
+        logger.exception("IAM sync failed")
+        raise
+    finally:
+        flush_logs()
+
+
+def _sync_iam(trigger: dict):
+    deadline = time.monotonic() + SYNC_DEADLINE_SECONDS
+    logger.info("Starting IAM sync for project %s (%s)", PROJECT_ID, trigger["kind"], extra={"trigger": trigger})
     if not all([API_ENDPOINT, PROJECT_ID]):
+        logger.error("Missing required environment variables EMPLOYEE_API_URL / PROJECT_ID")
         return {"error": "Missing required environment variables"}, 500
 
+    # Only one run at a time works on a project. An overlapping change
+    # notification leaves a marker instead, so the current run goes again
+    name = f"iam-sync-{PROJECT_ID}"
+    lease = open_lease(name, LEASE_TTL_SECONDS)
+    if not lease.acquire():
+        if trigger["kind"] != "change":
+            logger.info("Another IAM sync run holds the lease for %s; skipping", PROJECT_ID)
+            return json.dumps({"skipped": "another run is in progress"}), 200
+        mark_pending(name, trigger)
+        # The holder looks for the marker only after releasing the lease, so
+        # either it sees the marker or we get the lease now
+        if not lease.acquire():
+            logger.info("IAM sync for %s is running; queued a follow-up run", PROJECT_ID)
+            return json.dumps({"skipped": "another run is in progress", "pending": True}), 202
+    try:
+        # Taken before reading the API; notifications from now on leave a new marker
+        changed = take_pending(name) is not None or trigger["kind"] == "change" or bool(trigger.get("change"))
+        summary = _run_cycle(deadline, fresh=changed)
+    finally:
+        lease.release()
+
+    # Released first, so the follow-up run can take the lease
+    follow_up = None
+    if has_pending(name):
+        follow_up = {"continuation": True, "change": True}
+    elif summary["continue"]:
+        follow_up = {"continuation": True}
+    if follow_up:
+        try:
+            trigger_continuation(follow_up)
+        except Exception as e:
+            logger.warning("Could not trigger a follow-up run: %s", e)
+    return json.dumps(summary), 500 if summary["failed"] else 200
+
+
+def _run_cycle(deadline: float, fresh: bool) -> dict:
     # Authenticate as the function's service account (Workload Identity)
     creds, _ = google.auth.default()
     iam_service = build("cloudresourcemanager", "v1", credentials=creds)
 
-    # 1️⃣ Pull the source‑of‑truth employee list
+    # 1️⃣ Parse the comma‑separated list of target roles; each role is one step
+    roles = [r.strip() for r in TARGET_ROLES.split(',') if r.strip()]
+    steps = [f"{PROJECT_ID}/{r}" for r in roles]
+    run = RunCoordinator(open_checkpoint(f"iam-sync-{PROJECT_ID}"), steps, deadline, fresh=fresh)
+
+    # 2️⃣ Pull the source‑of‑truth employee list
     employee_members = fetch_employees_from_api()
 
-    # 2️⃣ Parse the comma‑separated list of target roles
-    roles = [r.strip() for r in TARGET_ROLES.split(',') if r.strip()]
     overall_result = {}
-    for role in roles:
-        result = sync_role(iam_service, PROJECT_ID, role, employee_members)
-        overall_result[role] = result
+    for step in run.pending():
+        if not run.has_time():
+            logger.info("Stopping before %s to stay within the deadline", step)
+            break
+        project_id, role = step.split("/", 1)
+        with span("sync_role", role=role):
+            result = run.run(step, lambda: sync_role_with_retry(iam_service, project_id, role, employee_members))
+        if result is not None:
+            overall_result[role] = result
+
+    summary = run.finish()
+    summary["roles"] = overall_result
+    logger.info(
+        "IAM sync cycle %s %s: %d roles synced, %d failed, %d left for the next run",
+        run.cycle, "completed" if summary["complete"] else "stopped", len(summary["ran"]),
+        len(summary["failed"]), len(summary["remaining"]),
+        extra={"cycle": run.cycle, "remaining": summary["remaining"]},
+    )
+    return summary
+
+
+def plan_group_changes(client: DirectoryClient, desired_members: SortedMembers):
+    """Diff the group's USER members against *desired_members*.
+    Returns ``(insert|delete, email)`` changes; owners and managers are never removed.
+    """
+    current, protected = [], set()
+    for email, role in client.iter_members():
+        member = f"user:{email.strip().lower()}"
+        current.append(member)
+        if role != "MEMBER":
+            protected.add(member)
+    current = sorted(set(current))
+
+    changes = []
+    for op, member in merge_diff(desired_members, current):
+        if op == "remove" and member in protected:
+            continue
+        changes.append(("insert" if op == "add" else "delete", member[len("user:"):]))
+    return changes
+
+
+def sync_group(request):
+    """Entry point for the group membership sync (change notifications, continuations, Cloud Scheduler)."""
+    setup_logging("google-group-sync")
+    setup_tracing("google-group-sync")
+    try:
+        trigger = parse_trigger(request)
+    except (InvalidSignature, ValueError):
+        logger.warning("Rejected change notification with an invalid signature or body")
+        flush_logs()
+        return json.dumps({"error": "invalid notification"}), 401
+    try:
+        with span("sync_group", group=GROUP_EMAIL or "", trigger=trigger["kind"]), RunStats("Group sync"):
+            return _sync_group(trigger)
+    except Exception:
+        logger.exception("Group sync failed")
+        raise
+    finally:
+        flush_logs()
+
+
+def _sync_group(trigger: dict):
+    deadline = time.monotonic() + SYNC_DEADLINE_SECONDS
+    logger.info("Starting group sync for %s (%s)", GROUP_EMAIL, trigger["kind"], extra={"trigger": trigger})
+    if not all([API_ENDPOINT, GROUP_EMAIL]):
+        logger.error("Missing required environment variables EMPLOYEE_API_URL / GOOGLE_GROUP_EMAIL")
+        return {"error": "Missing required environment variables"}, 500
+
+    # The writer's checkpoint belongs to one run at a time; an overlapping
+    # change notification leaves a marker so the current run goes again
+    lease = open_lease(GROUP_EMAIL, LEASE_TTL_SECONDS)
+    if not lease.acquire():
+        if trigger["kind"] != "change":
+            logger.info("Another group sync run holds the lease for %s; skipping", GROUP_EMAIL)
+            return json.dumps({"skipped": "another run is in progress"}), 200
+        mark_pending(GROUP_EMAIL, trigger)
+        if not lease.acquire():
+            logger.info("Group sync for %s is running; queued a follow-up run", GROUP_EMAIL)
+            return json.dumps({"skipped": "another run is in progress", "pending": True}), 202
+    try:
+        # Taken before reading the API; notifications from now on leave a new marker
+        take_pending(GROUP_EMAIL)
+        summary = _apply_group_sync(deadline)
+    finally:
+        lease.release()
+
+    # Released first, so the follow-up run can take the lease
+    follow_up = None
+    if has_pending(GROUP_EMAIL):
+        follow_up = {"continuation": True, "change": True}
+    elif summary["remaining"] and summary["applied"]:
+        # Stopped at the deadline while making progress
+        follow_up = {"continuation": True}
+    if follow_up:
+        try:
+            trigger_continuation(follow_up)
+        except Exception as e:
+            logger.warning("Could not trigger a follow-up run: %s", e)
+    return json.dumps(summary), 500 if summary["failed"] else 200
+
+
+def _apply_group_sync(deadline: float) -> dict:
+    employee_members = fetch_employees_from_api()
+    digest = employee_members.digest()
+
+    with requests.Session() as session:
+        token = get_delegated_token(session)
+    client = DirectoryClient(GROUP_EMAIL, token)
+
+    # Resume the previous run's leftovers if the employee list is unchanged;
+    # otherwise plan from scratch (changes are idempotent either way)
+    checkpoint = open_checkpoint(GROUP_EMAIL)
+    state = checkpoint.load()
+    resumed = bool(state and state.get("digest") == digest)
+    if resumed:
+        changes = [tuple(change) for change in state["remaining"]]
+        logger.info("Resuming group sync with %d outstanding changes", len(changes))
+    else:
+        with span("plan_group_changes", group=GROUP_EMAIL):
+            changes = plan_group_changes(client, employee_members)
+
+    writer = MembershipWriter(client, checkpoint, digest, deadline=deadline)
+    with span("apply_group_changes", group=GROUP_EMAIL, changes=len(changes)):
+        summary = writer.apply(changes)
+    summary["resumed"] = resumed
+    summary["complete"] = summary["remaining"] == 0 and summary["failed"] == 0
 
-    print("IAM sync completed for all roles")
-    return json.dumps(overall_result), 200
+    logger.info(
+        "Group sync %s: %d/%d changes applied, %d failed, %d left for the next run",
+        "completed" if summary["complete"] else "stopped", summary["applied"], summary["changes"],
+        summary["failed"], summary["remaining"], extra={"summary": summary},
+    )
+    return summary
@@ -0,0 +1,212 @@
+"""Bounded-concurrency, rate-adaptive group membership writer.
+
+Changes are applied by a fixed pool of worker threads. Each worker sends up
+to ``WRITER_BATCH_SIZE`` calls per HTTP batch. An AIMD pacer shared by the
+workers spaces calls out. A throttled call (429, or 403 ``rateLimitExceeded``)
+or a 5xx halves the rate (once per congestion episode: batches already in
+flight do not halve it again) and pauses all workers for ``Retry-After``, or
+for one second. Every batch that passes without throttling raises the rate by
+``WRITER_RATE_INCREASE``, up to ``WRITER_MAX_RATE``.
+
+Throttled and 5xx calls go back on the queue (at most
+``WRITER_MAX_ATTEMPTS`` times). Other errors are permanent. Changes still
+outstanding when the run stops (deadline, failures) are saved to the
+checkpoint so the next run resumes with them. A run that completes clears it.
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from directory import CallResult
+
+logger = logging.getLogger(__name__)
+
+# Writer configuration
+WRITER_CONCURRENCY = int(os.getenv("WRITER_CONCURRENCY", "4"))
+WRITER_BATCH_SIZE = int(os.getenv("WRITER_BATCH_SIZE", "50"))
+WRITER_RATE = float(os.getenv("WRITER_RATE", "20"))  # initial calls per second
+WRITER_MIN_RATE = float(os.getenv("WRITER_MIN_RATE", "1"))
+WRITER_MAX_RATE = float(os.getenv("WRITER_MAX_RATE", "40"))  # Directory API default quota is 2400/min
+WRITER_RATE_INCREASE = float(os.getenv("WRITER_RATE_INCREASE", "1"))
+WRITER_MAX_ATTEMPTS = int(os.getenv("WRITER_MAX_ATTEMPTS", "5"))
+CHECKPOINT_INTERVAL_SECONDS = float(os.getenv("CHECKPOINT_INTERVAL_SECONDS", "5"))
+
+Change = Tuple[str, str]  # (insert|delete, email)
+
+
+class AdaptiveRateLimiter:
+    """Paces calls at an additive-increase / multiplicative-decrease rate."""
+
+    def __init__(self, rate: float = WRITER_RATE, min_rate: float = WRITER_MIN_RATE,
+                 max_rate: float = WRITER_MAX_RATE, increase: float = WRITER_RATE_INCREASE):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.throttled = 0
+        self._next = time.monotonic()
+        # Bumped on every decrease; batches sent before it do not decrease again
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, calls: int) -> int:
+        """Block until *calls* more calls fit in the current rate; returns the rate epoch."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + calls / self.rate
+            epoch = self._epoch
+        if start > now:
+            time.sleep(start - now)
+        return epoch
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, epoch: int, retry_after: Optional[float] = None):
+        """Halve the rate once per congestion episode and pause for *retry_after*."""
+        with self._lock:
+            self.throttled += 1
+            self._next = max(self._next, time.monotonic() + (retry_after or 1.0))
+            if epoch == self._epoch:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._epoch += 1
+
+
+class MembershipWriter:
+    """Applies membership changes to one group and checkpoints what is left."""
+
+    def __init__(self, client, checkpoint=None, digest: Optional[str] = None,
+                 concurrency: int = WRITER_CONCURRENCY, batch_size: int = WRITER_BATCH_SIZE,
+                 limiter: Optional[AdaptiveRateLimiter] = None, max_attempts: int = WRITER_MAX_ATTEMPTS,
+                 deadline: Optional[float] = None):
+        self.client = client
+        self.checkpoint = checkpoint
+        self.digest = digest
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.max_attempts = max_attempts
+        self.deadline = deadline  # time.monotonic() value; stop sending after it
+        self._queue: deque = deque()
+        self._attempts: Dict[Change, int] = {}
+        self._failed: Dict[str, dict] = {}
+        self._inflight: List[List[Change]] = []
+        self._applied = 0
+        self._batches = 0
+        self._saved_at = 0.0
+        self._cond = threading.Condition()
+
+    def _expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def _next_batch(self) -> Optional[List[Change]]:
+        with self._cond:
+            while not self._queue and self._inflight:
+                # Another worker may still put retries back on the queue
+                self._cond.wait()
+            if not self._queue or self._expired():
+                return None
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            self._inflight.append(batch)
+            return batch
+
+    def _complete(self, batch: List[Change], results, epoch: int):
+        retry_after = None
+        congested = False
+        with self._cond:
+            self._inflight.remove(batch)
+            self._batches += 1
+            for change, result in zip(batch, results):
+                if result.status < 300:
+                    self._applied += 1
+                    self._attempts.pop(change, None)
+                    continue
+                attempts = self._attempts.get(change, 0) + 1
+                self._attempts[change] = attempts
+                if result.retryable:
+                    # Quota errors and 5xx/transport failures both mean "slow down"
+                    congested = True
+                    retry_after = max(retry_after or 0, result.retry_after or 0) or None
+                if result.retryable and attempts < self.max_attempts:
+                    self._queue.append(change)
+                else:
+                    self._failed[change[1]] = {"op": change[0], "status": result.status, "reason": result.reason}
+            self._cond.notify_all()
+            if time.monotonic() - self._saved_at >= CHECKPOINT_INTERVAL_SECONDS:
+                self._save()
+        if congested:
+            self.limiter.on_throttle(epoch, retry_after)
+        else:
+            self.limiter.on_success()
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            epoch = self.limiter.acquire(len(batch))
+            try:
+                results = self.client.send(batch)
+            except Exception as e:
+                logger.warning("Membership batch of %d calls failed: %s", len(batch), e)
+                results = [CallResult(0, type(e).__name__)] * len(batch)
+            self._complete(batch, results, epoch)
+
+    def _outstanding(self) -> List[Change]:
+        pending = list(self._queue)
+        for batch in self._inflight:
+            pending.extend(batch)
+        pending.extend((failure["op"], email) for email, failure in self._failed.items())
+        return pending
+
+    def _save(self):
+        # Caller holds self._cond; saves are rate limited by CHECKPOINT_INTERVAL_SECONDS
+        self._saved_at = time.monotonic()
+        if self.checkpoint is None:
+            return
+        remaining = self._outstanding()
+        try:
+            if remaining:
+                self.checkpoint.save({
+                    "digest": self.digest,
+                    "remaining": remaining,
+                    "failed": self._failed,
+                    "saved_at": time.time(),
+                })
+            else:
+                self.checkpoint.clear()
+        except Exception as e:
+            logger.warning("Could not save checkpoint: %s", e)
+
+    def apply(self, changes: Iterable[Change]) -> dict:
+        """Apply *changes* and return a summary; blocks until done or the deadline passes."""
+        self._queue.extend(changes)
+        total = len(self._queue)
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="group-writer") as pool:
+            for _ in range(self.concurrency):
+                pool.submit(self._worker)
+        with self._cond:
+            self._save()
+            remaining = len(self._queue)
+        elapsed = time.monotonic() - start
+        summary = {
+            "changes": total,
+            "applied": self._applied,
+            "failed": len(self._failed),
+            "remaining": remaining,
+            "batches": self._batches,
+            "throttled": self.limiter.throttled,
+            "final_rate": round(self.limiter.rate, 2),
+            "seconds": round(elapsed, 3),
+            "calls_per_second": round(self._applied / elapsed, 1) if elapsed else None,
+        }
+        if self._failed:
+            logger.warning("%d membership changes failed", len(self._failed), extra={"failures": self._failed})
+        return summary
@@ -23,3 +23,16 @@ resource "google_project_iam_member" "sa_secret_accessor" {
   role    = "roles/secretmanager.secretAccessor"
   member  = "serviceAccount:${google_service_account.sync_sa.email}"
 }
+
+# Keyless domain-wide delegation: the function signs its own JWTs
+resource "google_service_account_iam_member" "sa_token_creator" {
+  service_account_id = google_service_account.sync_sa.name
+  role               = "roles/iam.serviceAccountTokenCreator"
+  member             = "serviceAccount:${google_service_account.sync_sa.email}"
+}
+
+resource "google_storage_bucket_iam_member" "sa_checkpoints" {
+  bucket = google_storage_bucket.checkpoints.name
+  role   = "roles/storage.objectAdmin"
+  member = "serviceAccount:${google_service_account.sync_sa.email}"
+}
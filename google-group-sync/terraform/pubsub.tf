@@ -0,0 +1,34 @@
+# The change topic is created by citadel_iam_sync/terraform; apply that first
+resource "google_pubsub_subscription" "sync_push" {
+  name  = "google-group-sync-push"
+  topic = "projects/${var.project_id}/topics/${var.change_topic}"
+
+  ack_deadline_seconds       = min(600, var.function_timeout + 30)
+  message_retention_duration = "86400s"
+
+  push_config {
+    push_endpoint = google_cloudfunctions_function.sync_function.https_trigger_url
+
+    oidc_token {
+      service_account_email = google_service_account.sync_sa.email
+    }
+  }
+
+  retry_policy {
+    minimum_backoff = "10s"
+    maximum_backoff = "600s"
+  }
+
+  depends_on = [google_project_service.apis]
+}
+
+# Pub/Sub mints the push subscription's OIDC tokens as the sync service account
+data "google_project" "project" {
+  project_id = var.project_id
+}
+
+resource "google_service_account_iam_member" "pubsub_token_creator" {
+  service_account_id = google_service_account.sync_sa.name
+  role               = "roles/iam.serviceAccountTokenCreator"
+  member             = "serviceAccount:service-${data.google_project.project.number}@gcp-sa-pubsub.iam.gserviceaccount.com"
+}
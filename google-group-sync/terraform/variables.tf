@@ -21,10 +21,18 @@ variable "target_roles" {
   default     = "roles/viewer"
 }
 
+# Runs are triggered by change notifications; the schedule only reconciles
+# drift (manual edits, lost notifications)
 variable "schedule_cron" {
-  description = "Cron schedule for the sync job"
+  description = "Cron schedule for the reconcile job"
   type        = string
-  default     = "0 * * * *" # Hourly
+  default     = "0 3 * * *" # Daily
+}
+
+variable "change_topic" {
+  description = "Pub/Sub topic the Employee APIs publish change notifications to"
+  type        = string
+  default     = "employee-changes"
 }
 
 variable "oauth_client_id" {
@@ -38,3 +46,25 @@ variable "oauth_client_secret" {
   type        = string
   sensitive   = true
 }
+
+variable "google_group_email" {
+  description = "Google Group kept in sync with the Employee API"
+  type        = string
+}
+
+variable "delegated_admin_email" {
+  description = "Workspace admin impersonated (domain-wide delegation) for Directory API calls"
+  type        = string
+}
+
+variable "function_timeout" {
+  description = "Cloud Function timeout in seconds (max 540); large re-orgs finish over several runs"
+  type        = number
+  default     = 300
+}
+
+variable "writer_concurrency" {
+  description = "Concurrent Directory API batch requests"
+  type        = number
+  default     = 4
+}
@@ -171,6 +171,34 @@ resource "google_sql_database_instance" "instance" {
   deletion_protection = false
 }
 
+# Read replicas for the Employee API (reads are routed to them, see employee-api/app/db.py)
+resource "google_sql_database_instance" "read_replica" {
+  count                = var.db_read_replicas
+  name                 = "jupyterhub-db-replica-${count.index}"
+  region               = var.region
+  database_version     = "POSTGRES_15"
+  master_instance_name = google_sql_database_instance.instance.name
+
+  replica_configuration {
+    failover_target = false
+  }
+
+  settings {
+    tier = var.db_replica_tier
+
+    database_flags {
+      name  = "cloudsql.iam_authentication"
+      value = "on"
+    }
+
+    ip_configuration {
+      ipv4_enabled    = false
+      private_network = google_compute_network.vpc.id
+    }
+  }
+  deletion_protection = false
+}
+
 # Database
 resource "google_sql_database" "database" {
   name     = "jupyterhub_db"
@@ -12,6 +12,11 @@ output "cloudsql_connection_name" {
   value = google_sql_database_instance.instance.connection_name
 }
 
+output "cloudsql_replica_connection_names" {
+  value       = google_sql_database_instance.read_replica[*].connection_name
+  description = "Read replica connection names, for extra cloud-sql-proxy instances (one port each)"
+}
+
 output "cloudsql_private_ip" {
   value = google_sql_database_instance.instance.private_ip_address
 }
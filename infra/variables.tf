@@ -40,3 +40,15 @@ variable "db_password" {
   type        = string
   default     = "postgres"
 }
+
+variable "db_read_replicas" {
+  description = "Number of Cloud SQL read replicas for the Employee API's reads (replicas need a dedicated-core tier, not db-f1-micro)"
+  type        = number
+  default     = 0
+}
+
+variable "db_replica_tier" {
+  description = "Machine tier of the read replicas"
+  type        = string
+  default     = "db-custom-1-3840"
+}
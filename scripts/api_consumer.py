@@ -6,10 +6,20 @@ Decrypts KMS-encrypted tokens and uses them to call the Employee API
 import base64
 import json
 import os
+from contextlib import nullcontext
 from datetime import datetime
 from google.cloud import kms
 import requests
 
+# Optional tracing: spans are recorded when the notebook has configured an
+# OpenTelemetry tracer provider, and trace context is propagated to the API.
+try:
+    from opentelemetry import propagate, trace
+    _tracer = trace.get_tracer("api_consumer")
+except ImportError:
+    propagate = None
+    _tracer = None
+
 # Configuration
 PROJECT_ID = os.getenv('GCP_PROJECT_ID', 'suman-110797')
 LOCATION = 'global'
@@ -17,6 +27,20 @@ KEY_RING = 'jupyterhub-keyring'
 KEY_NAME = 'auth-token-key'
 API_BASE_URL = os.getenv('API_BASE_URL', 'http://employee-api.jhub.svc.cluster.local')
 
+def _span(name, **attributes):
+    """Start a span if OpenTelemetry is available"""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def _with_trace_headers(headers: dict) -> dict:
+    """Add W3C trace context headers for the current span"""
+    if propagate is not None:
+        propagate.inject(headers)
+    return headers
+
+
 class SecureAPIClient:
     """
     Client for accessing the Employee API using KMS-encrypted tokens
@@ -31,6 +55,9 @@ class SecureAPIClient:
         """
         self.encrypted_token = encrypted_token
         self._credentials = None
+        # WAL position of this client's last write; reads send it back so a
+        # replica that has not replayed the write yet is not used
+        self._read_after = None
         self._decrypt_token()
     
     def _decrypt_token(self):
@@ -43,9 +70,10 @@ class SecureAPIClient:
             client = kms.KeyManagementServiceClient()
             key_name = client.crypto_key_path(PROJECT_ID, LOCATION, KEY_RING, KEY_NAME)
             
-            decrypt_response = client.decrypt(
-                request={'name': key_name, 'ciphertext': ciphertext}
-            )
+            with _span("kms.decrypt", key=KEY_NAME):
+                decrypt_response = client.decrypt(
+                    request={'name': key_name, 'ciphertext': ciphertext}
+                )
             
             # Parse decrypted payload
             payload = json.loads(decrypt_response.plaintext.decode('utf-8'))
@@ -69,6 +97,12 @@ class SecureAPIClient:
         api_secret = self._credentials['api_secret']
         return f"{api_id}:{api_secret}"
     
+    def _with_read_after(self, headers: dict) -> dict:
+        """Add the read-your-writes marker from the last create_employee()"""
+        if self._read_after:
+            headers['X-Read-After-LSN'] = self._read_after
+        return headers
+    
     def get_employees(self):
         """Fetch all employees from the API"""
         url = f"{API_BASE_URL}/api/employees"
@@ -76,9 +110,50 @@ class SecureAPIClient:
             'Authorization': f'Bearer {self._get_auth_header()}'
         }
         
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        return response.json()
+        with _span("employee_api.list_employees"):
+            response = requests.get(url, headers=_with_trace_headers(self._with_read_after(headers)))
+            response.raise_for_status()
+            return response.json()
+    
+    def get_employee_changes(self, since: datetime, etag: str = None):
+        """
+        Fetch the employees changed after *since* (incremental refresh)
+        
+        Returns (employees, updated_through, etag), or None when the API
+        answers 304 because nothing changed since the request that got *etag*.
+        updated_through is the since-token for the next call.
+        """
+        url = f"{API_BASE_URL}/api/employees"
+        headers = {
+            'Authorization': f'Bearer {self._get_auth_header()}'
+        }
+        if etag:
+            headers['If-None-Match'] = etag
+        
+        with _span("employee_api.employee_changes"):
+            response = requests.get(
+                url, headers=_with_trace_headers(self._with_read_after(headers)),
+                params={'updated_since': since.isoformat()}
+            )
+            if response.status_code == 304:
+                return None
+            response.raise_for_status()
+            return response.json(), response.headers.get('X-Updated-Through'), response.headers.get('ETag')
+    
+    def snapshot(self, path: str = None, max_age: float = None):
+        """
+        Local SQLite snapshot of the employees, refreshed incrementally
+        
+            snapshot = client.snapshot()
+            snapshot.query("SELECT department, AVG(salary) AS avg FROM employees GROUP BY department")
+        
+        See employee_snapshot.py for where it is stored and how kernels share it.
+        """
+        from employee_snapshot import SNAPSHOT_MAX_AGE_SECONDS, SNAPSHOT_PATH, EmployeeSnapshot
+        
+        return EmployeeSnapshot(
+            self, path or SNAPSHOT_PATH, SNAPSHOT_MAX_AGE_SECONDS if max_age is None else max_age
+        )
     
     def get_employee(self, employee_id: int):
         """Fetch a specific employee by ID"""
@@ -87,9 +162,10 @@ class SecureAPIClient:
             'Authorization': f'Bearer {self._get_auth_header()}'
         }
         
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        return response.json()
+        with _span("employee_api.get_employee", employee_id=employee_id):
+            response = requests.get(url, headers=_with_trace_headers(self._with_read_after(headers)))
+            response.raise_for_status()
+            return response.json()
     
     def create_employee(self, employee_data: dict):
         """Create a new employee"""
@@ -99,9 +175,11 @@ class SecureAPIClient:
             'Content-Type': 'application/json'
         }
         
-        response = requests.post(url, headers=headers, json=employee_data)
-        response.raise_for_status()
-        return response.json()
+        with _span("employee_api.create_employee"):
+            response = requests.post(url, headers=_with_trace_headers(headers), json=employee_data)
+            response.raise_for_status()
+            self._read_after = response.headers.get('X-Read-After-LSN') or self._read_after
+            return response.json()
 
 
 def test_api_access(encrypted_token: str):
@@ -168,6 +246,12 @@ if __name__ == "__main__":
         # Get specific employee
         emp = client.get_employee(1)
         
+        # Repeated analysis: query a local snapshot, refreshed incrementally
+        snapshot = client.snapshot()
+        engineers = snapshot.query(
+            "SELECT * FROM employees WHERE department = ?", ("Engineering",)
+        )
+        
         # Create new employee
         new_emp = client.create_employee({
             "first_name": "John",
@@ -0,0 +1,216 @@
+"""
+Local Employee Snapshot for JupyterHub
+Keeps a SQLite copy of the Employee API data in the user's home volume, so
+repeated analysis runs locally instead of calling the API every time
+
+The snapshot refreshes incrementally: it asks the API only for employees
+changed since the last refresh (?updated_since=), with If-None-Match, so an
+unchanged dataset costs one 304 and no rows. One kernel refreshes at a time
+(a lock file next to the database); every kernel reads the same file through
+a read-only, memory-mapped SQLite connection, so the pages are shared through
+the page cache instead of copied into each process
+
+Keep the database on the home PVC (the default). SQLite needs working file
+locks and shared memory for its WAL, which the gcsfuse bucket mount does not
+provide; publish a copy there with export_parquet() instead
+"""
+
+import fcntl
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+# Configuration
+SNAPSHOT_PATH = os.getenv(
+    'EMPLOYEE_SNAPSHOT_PATH', os.path.expanduser('~/.cache/employee-snapshot/employees.db')
+)
+# Refresh when the last refresh is older than this
+SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv('EMPLOYEE_SNAPSHOT_MAX_AGE_SECONDS', '300'))
+# Re-read this much before the since-token: catches rows from transactions
+# that committed after a later one was read, and replica lag
+SNAPSHOT_OVERLAP_SECONDS = float(os.getenv('EMPLOYEE_SNAPSHOT_OVERLAP_SECONDS', '300'))
+# Address space mapped per reader; pages are shared between kernels
+SNAPSHOT_MMAP_BYTES = int(os.getenv('EMPLOYEE_SNAPSHOT_MMAP_BYTES', str(256 << 20)))
+
+COLUMNS = ['employee_id', 'first_name', 'last_name', 'email', 'department', 'position', 'salary', 'hire_date']
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS employees (
+        employee_id INTEGER PRIMARY KEY,
+        first_name TEXT NOT NULL,
+        last_name TEXT NOT NULL,
+        email TEXT NOT NULL,
+        department TEXT,
+        position TEXT,
+        salary REAL,
+        hire_date TEXT
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS employees_email_idx ON employees (email);
+    CREATE INDEX IF NOT EXISTS employees_department_idx ON employees (department, position);
+    CREATE INDEX IF NOT EXISTS employees_last_name_idx ON employees (last_name, first_name);
+    CREATE INDEX IF NOT EXISTS employees_hire_date_idx ON employees (hire_date);
+    CREATE TABLE IF NOT EXISTS snapshot_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+"""
+
+
+class EmployeeSnapshot:
+    """
+    SQLite snapshot of /api/employees, refreshed incrementally through a SecureAPIClient
+    """
+
+    def __init__(self, client, path: str = SNAPSHOT_PATH, max_age: float = SNAPSHOT_MAX_AGE_SECONDS):
+        """
+        Args:
+            client: SecureAPIClient used for refreshes (None: read the snapshot as it is)
+            path: SQLite file; on the home PVC, not the gcsfuse mount
+            max_age: seconds before a query triggers a refresh (0: refresh on every query)
+        """
+        self.client = client
+        self.path = path
+        self.max_age = max_age
+        self._reader: Optional[sqlite3.Connection] = None
+        self._reader_pid = None
+
+    # Writing
+
+    @contextmanager
+    def _writer(self):
+        """The write connection, held under an exclusive lock shared by every kernel"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                # WAL: readers in other kernels keep reading while a refresh writes
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(SCHEMA)
+                yield conn
+            finally:
+                conn.close()
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _meta(conn, key: str) -> Optional[str]:
+        row = conn.execute('SELECT value FROM snapshot_meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def refresh(self, full: bool = False, force: bool = True) -> int:
+        """
+        Bring the snapshot up to date; returns the number of employees received
+
+        Args:
+            full: drop the snapshot and fetch everything (picks up deleted rows)
+            force: refresh even if another kernel refreshed within max_age
+        """
+        if self.client is None:
+            raise ValueError("Snapshot opened without a client cannot refresh")
+        with self._writer() as conn:
+            refreshed_at = float(self._meta(conn, 'refreshed_at') or 0)
+            if not force and not full and time.time() - refreshed_at < self.max_age:
+                return 0  # another kernel refreshed while this one waited for the lock
+
+            token = None if full else self._meta(conn, 'updated_through')
+            etag = None if full else self._meta(conn, 'etag')
+            since = datetime(1970, 1, 1)
+            if token:
+                since = datetime.fromisoformat(token) - timedelta(seconds=SNAPSHOT_OVERLAP_SECONDS)
+            changes = self.client.get_employee_changes(since, etag)
+
+            with conn:
+                if changes is not None:
+                    employees, updated_through, etag = changes
+                    if full:
+                        conn.execute('DELETE FROM employees')
+                    conn.executemany(
+                        f"INSERT OR REPLACE INTO employees ({', '.join(COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                        [tuple(e.get(c) for c in COLUMNS) for e in employees],
+                    )
+                    # An empty answer echoes the (overlapped) since; never move the token back
+                    if updated_through and (
+                        not token or datetime.fromisoformat(updated_through) > datetime.fromisoformat(token)
+                    ):
+                        token = updated_through
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO snapshot_meta (key, value) VALUES (?, ?)',
+                        [('updated_through', token), ('etag', etag)],
+                    )
+                conn.execute(
+                    'INSERT OR REPLACE INTO snapshot_meta (key, value) VALUES (?, ?)',
+                    ('refreshed_at', repr(time.time())),
+                )
+            return len(changes[0]) if changes is not None else 0
+
+    def refresh_if_stale(self) -> int:
+        """Refresh when the snapshot is older than max_age (or missing)"""
+        if self.client is None:
+            return 0
+        if os.path.exists(self.path) and self.age() < self.max_age:
+            return 0
+        return self.refresh(force=False)
+
+    def age(self) -> float:
+        """Seconds since the last refresh by any kernel"""
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM snapshot_meta WHERE key = 'refreshed_at'"
+            ).fetchone()
+        except sqlite3.Error:
+            return float('inf')
+        return time.time() - float(row[0]) if row else float('inf')
+
+    # Reading
+
+    def _connection(self) -> sqlite3.Connection:
+        """Read-only, memory-mapped connection of this process"""
+        if self._reader is None or self._reader_pid != os.getpid():
+            conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute(f'PRAGMA mmap_size={SNAPSHOT_MMAP_BYTES}')
+            conn.execute('PRAGMA query_only=1')
+            self._reader, self._reader_pid = conn, os.getpid()
+        return self._reader
+
+    def query(self, sql: str, params=()) -> List[dict]:
+        """
+        Run a read-only SQL query against the snapshot
+
+            snapshot.query("SELECT * FROM employees WHERE department = ?", ("Engineering",))
+        """
+        self.refresh_if_stale()
+        return [dict(row) for row in self._connection().execute(sql, params)]
+
+    def dataframe(self, sql: str = 'SELECT * FROM employees', params=()):
+        """Run a query into a pandas DataFrame"""
+        import pandas as pd
+
+        self.refresh_if_stale()
+        return pd.read_sql_query(sql, self._connection(), params=params)
+
+    def employees(self) -> List[dict]:
+        """All employees, like SecureAPIClient.get_employees()"""
+        return self.query('SELECT * FROM employees ORDER BY employee_id')
+
+    def employee(self, employee_id: int) -> Optional[dict]:
+        """One employee by ID, or None"""
+        rows = self.query('SELECT * FROM employees WHERE employee_id = ?', (employee_id,))
+        return rows[0] if rows else None
+
+    def export_parquet(self, path: str):
+        """
+        Write the snapshot as Parquet, e.g. to the shared bucket mount for other users
+
+            snapshot.export_parquet("/home/jovyan/shared/employees.parquet")
+        """
+        self.dataframe().to_parquet(path, index=False)
+
+    def close(self):
+        if self._reader is not None and self._reader_pid == os.getpid():
+            self._reader.close()
+        self._reader = None
@@ -0,0 +1,23 @@
+#!/bin/bash
+# Create the jwt-signing-keys Secret (ES256, one <kid>.pem) in a namespace
+# unless it already exists. Every API replica mounts it: tokens signed by one
+# pod verify on all of them. Rotate by adding a key with a later kid:
+#   kubectl create secret generic jwt-signing-keys -n <namespace> \
+#     --from-file=<old kid>.pem --from-file=<new kid>.pem --dry-run=client -o yaml | kubectl apply -f -
+
+set -e
+
+NAMESPACE=${1:?usage: $0 <namespace>}
+
+if kubectl get secret jwt-signing-keys -n "$NAMESPACE" > /dev/null 2>&1; then
+    echo "🔑 jwt-signing-keys already exists in $NAMESPACE"
+    exit 0
+fi
+
+KEYS_DIR=$(mktemp -d)
+trap 'rm -rf "$KEYS_DIR"' EXIT
+
+KID=$(date -u +%Y-%m-%d)
+openssl genpkey -algorithm EC -pkeyopt ec_paramgen_curve:P-256 -out "$KEYS_DIR/$KID.pem"
+kubectl create secret generic jwt-signing-keys -n "$NAMESPACE" --from-file="$KEYS_DIR"
+echo "🔑 Created jwt-signing-keys in $NAMESPACE (kid $KID)"
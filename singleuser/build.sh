@@ -0,0 +1,17 @@
+#!/bin/bash
+# Build and push the singleuser notebook image (helm/config.yaml: singleuser.image)
+
+set -e
+
+PROJECT_ID=${1:-suman-110797}
+IMAGE=gcr.io/$PROJECT_ID/jupyter-singleuser:latest
+
+cd "$(dirname "$0")"
+
+echo "📦 Building $IMAGE..."
+docker build -t $IMAGE .
+
+echo "📤 Pushing to Google Container Registry..."
+docker push $IMAGE
+
+echo "✅ Image pushed. New notebook servers pick it up on their next start."
@@ -0,0 +1,43 @@
+"""
+Database access for notebooks, through the Cloud SQL proxy sidecar
+
+    import notebook_db as db
+
+    df = db.read_dataframe("SELECT * FROM employees WHERE department = %s", ("Engineering",))
+    for chunk in db.iter_dataframes("SELECT * FROM events", batch_rows=100_000):
+        ...                                    # one chunk in memory at a time
+    table = db.read_arrow("SELECT * FROM events WHERE day = %s", (day,))
+    db.copy_dataframe(df, "analytics.daily_totals", create=True)
+    db.execute("DELETE FROM analytics.daily_totals WHERE day < %s", (cutoff,))
+
+Connections come from one pool per kernel (notebook_db.pool); reads stream
+through server-side cursors (notebook_db.query); loads use COPY
+(notebook_db.load)
+"""
+
+from notebook_db.load import copy_arrow, copy_dataframe
+from notebook_db.pool import PoolTimeout, close_pool, connection, execute, get_pool
+from notebook_db.query import (
+    ResultTooLarge,
+    iter_arrow,
+    iter_dataframes,
+    iter_rows,
+    read_arrow,
+    read_dataframe,
+)
+
+__all__ = [
+    "PoolTimeout",
+    "ResultTooLarge",
+    "close_pool",
+    "connection",
+    "copy_arrow",
+    "copy_dataframe",
+    "execute",
+    "get_pool",
+    "iter_arrow",
+    "iter_dataframes",
+    "iter_rows",
+    "read_arrow",
+    "read_dataframe",
+]
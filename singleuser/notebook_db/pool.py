@@ -0,0 +1,166 @@
+"""
+Process-wide connection pool to the Cloud SQL proxy sidecar
+Every notebook kernel is its own process and gets one pool, created on first
+use. Connections go to the cloud-sql-proxy sidecar on 127.0.0.1:5432, which
+does the IAM authentication, so the password is never checked. A connection
+that sat idle long enough for the proxy or the server to drop it is checked
+before it is handed out
+"""
+
+import os
+import time
+import getpass
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+# Database configuration (the singleuser pod sets these; defaults match helm/config.yaml)
+DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
+DB_PORT = os.getenv("DB_PORT", "5432")
+DB_NAME = os.getenv("DB_NAME", "jupyterhub_db")
+DB_USER = os.getenv("DB_USER", "jupyter-user-sa@suman-110797.iam")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "ignored-by-proxy")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_CONNECT_TIMEOUT_SECONDS = int(os.getenv("DB_CONNECT_TIMEOUT_SECONDS", "10"))
+# Idle connections older than this are pinged before reuse
+DB_POOL_CHECK_IDLE_SECONDS = float(os.getenv("DB_POOL_CHECK_IDLE_SECONDS", "60"))
+
+
+class PoolTimeout(psycopg2.pool.PoolError):
+    """Every pooled connection stayed in use for DB_POOL_TIMEOUT_SECONDS"""
+
+
+class ConnectionPool:
+    """Bounded pool of connections, most recently used first"""
+
+    def __init__(self, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT_SECONDS, **connect_kwargs):
+        self.size = size
+        self.timeout = timeout
+        self.connect_kwargs = connect_kwargs
+        self.pid = os.getpid()
+        self._idle: List[Tuple[psycopg2.extensions.connection, float]] = []
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> psycopg2.extensions.connection:
+        user = os.getenv("JUPYTERHUB_USER") or getpass.getuser()
+        return psycopg2.connect(
+            host=DB_HOST, port=DB_PORT, database=DB_NAME, user=DB_USER, password=DB_PASSWORD,
+            sslmode="disable", connect_timeout=DB_CONNECT_TIMEOUT_SECONDS,
+            # Shows up in pg_stat_activity, so a runaway query can be traced to its notebook
+            application_name=f"notebook:{user}"[:63],
+            **self.connect_kwargs,
+        )
+
+    @staticmethod
+    def _alive(conn) -> bool:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self) -> psycopg2.extensions.connection:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(
+                f"All {self.size} database connections stayed busy for {self.timeout:g}s; "
+                "close finished cursors/iterators or raise DB_POOL_SIZE"
+            )
+        try:
+            while True:
+                with self._lock:
+                    conn, released_at = self._idle.pop() if self._idle else (None, None)
+                if conn is None:
+                    return self._connect()
+                if conn.closed:
+                    continue
+                if time.monotonic() - released_at > DB_POOL_CHECK_IDLE_SECONDS and not self._alive(conn):
+                    conn.close()
+                    continue
+                return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn: psycopg2.extensions.connection):
+        try:
+            if not conn.closed and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            keep = not conn.closed
+        except psycopg2.Error:
+            keep = False
+        if keep:
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        else:
+            conn.close()
+        self._slots.release()
+
+    def closeall(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """The pool of this process (a forked child starts its own)"""
+    global _pool
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = ConnectionPool()
+    return _pool
+
+
+def close_pool():
+    """Close the idle connections, e.g. before a notebook goes idle for a long time"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.closeall()
+        _pool = None
+
+
+@contextmanager
+def connection():
+    """A pooled connection: commits when the block succeeds, rolls back when it raises
+
+        with notebook_db.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("UPDATE ...")
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+        if not conn.closed:
+            conn.commit()
+    except BaseException:
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                conn.close()
+        raise
+    finally:
+        pool.putconn(conn)
+
+
+def execute(sql: str, params=None) -> int:
+    """Run one statement (DDL, INSERT, UPDATE, ...) and commit; returns the affected row count"""
+    with connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.rowcount
@@ -0,0 +1,178 @@
+"""
+Streaming reads with named (server-side) cursors
+The server keeps the result set; the kernel holds one batch of rows at a time
+(DB_BATCH_ROWS, default 50000). iter_* functions hand each batch on as
+tuples, an Arrow RecordBatch or a DataFrame, so a query over a table far
+larger than the pod's memory can be aggregated or written out chunk by chunk.
+read_dataframe/read_arrow still build the whole result, but from columnar
+chunks instead of one huge fetchall() list of tuples, and stop with
+ResultTooLarge before the kernel is OOM-killed.
+
+Arrow types come from the PostgreSQL column types, so every batch of a query
+has the same schema, even when a batch happens to be all NULL
+"""
+
+import os
+import json
+import uuid
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from notebook_db.pool import connection
+
+# Query configuration
+DB_BATCH_ROWS = int(os.getenv("DB_BATCH_ROWS", "50000"))
+# read_dataframe/read_arrow give up beyond this (default: a quarter of the 4G pod limit)
+DB_RESULT_MAX_BYTES = int(os.getenv("DB_RESULT_MAX_BYTES", str(1 << 30)))
+
+
+class ResultTooLarge(MemoryError):
+    """The materialized result passed DB_RESULT_MAX_BYTES"""
+
+
+def iter_rows(sql: str, params=None, batch_rows: int = DB_BATCH_ROWS) -> Iterator[Tuple[List[str], list]]:
+    """Yield (column names, list of row tuples) batches from a server-side cursor
+
+    *sql* must return rows (SELECT, VALUES, WITH ... SELECT); use execute() for
+    anything else. The pooled connection is held until the iterator is
+    exhausted or closed, so finish, or close(), iterators you stop reading.
+    """
+    with connection() as conn:
+        # WITHOUT HOLD: the cursor and its result live in this transaction and end with it
+        with conn.cursor(name=f"nb_{uuid.uuid4().hex}") as cur:
+            cur.itersize = batch_rows
+            cur.execute(sql, params)
+            names = None
+            while True:
+                rows = cur.fetchmany(batch_rows)
+                if names is None:
+                    names = [column.name for column in cur.description]
+                if not rows:
+                    break
+                yield names, rows
+
+
+def _arrow_types(pa, description) -> list:
+    """Arrow type per result column, from the PostgreSQL type OIDs"""
+    by_oid = {
+        16: pa.bool_(),
+        17: pa.binary(),
+        20: pa.int64(),
+        21: pa.int16(),
+        23: pa.int32(),
+        26: pa.int64(),
+        700: pa.float32(),
+        701: pa.float64(),
+        1082: pa.date32(),
+        1083: pa.time64("us"),
+        1114: pa.timestamp("us"),
+        1184: pa.timestamp("us", tz="UTC"),
+    }
+    types = []
+    for column in description:
+        if column.type_code == 1700:  # numeric
+            precision, scale = column.precision, column.scale
+            if precision and 0 < precision <= 38 and scale is not None and 0 <= scale <= precision:
+                types.append(pa.decimal128(precision, scale))
+            else:
+                types.append(pa.float64())  # unconstrained numeric has no fixed scale
+        else:
+            types.append(by_oid.get(column.type_code, pa.string()))
+    return types
+
+
+def _arrow_column(pa, values: Sequence, arrow_type):
+    if pa.types.is_string(arrow_type):
+        # json/jsonb arrive parsed, uuid/interval/arrays as Python objects
+        values = [v if v is None or isinstance(v, str) else
+                  json.dumps(v, default=str) if isinstance(v, (dict, list)) else str(v) for v in values]
+    elif pa.types.is_floating(arrow_type):
+        values = [None if v is None else float(v) for v in values]
+    return pa.array(values, type=arrow_type)
+
+
+def iter_arrow(sql: str, params=None, batch_rows: int = DB_BATCH_ROWS):
+    """Yield pyarrow.RecordBatch objects with one schema for the whole query"""
+    import pyarrow as pa
+
+    schema = None
+    with connection() as conn:
+        with conn.cursor(name=f"nb_{uuid.uuid4().hex}") as cur:
+            cur.itersize = batch_rows
+            cur.execute(sql, params)
+            yielded = False
+            while True:
+                rows = cur.fetchmany(batch_rows)
+                if schema is None:
+                    types = _arrow_types(pa, cur.description)
+                    schema = pa.schema([(c.name, t) for c, t in zip(cur.description, types)])
+                if not rows:
+                    break
+                columns = list(zip(*rows))
+                yield pa.RecordBatch.from_arrays(
+                    [_arrow_column(pa, col, field.type) for col, field in zip(columns, schema)], schema=schema
+                )
+                yielded = True
+            if not yielded:
+                # No rows: still hand on the columns and their types
+                yield pa.RecordBatch.from_arrays([pa.array([], type=f.type) for f in schema], schema=schema)
+
+
+def iter_dataframes(sql: str, params=None, batch_rows: int = DB_BATCH_ROWS):
+    """Yield pandas DataFrames of up to *batch_rows* rows each
+
+        for chunk in notebook_db.iter_dataframes("SELECT * FROM events"):
+            totals = totals.add(chunk.groupby("kind").size(), fill_value=0)
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        import pandas as pd
+
+        for names, rows in iter_rows(sql, params, batch_rows):
+            yield pd.DataFrame.from_records(rows, columns=names)
+        return
+    # Through Arrow, so dtypes are the same in every chunk
+    for batch in iter_arrow(sql, params, batch_rows):
+        yield batch.to_pandas()
+
+
+def _too_large(limit: int, sql: str) -> ResultTooLarge:
+    return ResultTooLarge(
+        f"Result passed {limit:,} bytes (DB_RESULT_MAX_BYTES); aggregate in SQL, add a LIMIT, "
+        f"or process it in chunks with iter_dataframes()/iter_arrow(): {sql[:80]}"
+    )
+
+
+def read_arrow(sql: str, params=None, batch_rows: int = DB_BATCH_ROWS, max_bytes: Optional[int] = None):
+    """The whole result as a pyarrow.Table, built batch by batch"""
+    import pyarrow as pa
+
+    limit = max_bytes or DB_RESULT_MAX_BYTES
+    batches, total = [], 0
+    for batch in iter_arrow(sql, params, batch_rows):
+        batches.append(batch)
+        total += batch.nbytes
+        if total > limit:
+            raise _too_large(limit, sql)
+    return pa.Table.from_batches(batches)
+
+
+def read_dataframe(sql: str, params=None, batch_rows: int = DB_BATCH_ROWS, max_bytes: Optional[int] = None):
+    """The whole result as a pandas DataFrame, built from streamed chunks
+
+        df = notebook_db.read_dataframe("SELECT * FROM employees WHERE department = %s", ("Engineering",))
+    """
+    import pandas as pd
+
+    limit = max_bytes or DB_RESULT_MAX_BYTES
+    chunks, total = [], 0
+    for chunk in iter_dataframes(sql, params, batch_rows):
+        chunks.append(chunk)
+        total += int(chunk.memory_usage(deep=True).sum())
+        if total > limit:
+            raise _too_large(limit, sql)
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True, copy=False)
@@ -0,0 +1,7 @@
+"""Modules shared by the google-group-sync and citadel_iam_sync functions.
+
+Both functions' Terraform zips this package next to their own ``src/``:
+``members`` (streamed input, sorted diff), ``checkpoint`` (checkpoints and
+leases), ``coordinator`` (resumable sync cycles), ``trigger`` (what started a
+run, continuations), ``logging_config`` and ``tracing``.
+"""
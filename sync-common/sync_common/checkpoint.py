@@ -0,0 +1,175 @@
+"""Checkpoints and leases that let sync runs resume without overlapping.
+
+A checkpoint is one small JSON document describing what a run still has to
+do. It lives in a local file (development, the fake Directory API) or in
+Cloud Storage (``gs://bucket/prefix``), because a function instance's
+``/tmp`` does not outlive the instance.
+
+A lease next to the checkpoint keeps two runs from working on the same state
+at once. In Cloud Storage it is an object created with
+``if_generation_match=0``. A lease whose holder died (function timeout,
+crash) can be taken over once it expires. Locally it is an ``flock``.
+"""
+import os
+import json
+import time
+import uuid
+import fcntl
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Checkpoint configuration
+CHECKPOINT_URI = os.getenv("CHECKPOINT_URI", "/tmp/sync-checkpoints")  # directory or gs://bucket/prefix
+
+
+class FileCheckpoint:
+    """Checkpoint stored as a local JSON file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Optional[dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", self.path, e)
+            return None
+
+    def save(self, state: dict):
+        # Write then rename, so a crash never leaves half a checkpoint
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class GCSCheckpoint:
+    """Checkpoint stored as a Cloud Storage object."""
+
+    def __init__(self, bucket: str, name: str):
+        from google.cloud import storage
+
+        self.blob = storage.Client().bucket(bucket).blob(name)
+
+    def load(self) -> Optional[dict]:
+        from google.api_core.exceptions import NotFound
+
+        try:
+            return json.loads(self.blob.download_as_bytes())
+        except NotFound:
+            return None
+
+    def save(self, state: dict):
+        # Object uploads are atomic; readers see the old or the new checkpoint
+        self.blob.upload_from_string(json.dumps(state, separators=(",", ":")), content_type="application/json")
+
+    def clear(self):
+        from google.api_core.exceptions import NotFound
+
+        try:
+            self.blob.delete()
+        except NotFound:
+            pass
+
+
+class FileLease:
+    """Exclusive lock on a local file; released when the process exits."""
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._fd = None
+
+    def acquire(self) -> bool:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class GCSLease:
+    """Lease held as a Cloud Storage object that expires after *ttl* seconds."""
+
+    def __init__(self, bucket: str, name: str, ttl: float):
+        from google.cloud import storage
+
+        self.blob = storage.Client().bucket(bucket).blob(name)
+        self.ttl = ttl
+        self.holder = uuid.uuid4().hex
+        self._generation = None
+
+    def _write(self, if_generation_match: int):
+        body = json.dumps({"holder": self.holder, "expires_at": time.time() + self.ttl})
+        self.blob.upload_from_string(body, content_type="application/json", if_generation_match=if_generation_match)
+        self._generation = self.blob.generation
+
+    def acquire(self) -> bool:
+        from google.api_core.exceptions import NotFound, PreconditionFailed
+
+        try:
+            self._write(if_generation_match=0)
+            return True
+        except PreconditionFailed:
+            pass
+        # Held by someone else: take it over only if it has expired, and only
+        # if nobody else took it over in the meantime
+        try:
+            self.blob.reload()
+            current = json.loads(self.blob.download_as_bytes(if_generation_match=self.blob.generation))
+            if current.get("expires_at", 0) > time.time():
+                return False
+            logger.warning("Taking over expired lease %s from %s", self.blob.name, current.get("holder"))
+            self._write(if_generation_match=self.blob.generation)
+            return True
+        except (NotFound, PreconditionFailed):
+            return False
+
+    def release(self):
+        from google.api_core.exceptions import NotFound, PreconditionFailed
+
+        if self._generation is None:
+            return
+        try:
+            self.blob.delete(if_generation_match=self._generation)
+        except (NotFound, PreconditionFailed):
+            pass
+        self._generation = None
+
+
+def open_lease(name: str, ttl: float, uri: str = CHECKPOINT_URI):
+    """Return the lease guarding the checkpoint called *name* under *uri*."""
+    if uri.startswith("gs://"):
+        bucket, _, prefix = uri[len("gs://"):].partition("/")
+        return GCSLease(bucket, f"{prefix.rstrip('/')}/{name}.lease" if prefix else f"{name}.lease", ttl)
+    return FileLease(os.path.join(uri, f"{name}.lease"), ttl)
+
+
+def open_checkpoint(name: str, uri: str = CHECKPOINT_URI):
+    """Return the checkpoint called *name* under *uri* (a directory or ``gs://bucket/prefix``)."""
+    if uri.startswith("gs://"):
+        bucket, _, prefix = uri[len("gs://"):].partition("/")
+        return GCSCheckpoint(bucket, f"{prefix.rstrip('/')}/{name}.json" if prefix else f"{name}.json")
+    return FileCheckpoint(os.path.join(uri, f"{name}.json"))
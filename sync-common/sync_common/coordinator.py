@@ -0,0 +1,118 @@
+"""Run coordinator that spreads one sync cycle over several invocations.
+
+A cycle is one pass over a fixed list of steps (``project/role``). Progress
+is recorded in a checkpoint after every step, so a run that stops (deadline,
+error, timeout) is resumed by the next one from the first unfinished step.
+Finished steps are never redone within a cycle. Failed steps are retried by
+later runs. When every step of a cycle has succeeded, or the source data has
+changed, the next run starts a new cycle.
+
+After the first step of a run, a step only starts if its estimated duration
+still fits before the run's deadline. The estimate is an average of earlier
+step durations, kept in the checkpoint. Runs therefore stop between steps
+instead of being killed by the function timeout halfway through one.
+"""
+import os
+import time
+import uuid
+import logging
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Coordinator configuration
+STEP_ESTIMATE_SECONDS = float(os.getenv("STEP_ESTIMATE_SECONDS", "10"))  # until real durations are known
+MAX_CONTINUATIONS = int(os.getenv("MAX_CONTINUATIONS", "10"))  # self-triggered runs per cycle
+
+
+class RunCoordinator:
+    """Tracks which steps of the current cycle are done and whether time is left."""
+
+    def __init__(self, checkpoint, steps: List[str], deadline: float, fresh: bool = False):
+        self.checkpoint = checkpoint
+        self.steps = steps
+        self.deadline = deadline  # time.monotonic() value
+        state = checkpoint.load()
+        # fresh: the source data changed, so steps done earlier in the cycle are stale
+        if fresh or not state or state.get("complete") or state.get("steps_planned") != steps:
+            state = {
+                "cycle": uuid.uuid4().hex[:12],
+                "started_at": time.time(),
+                "steps_planned": steps,
+                "steps": {},
+                "invocations": 0,
+                "step_seconds": state.get("step_seconds") if state else None,
+            }
+        state["invocations"] += 1
+        self.state = state
+        if state["invocations"] > 1:
+            logger.info("Resuming sync cycle %s: %d/%d steps done", self.cycle, len(self.done()), len(steps))
+        self.ran: List[str] = []
+        self.failed: List[str] = []
+
+    @property
+    def cycle(self) -> str:
+        return self.state["cycle"]
+
+    def done(self) -> List[str]:
+        return [s for s in self.steps if self.state["steps"].get(s, {}).get("status") == "done"]
+
+    def pending(self) -> List[str]:
+        return [s for s in self.steps if self.state["steps"].get(s, {}).get("status") != "done"]
+
+    def has_time(self) -> bool:
+        now = time.monotonic()
+        if not self.ran and not self.failed:
+            # Each run tries at least one step, or a step slower than the
+            # whole budget would stall the cycle forever
+            return now < self.deadline
+        estimate = self.state.get("step_seconds") or STEP_ESTIMATE_SECONDS
+        return now + estimate <= self.deadline
+
+    def run(self, step: str, func: Callable[[], dict]) -> Optional[dict]:
+        """Run *step* and record its outcome; returns its result, or None if it failed."""
+        start = time.monotonic()
+        entry = self.state["steps"].setdefault(step, {"attempts": 0})
+        entry["attempts"] += 1
+        try:
+            result = func()
+        except Exception as e:
+            logger.exception("Sync step %s failed", step)
+            entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+            self.failed.append(step)
+            result = None
+        else:
+            entry.update(status="done", finished_at=time.time())
+            entry.pop("error", None)
+            self.ran.append(step)
+        elapsed = time.monotonic() - start
+        # Exponential average; slow steps raise the estimate quickly
+        previous = self.state.get("step_seconds")
+        self.state["step_seconds"] = round(max(elapsed, 0.5 * previous + 0.5 * elapsed) if previous else elapsed, 3)
+        self._save()
+        return result
+
+    def _save(self):
+        try:
+            self.checkpoint.save(self.state)
+        except Exception as e:
+            logger.warning("Could not save sync checkpoint: %s", e)
+
+    def finish(self) -> dict:
+        """Save the cycle's state and return a summary of this invocation."""
+        remaining = self.pending()
+        self.state["complete"] = not remaining
+        if self.state["complete"]:
+            self.state["completed_at"] = time.time()
+        self._save()
+        return {
+            "cycle": self.cycle,
+            "invocation": self.state["invocations"],
+            "ran": self.ran,
+            "failed": self.failed,
+            "remaining": remaining,
+            "complete": self.state["complete"],
+            # Only keep going on our own if this run made progress and stopped for time
+            "continue": bool(remaining) and bool(self.ran) and not self.failed
+                        and self.state["invocations"] <= MAX_CONTINUATIONS,
+        }
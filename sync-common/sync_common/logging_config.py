@@ -0,0 +1,152 @@
+"""Structured, non-blocking logging for the sync function.
+
+Records go to stdout as one JSON object per line, using the field names
+Cloud Logging understands (``severity``, ``message``, ``time``,
+``logging.googleapis.com/sourceLocation`` and trace). Severities are
+therefore kept instead of showing up as ERROR (see
+``docs/LOGGING_CONFIGURATION.md``). Logging calls only enqueue the record;
+a ``QueueListener`` thread encodes and writes it. Use ``%``-style arguments
+so that disabled or sampled-out records are never formatted.
+``LOG_SAMPLE_RATE`` samples records at or below ``LOG_SAMPLE_LEVEL``.
+"""
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    from opentelemetry import trace
+except ImportError:  # trace correlation is optional
+    trace = None
+
+# Logging configuration
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json | text
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+LOG_SAMPLE_LEVEL = os.getenv("LOG_SAMPLE_LEVEL", "DEBUG").upper()
+GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID") or os.getenv("GCP_PROJECT") or os.getenv("PROJECT_ID")
+
+# Python level -> Cloud Logging severity
+SEVERITY = {
+    logging.DEBUG: "DEBUG",
+    logging.INFO: "INFO",
+    logging.WARNING: "WARNING",
+    logging.ERROR: "ERROR",
+    logging.CRITICAL: "CRITICAL",
+}
+
+# Attributes every LogRecord has; anything else came from ``extra=``
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "trace_id", "span_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Render a record as a Cloud Logging compatible JSON line."""
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "severity": SEVERITY.get(record.levelno, "DEFAULT"),
+            "message": record.getMessage(),
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "logger": record.name,
+            "service": self.service,
+            "logging.googleapis.com/sourceLocation": {
+                "file": record.pathname,
+                "line": record.lineno,
+                "function": record.funcName,
+            },
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["logging.googleapis.com/trace"] = (
+                f"projects/{GCP_PROJECT_ID}/traces/{trace_id}" if GCP_PROJECT_ID else trace_id
+            )
+            entry["logging.googleapis.com/spanId"] = record.span_id
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records at or below a level; always keep the rest."""
+
+    def __init__(self, rate: float = LOG_SAMPLE_RATE, max_level: int = logging.getLevelName(LOG_SAMPLE_LEVEL)):
+        super().__init__()
+        self.rate = rate
+        self.max_level = max_level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue records with their message resolved but not yet encoded."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve args now (they may change after the call returns) and render
+        # the traceback while it is alive. JSON encoding waits for the listener.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if trace is not None:
+            context = trace.get_current_span().get_span_context()
+            if context.is_valid:
+                record.trace_id = format(context.trace_id, "032x")
+                record.span_id = format(context.span_id, "016x")
+        return record
+
+
+_listener = None
+_queue = None
+
+
+def setup_logging(service: str, level: str = LOG_LEVEL):
+    """Route all logging through a queue to a JSON stdout writer (idempotent)."""
+    global _listener, _queue
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        stream.setFormatter(JsonFormatter(service))
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    _queue = queue.Queue(-1)
+    handler = _DeferredQueueHandler(_queue)
+    handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def flush_logs():
+    """Block until every queued record has been written.
+
+    Call before returning from the function; the instance may be throttled
+    as soon as the response is sent.
+    """
+    if _queue is not None:
+        _queue.join()
@@ -0,0 +1,232 @@
+"""Streaming member input and sorted set diff for the sync functions.
+
+The employee list is read as a stream. With ``Accept: application/x-ndjson``
+the Employee API sends one employee per line. Plain JSON pages are also
+accepted, following ``Link: <...>; rel="next"`` when it is present. Emails
+are normalized exactly once (stripped, lowercased, excluded domains dropped,
+``user:`` prefix added). They are then packed into a ``SortedMembers``: one
+newline-joined string instead of a set of separate string objects, built from
+bounded sorted runs. Desired and current members are compared in a single
+merge pass over the two sorted sequences.
+
+``RunStats`` reports wall time, CPU time and peak memory for each run.
+"""
+import io
+import os
+import sys
+import json
+import time
+import heapq
+import bisect
+import hashlib
+import logging
+import operator
+import resource
+import itertools
+import tracemalloc
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Member stream configuration
+MEMBER_RUN_SIZE = int(os.getenv("MEMBER_RUN_SIZE", "100000"))  # members sorted in memory at a time
+NDJSON_CHUNK_BYTES = int(os.getenv("NDJSON_CHUNK_BYTES", str(1024 * 1024)))
+MERGE_WINDOW = int(os.getenv("MERGE_WINDOW", "10000"))  # desired members diffed per step
+EXCLUDED_EMAIL_DOMAINS = tuple(
+    f"@{d.strip().lower()}" for d in os.getenv("EXCLUDED_EMAIL_DOMAINS", "example.com").split(",") if d.strip()
+)
+SYNC_TRACE_MEMORY = os.getenv("SYNC_TRACE_MEMORY", "false").lower() == "true"
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def parse_ndjson(chunks: Iterable[bytes]) -> Iterator[List[dict]]:
+    """Decode NDJSON from arbitrary byte chunks, yielding one list of objects per chunk."""
+    tail = b""
+    for chunk in chunks:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        # Parsing a chunk's lines as one array is several times faster than
+        # calling json.loads per line
+        batch = b",".join(filter(None, lines))
+        if batch:
+            yield json.loads(b"[" + batch + b"]")
+    if tail.strip():
+        yield [json.loads(tail)]
+
+
+_email = operator.itemgetter("email")
+
+
+def iter_employee_emails(session, url: str, headers: dict, timeout: float = 30) -> Iterator[str]:
+    """Yield employee emails from the list endpoint without buffering the whole response.
+
+    *session* is a ``requests.Session``; connections are reused across pages.
+    """
+    headers = {**headers, "Accept": f"{NDJSON_MEDIA_TYPE}, application/json;q=0.9"}
+    while url:
+        with session.get(url, headers=headers, timeout=timeout, stream=True) as resp:
+            resp.raise_for_status()
+            if resp.headers.get("Content-Type", "").startswith(NDJSON_MEDIA_TYPE):
+                for batch in parse_ndjson(resp.iter_content(chunk_size=NDJSON_CHUNK_BYTES)):
+                    yield from map(_email, batch)
+            else:
+                yield from map(_email, resp.json().get("employees", []))
+            url = resp.links.get("next", {}).get("url")
+
+
+def normalize_members(emails: Iterable[str], excluded: Tuple[str, ...] = EXCLUDED_EMAIL_DOMAINS) -> List[str]:
+    """Map raw emails to lowercase ``user:`` members, dropping excluded domains."""
+    # Placeholder/example addresses are not real Google accounts
+    return [
+        f"user:{email}"
+        for email in map(str.lower, map(str.strip, emails))
+        if email and not email.endswith(excluded) and "\n" not in email
+    ]
+
+
+# Runs are stored newline-terminated. "\n" sorts before every printable
+# character, so terminated lines sort exactly like the bare members.
+_strip_newline = operator.itemgetter(slice(None, -1))
+
+
+def _chunks(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    items = iter(items)
+    return iter(lambda: list(itertools.islice(items, size)), [])
+
+
+def _pack_run(members: List[str]) -> str:
+    return "".join(member + "\n" for member in sorted(set(members)))
+
+
+def _first(run: str) -> str:
+    return run[:run.index("\n")]
+
+
+def _last(run: str) -> str:
+    return run[run.rfind("\n", 0, len(run) - 1) + 1:-1]
+
+
+class SortedMembers:
+    """Sorted, deduplicated members packed into one newline-joined string."""
+
+    def __init__(self, blob: str = "", count: int = 0):
+        self._blob = blob
+        self._count = count
+
+    @classmethod
+    def from_emails(cls, emails: Iterable[str], run_size: int = MEMBER_RUN_SIZE,
+                    excluded: Tuple[str, ...] = EXCLUDED_EMAIL_DOMAINS) -> "SortedMembers":
+        """Normalize raw *emails* in small batches and pack them."""
+        members = itertools.chain.from_iterable(normalize_members(batch, excluded) for batch in _chunks(emails, 8192))
+        return cls.from_iterable(members, run_size)
+
+    @classmethod
+    def from_iterable(cls, members: Iterable[str], run_size: int = MEMBER_RUN_SIZE) -> "SortedMembers":
+        """Pack already normalized *members*, sorting *run_size* at a time."""
+        return cls._from_runs(_chunks(members, run_size))
+
+    @classmethod
+    def _from_runs(cls, chunks: Iterable[List[str]]) -> "SortedMembers":
+        # Sort and pack each bounded chunk, then merge the packed runs
+        runs = [_pack_run(chunk) for chunk in chunks if chunk]
+
+        if len(runs) <= 1:
+            blob = runs[0] if runs else ""
+        elif all(_last(a) < _first(b) for a, b in zip(runs, runs[1:])):
+            # Input was already ordered (the API streams by email): the runs
+            # do not overlap and can simply be concatenated
+            blob = "".join(runs)
+            del runs
+        else:
+            # Only the packed runs and the merged output are held here, never
+            # a list of all members
+            merged = heapq.merge(*(io.StringIO(run) for run in runs))
+            buffer = io.StringIO()
+            buffer.writelines(line for line, _ in itertools.groupby(merged))
+            blob = buffer.getvalue()
+            del runs, buffer
+        return cls(blob, blob.count("\n"))
+
+    def __iter__(self) -> Iterator[str]:
+        return map(_strip_newline, io.StringIO(self._blob))
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self._blob)
+
+    def digest(self) -> str:
+        """SHA-256 of the member set; equal sets have equal digests."""
+        return hashlib.sha256(self._blob.encode("utf-8")).hexdigest()
+
+
+def merge_diff(desired: Iterable[str], current: Sequence[str], window: int = MERGE_WINDOW) -> Iterator[Tuple[str, str]]:
+    """Yield ``("add", m)`` / ``("remove", m)`` for sorted, duplicate-free *desired* and *current*.
+
+    One merge pass, *window* desired members at a time. Each window is
+    matched to its slice of *current* with a bisect and diffed with set
+    operations, so the per-member work runs in C rather than in a Python loop.
+    """
+    start = 0
+    desired = iter(desired)
+    while True:
+        block = list(itertools.islice(desired, window))
+        if not block:
+            break
+        end = bisect.bisect_right(current, block[-1], start)
+        want, have = set(block), set(current[start:end])
+        start = end
+        for member in sorted(want - have):
+            yield "add", member
+        for member in sorted(have - want):
+            yield "remove", member
+    for member in current[start:]:
+        yield "remove", member
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+class RunStats:
+    """Wall time, CPU time and peak memory of one sync run, logged on exit."""
+
+    def __init__(self, name: str, trace_memory: bool = SYNC_TRACE_MEMORY):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.stats: dict = {}
+
+    def __enter__(self) -> "RunStats":
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._rss = _max_rss_mb()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        else:
+            self._tracing = False
+        return self
+
+    def __exit__(self, *exc_info) -> Optional[bool]:
+        peak_rss = _max_rss_mb()
+        self.stats = {
+            "wall_seconds": round(time.perf_counter() - self._wall, 3),
+            "cpu_seconds": round(time.process_time() - self._cpu, 3),
+            # Peak RSS is per process; a warm instance reports the highest run so far
+            "peak_rss_mb": round(peak_rss, 1),
+            "rss_growth_mb": round(peak_rss - self._rss, 1),
+        }
+        if self._tracing:
+            self.stats["python_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+            tracemalloc.stop()
+        logger.info(
+            "%s: %.3fs wall, %.3fs CPU, peak RSS %.1f MiB", self.name,
+            self.stats["wall_seconds"], self.stats["cpu_seconds"], self.stats["peak_rss_mb"],
+            extra={"run_stats": self.stats},
+        )
+        return None
@@ -0,0 +1,71 @@
+"""Optional OpenTelemetry tracing for the sync function.
+
+Spans cover Secret Manager, Employee API and IAM calls. Outgoing requests to
+the Employee API carry a W3C ``traceparent`` header so the API's spans join
+the same trace. Without the OpenTelemetry packages, or with
+``TRACING_EXPORTER=none``, everything here is a no-op.
+"""
+import os
+import sys
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import propagate, trace
+except ImportError:  # tracing is optional
+    trace = None
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")  # none | console | file | otlp
+TRACING_FILE = os.getenv("TRACING_FILE", "/tmp/traces.jsonl")
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+
+tracer = trace.get_tracer("employee-sync") if trace is not None else None
+_provider = None
+
+
+def setup_tracing(service_name: str):
+    """Install the tracer provider once per function instance."""
+    global _provider
+    if trace is None or TRACING_EXPORTER == "none" or _provider is not None:
+        return
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter, SimpleSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    if TRACING_EXPORTER == "file":
+        exporter = ConsoleSpanExporter(
+            out=open(TRACING_FILE, "a", buffering=1),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    elif TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        exporter = OTLPSpanExporter()
+    else:
+        exporter = ConsoleSpanExporter(out=sys.stdout)
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+    )
+    # Functions may be frozen between invocations, so export synchronously
+    _provider.add_span_processor(SimpleSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Run the wrapped block inside a span of the current trace."""
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def inject_headers(headers: dict) -> dict:
+    """Add trace propagation headers for the current span to *headers*."""
+    if trace is not None:
+        propagate.inject(headers)
+    return headers
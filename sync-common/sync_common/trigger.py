@@ -0,0 +1,98 @@
+"""What started a sync run, and how runs hand work to each other.
+
+A run is started by one of:
+
+* a change notification from the Employee API: a Pub/Sub push envelope, or a
+  direct webhook whose body is signed with ``NOTIFY_SECRET`` when that is set;
+* a continuation posted by an earlier run (``{"continuation": true}``);
+* anything else, e.g. the Cloud Scheduler reconcile job.
+
+Notifications that arrive while another run holds the lease are not lost.
+They leave a *pending* marker next to the checkpoint. The holder checks for
+the marker after releasing the lease and starts one follow-up run for all of
+them. A burst of notifications therefore costs at most one extra run.
+"""
+import os
+import json
+import hmac
+import base64
+import hashlib
+import logging
+import time
+from typing import Optional
+
+import requests
+
+from sync_common.checkpoint import open_checkpoint
+from sync_common.tracing import inject_headers
+
+logger = logging.getLogger(__name__)
+
+# Trigger configuration
+NOTIFY_SECRET = os.getenv("NOTIFY_SECRET")
+CONTINUATION_URL = os.getenv("CONTINUATION_URL")  # this function's URL; unset waits for the next trigger
+
+CHANGE_NOTIFICATION = "employees.changed"
+
+
+class InvalidSignature(Exception):
+    """A webhook notification did not carry a valid ``X-Signature-256``."""
+
+
+def parse_trigger(request) -> dict:
+    """Classify *request*; returns ``{"kind": "change" | "continuation" | "scheduled", ...}``."""
+    body = request.get_data() if request is not None else b""
+    payload = json.loads(body) if body.strip().startswith(b"{") else {}
+
+    if isinstance(payload.get("message"), dict):
+        # Pub/Sub push: authenticated by the subscription's OIDC token
+        message = payload["message"]
+        data = json.loads(base64.b64decode(message.get("data") or "") or b"{}")
+        return {"kind": "change", "via": "pubsub", "message_id": message.get("messageId"), **data}
+    if payload.get("type") == CHANGE_NOTIFICATION:
+        if NOTIFY_SECRET:
+            expected = "sha256=" + hmac.new(NOTIFY_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(expected, request.headers.get("X-Signature-256", "")):
+                raise InvalidSignature()
+        return {"kind": "change", "via": "webhook", **payload}
+    if payload.get("continuation"):
+        return {"kind": "continuation", **payload}
+    return {"kind": "scheduled"}
+
+
+def mark_pending(name: str, trigger: dict):
+    """Leave a marker so the run holding the lease for *name* runs once more."""
+    open_checkpoint(f"{name}.pending").save({"requested_at": time.time(), "trigger": trigger})
+
+
+def take_pending(name: str) -> Optional[dict]:
+    """Return and remove the pending marker for *name*, if any."""
+    pending = open_checkpoint(f"{name}.pending")
+    state = pending.load()
+    if state is not None:
+        pending.clear()
+    return state
+
+
+def has_pending(name: str) -> bool:
+    return open_checkpoint(f"{name}.pending").load() is not None
+
+
+def trigger_continuation(body: dict, url: Optional[str] = CONTINUATION_URL) -> bool:
+    """Invoke this function again with *body*, without waiting for it; False if no URL is configured."""
+    if not url:
+        return False
+    headers = inject_headers({})
+    if url.startswith("https://"):
+        # Deployed functions require an identity token; local ones do not
+        from google.auth.transport.requests import Request
+        from google.oauth2 import id_token
+
+        headers["Authorization"] = f"Bearer {id_token.fetch_id_token(Request(), url)}"
+    try:
+        # Only wait until the request is sent; the new invocation runs on its own
+        requests.post(url, json=body, headers=headers, timeout=(10, 1))
+    except requests.exceptions.ReadTimeout:
+        pass
+    logger.info("Triggered a follow-up run", extra={"trigger": body})
+    return True